@@ -0,0 +1,216 @@
+"""
+Chunked, resumable batch submission for the CLI.
+
+Splits a large set of video configs into chunks, submits several chunks
+concurrently to /batch/orchestrate over one shared client, and appends each
+finished item to a JSONL checkpoint. Re-running with the same checkpoint
+skips items that already succeeded, so an interrupted run of thousands of
+configs only resumes the unfinished ones.
+
+An item the service parked (no healthy provider) is recorded as 'parked'
+with its ticket. On resume its ticket is polled instead of resubmitting it:
+a dispatched ticket becomes a success, one still parked is left alone, and
+only a failed, expired or unknown ticket is submitted again.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from schemas import VideoRequest
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    """One video config to submit, with a key that is stable across runs"""
+    key: str
+    request_id: str
+    source: str
+    payload: Dict[str, Any]
+
+
+def _item_key(source: str, index: int, config: Dict[str, Any]) -> str:
+    material = json.dumps([source, index, config], sort_keys=True, default=str)
+    return hashlib.sha1(material.encode()).hexdigest()
+
+
+def load_batch_items(config_files: List[str]) -> Tuple[List[BatchItem], List[Tuple[str, str]]]:
+    """Load and validate configs; a file may hold one config or a JSON list of them"""
+    items = []
+    errors = []
+    for config_file in config_files:
+        try:
+            with open(config_file, 'r') as f:
+                loaded = json.load(f)
+        except Exception as e:
+            errors.append((config_file, str(e)))
+            continue
+
+        configs = loaded if isinstance(loaded, list) else [loaded]
+        for index, config in enumerate(configs):
+            source = config_file if len(configs) == 1 else f"{config_file}#{index}"
+            try:
+                key = _item_key(os.path.abspath(config_file), index, config)
+                request_id = config.get('request_id') or f"batch_{key[:12]}"
+                request = VideoRequest(**{**config, 'request_id': request_id})
+            except Exception as e:
+                errors.append((source, str(e)))
+                continue
+            items.append(BatchItem(key, request_id, source, request.dict()))
+    return items, errors
+
+
+class Checkpoint:
+    """Append-only JSONL record of finished items"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Latest record per item key; a torn final line from a crash is ignored"""
+        records = {}
+        if not self.path or not os.path.exists(self.path):
+            return records
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                records[record['key']] = record
+        return records
+
+    def append(self, records: List[Dict[str, Any]]) -> None:
+        if not self.path or not records:
+            return
+        with open(self.path, 'a+') as f:
+            # Terminate a torn line left by a crash so it can't swallow this record
+            if f.tell() > 0:
+                f.seek(f.tell() - 1)
+                if f.read(1) != "\n":
+                    f.write("\n")
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class BatchRunner:
+    """Submits items in chunks with bounded concurrency over one pooled client"""
+
+    def __init__(self, base_url: str, chunk_size: int = 5, concurrency: int = 4,
+                 timeout: float = 300.0, checkpoint: Optional[Checkpoint] = None,
+                 on_item: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.base_url = base_url
+        self.chunk_size = max(1, chunk_size)
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.checkpoint = checkpoint or Checkpoint(None)
+        self.on_item = on_item or (lambda record: None)
+
+    async def pending(self, items: List[BatchItem]) -> Tuple[List[BatchItem], List[Dict[str, Any]]]:
+        """Split items into those still to run and records already completed or parked"""
+        done = self.checkpoint.load()
+        remaining = []
+        completed = []
+        parked = []
+        for item in items:
+            record = done.get(item.key)
+            if record and record.get('status') == 'success':
+                completed.append(record)
+            elif record and record.get('status') == 'parked':
+                parked.append((item, record))
+            else:
+                remaining.append(item)
+
+        if parked:
+            async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout) as client:
+                polled = await asyncio.gather(*(self._poll_parked(client, item, record)
+                                                for item, record in parked))
+            self.checkpoint.append([record for (_, old), record in zip(parked, polled)
+                                    if record is not None and record is not old])
+            for (item, _), record in zip(parked, polled):
+                if record is None:
+                    remaining.append(item)
+                else:
+                    completed.append(record)
+        return remaining, completed
+
+    async def _poll_parked(self, client: httpx.AsyncClient, item: BatchItem,
+                           record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Updated record for a parked item, or None when it has to be submitted again"""
+        try:
+            response = await client.get(f"/orchestrate/parked/{record['parked']['ticket']}")
+        except Exception:
+            # Can't tell whether it was dispatched; resubmitting could duplicate it
+            return record
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            return record
+        ticket = response.json()
+        if ticket.get('status') == 'dispatched':
+            return self._record(item, 'success', result=ticket.get('result'))
+        if ticket.get('status') == 'parked':
+            return record
+        return None
+
+    async def run(self, items: List[BatchItem]) -> List[Dict[str, Any]]:
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        slots = asyncio.Semaphore(self.concurrency)
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        records: List[Dict[str, Any]] = []
+
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=self.timeout) as client:
+            async def run_chunk(chunk: List[BatchItem]):
+                async with slots:
+                    chunk_records = await self._submit_chunk(client, chunk)
+                self.checkpoint.append(chunk_records)
+                for record in chunk_records:
+                    self.on_item(record)
+                records.extend(chunk_records)
+
+            await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+
+        return records
+
+    async def _submit_chunk(self, client: httpx.AsyncClient, chunk: List[BatchItem]) -> List[Dict[str, Any]]:
+        try:
+            response = await client.post("/batch/orchestrate", json=[item.payload for item in chunk])
+            if response.status_code != 200:
+                return [self._record(item, 'error', error=f"HTTP {response.status_code}: {response.text}")
+                        for item in chunk]
+            results = response.json().get('batch_results', [])
+        except Exception as e:
+            return [self._record(item, 'error', error=f"{type(e).__name__}: {e}") for item in chunk]
+
+        by_request_id = {r.get('request_id'): r for r in results}
+        records = []
+        for item in chunk:
+            result = by_request_id.get(item.request_id)
+            if result is None:
+                records.append(self._record(item, 'error', error="Missing from batch response"))
+            elif result.get('status') == 'success':
+                records.append(self._record(item, 'success', result=result.get('result')))
+            elif result.get('status') == 'parked':
+                records.append(self._record(item, 'parked', parked=result.get('parked')))
+            else:
+                records.append(self._record(item, 'error', error=result.get('error', 'Unknown error')))
+        return records
+
+    @staticmethod
+    def _record(item: BatchItem, status: str, result: Any = None, error: Optional[str] = None,
+                parked: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        record = {"key": item.key, "request_id": item.request_id, "source": item.source, "status": status}
+        if result is not None:
+            record["result"] = result
+        if error is not None:
+            record["error"] = error
+        if parked is not None:
+            record["parked"] = parked
+        return record
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Allocation profile of a single orchestration.
+
+Drives main.orchestrate_video in-process with the Node API and provider
+health probe replaced by instant local responses, so only ai-logic's own
+routing, health bookkeeping and config preparation are measured.
+
+    python benchmarks/alloc_profile.py --iterations 20000
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+from schemas import VideoRequest  # noqa: E402
+
+SAMPLE_REQUESTS = [
+    {"topic": "ocean life", "style": "cinematic", "duration": 45, "content_type": "educational"},
+    {"topic": "space cats", "style": "animation", "duration": 20, "priority": "high"},
+    {"topic": "quarterly update", "style": "documentary", "duration": 150, "content_type": "corporate"},
+    {"topic": "history of tea", "style": "slideshow_modern", "duration": 300, "voice_style": "calm"},
+]
+
+
+async def _fake_node_api(provider_config):
+    return {"jobId": "job_bench", "status": "processing", "estimatedDuration": "1-3 minutes"}
+
+
+async def _fake_health(provider, node_health=None):
+    return True
+
+
+def _install_fakes():
+    main.call_node_api = _fake_node_api
+    main.health_checker._check_provider_health = _fake_health
+    # The sample requests repeat, so measure full orchestrations rather than cache hits
+    main.result_cache = None
+
+
+async def _run(requests, iterations):
+    # Results are discarded immediately, unlike a batch
+    n = len(requests)
+    for i in range(iterations):
+        await main.orchestrate_video(requests[i % n])
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    _install_fakes()
+    requests = [VideoRequest(**r) for r in SAMPLE_REQUESTS]
+    loop = asyncio.new_event_loop()
+
+    # Warm up caches and lazily-built state
+    loop.run_until_complete(_run(requests, 200))
+
+    # Peak transient memory per orchestration
+    tracemalloc.start()
+    peaks = []
+    for request in requests:
+        gc.collect()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        loop.run_until_complete(main.orchestrate_video(request))
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - base)
+    tracemalloc.stop()
+
+    # GC pressure and throughput over one large batch
+    collections = [0, 0, 0]
+
+    def _on_gc(phase, info):
+        if phase == "start":
+            collections[info["generation"]] += 1
+
+    batch = [requests[i % len(requests)] for i in range(args.iterations)]
+    gc.collect()
+    gc.callbacks.append(_on_gc)
+    start = time.perf_counter()
+    loop.run_until_complete(main.batch_orchestrate(batch))
+    elapsed = time.perf_counter() - start
+    gc.callbacks.remove(_on_gc)
+    loop.close()
+
+    per_10k = [c * 10000 / args.iterations for c in collections]
+    print(f"batch size:              {args.iterations}")
+    print(f"mean time/orchestration: {elapsed / args.iterations * 1e6:.1f} us")
+    print(f"peak transient bytes:    {sum(peaks) / len(peaks):.0f} (mean of {len(peaks)} requests)")
+    print(f"gc collections / 10k:    gen0={per_10k[0]:.1f} gen1={per_10k[1]:.1f} gen2={per_10k[2]:.1f}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Cold start: first-request latency with and without the startup prewarm.
+
+Starts node_simulator, then for each PREWARM setting starts a fresh ai-logic
+process, waits for /health (live) and then /ready, and times the first few
+/orchestrate/video requests against the steady-state median. Without the
+prewarm the first request opens the Node connection and makes the first
+health probe; with it, those happen before /ready turns true.
+
+    python benchmarks/cold_start.py --runs 3 --health-ms 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+NODE_PORT = 3940
+APP_PORT = 8940
+
+
+def _wait(client, path, status=200, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if client.get(path).status_code == status:
+                return time.perf_counter()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError(f"{path} did not return {status}")
+
+
+def _run(prewarm, first, steady):
+    env = {**os.environ, "PREWARM": prewarm, "NODE_API_URL": f"http://127.0.0.1:{NODE_PORT}",
+           "RESULT_CACHE_TTL": "0", "PYTHONPATH": str(ROOT)}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(APP_PORT), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{APP_PORT}", timeout=30.0) as client:
+            live = _wait(client, "/health")
+            ready = _wait(client, "/ready")
+            latencies = []
+            for i in range(first + steady):
+                body = {"topic": f"cold start {i}", "style": ["cinematic", "animation"][i % 2], "duration": 45}
+                start = time.perf_counter()
+                client.post("/orchestrate/video", json=body).raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+        return (ready - live) * 1000, latencies[:first], statistics.median(latencies[first:])
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per setting")
+    parser.add_argument("--first", type=int, default=2, help="Leading requests reported individually")
+    parser.add_argument("--steady", type=int, default=20, help="Requests in the steady-state median")
+    parser.add_argument("--health-ms", type=float, default=20, help="Simulated Node health probe latency")
+    args = parser.parse_args()
+
+    simulator = subprocess.Popen(
+        [sys.executable, str(ROOT / "node_simulator.py"), "--port", str(NODE_PORT),
+         "--health-latency", f"fixed:{args.health_ms:g}"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{NODE_PORT}") as client:
+            _wait(client, "/health")
+        print(f"{'prewarm':8}{'run':>4}{'ready ms':>10}" + "".join(f"{f'req {i + 1} ms':>10}" for i in range(args.first))
+              + f"{'steady ms':>11}")
+        for prewarm in ("off", "on"):
+            for run in range(args.runs):
+                to_ready, first, steady = _run(prewarm, args.first, args.steady)
+                print(f"{prewarm:8}{run + 1:>4}{to_ready:>10.1f}" + "".join(f"{ms:>10.1f}" for ms in first)
+                      + f"{steady:>11.1f}")
+    finally:
+        simulator.terminate()
+        simulator.wait()
+
+
+if __name__ == "__main__":
+    main_cli()
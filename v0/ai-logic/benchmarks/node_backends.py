@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Submit throughput as Node backends are added behind NodePool.
+
+Starts node_simulator processes that each model one Node instance: a fixed
+submit latency and a capacity limit, so a single backend saturates. For each
+backend count, drives concurrent submits through NodePool the way
+call_node_api does and reports throughput, latency and how evenly load was
+spread. Optionally one backend is a slow outlier, to show least-outstanding
+selection steering around it.
+
+The simulators and the driver share this machine's CPUs, so keep the latency
+high enough that simulated capacity, not CPU, is the limit.
+
+    python benchmarks/node_backends.py --backends 1,2,4
+    python benchmarks/node_backends.py --backends 2,4 --slow-ms 250
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from node_client import NodePool, create_client  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+BASE_PORT = 3930
+CONFIG = {
+    "topic": "ocean life", "style": "cinematic", "duration": 45, "aspect_ratio": "16:9",
+    "provider": "runway", "mode": "ai_generated", "routing_reason": "benchmark", "priority": "standard"
+}
+
+
+async def _wait_ready(url, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    async with create_client(url) as client:
+        while True:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except Exception:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{url} did not come up")
+            await asyncio.sleep(0.1)
+
+
+async def _drive(urls, requests, concurrency):
+    for url in urls:
+        await _wait_ready(url)
+    pool = NodePool(urls)
+    latencies = []
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            _, response = await pool.request("POST", "/video/generate", json=CONFIG,
+                                             headers={"X-API-KEY": "testkey"}, timeout=30.0)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stats = pool.stats()
+    await pool.close()
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[int(len(latencies) * 0.99)],
+        "share": [s["requests"] / requests for s in stats]
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backends", default="1,2,4", help="Backend counts to measure")
+    parser.add_argument("--capacity", type=int, default=8, help="Concurrent submits each backend processes")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--slow-ms", type=float, help="Make the last backend this slow")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=48)
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.backends.split(",")]
+    processes = []
+    try:
+        for i in range(max(counts)):
+            latency = args.slow_ms if args.slow_ms and i == max(counts) - 1 else args.latency_ms
+            processes.append(subprocess.Popen(
+                [sys.executable, str(ROOT / "node_simulator.py"), "--port", str(BASE_PORT + i),
+                 "--latency", f"fixed:{latency}", "--capacity", str(args.capacity)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            ))
+
+        print(f"capacity/backend: {args.capacity}, latency: {args.latency_ms:g} ms, "
+              f"requests: {args.requests}, concurrency: {args.concurrency}")
+        print(f"{'backends':>8}{'req/s':>10}{'scaling':>9}{'p50 ms':>9}{'p99 ms':>9}  share")
+        baseline = None
+        for count in counts:
+            urls = [f"http://127.0.0.1:{BASE_PORT + i}" for i in range(count)]
+            if args.slow_ms:
+                # Keep the slow backend in every run
+                urls[-1] = f"http://127.0.0.1:{BASE_PORT + max(counts) - 1}"
+            result = asyncio.run(_drive(urls, args.requests, args.concurrency))
+            baseline = baseline or result["throughput"]
+            share = " ".join(f"{s:.0%}" for s in result["share"])
+            print(f"{count:>8}{result['throughput']:>10.0f}{result['throughput'] / baseline:>8.2f}x"
+                  f"{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}  {share}")
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main_cli()
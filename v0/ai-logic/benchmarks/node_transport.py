@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Node submit latency and throughput over loopback TCP vs a Unix domain socket.
+
+By default starts two node_simulator processes with zero latency, one on a
+TCP port and one on a socket. Each is driven through the same pooled client
+call_node_api uses: first sequentially for latency, then with concurrent
+submits for throughput. Pass --tcp-url/--uds-url to measure running servers
+instead, e.g. the real Node API started with NODE_SOCKET_PATH.
+
+    python benchmarks/node_transport.py --requests 5000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from node_client import create_client  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+CONFIG = {
+    "topic": "ocean life", "style": "cinematic", "duration": 45, "aspect_ratio": "16:9",
+    "provider": "runway", "mode": "ai_generated", "routing_reason": "benchmark", "priority": "standard"
+}
+HEADERS = {"X-API-KEY": os.getenv("API_KEY", "testkey")}
+
+
+def _start_simulator(*args):
+    return subprocess.Popen(
+        [sys.executable, str(ROOT / "node_simulator.py"), *args],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def _wait_ready(url, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    async with create_client(url) as client:
+        while True:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except Exception:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{url} did not come up")
+            await asyncio.sleep(0.1)
+
+
+async def _measure(url, requests, concurrency):
+    async with create_client(url, concurrency) as client:
+        async def submit():
+            response = await client.post("/video/generate", json=CONFIG, headers=HEADERS)
+            response.raise_for_status()
+
+        for _ in range(200):
+            await submit()
+
+        latencies = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            await submit()
+            latencies.append((time.perf_counter() - start) * 1e6)
+        latencies.sort()
+
+        remaining = requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await submit()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "p50_us": latencies[len(latencies) // 2],
+        "p99_us": latencies[int(len(latencies) * 0.99)],
+        "throughput": requests / elapsed
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--tcp-url", help="Existing server to measure over TCP")
+    parser.add_argument("--uds-url", help="Existing server to measure over a socket (unix:///path)")
+    args = parser.parse_args()
+
+    processes = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tcp_url = args.tcp_url
+        uds_url = args.uds_url
+        if not tcp_url:
+            processes.append(_start_simulator("--port", "3917"))
+            tcp_url = "http://127.0.0.1:3917"
+        if not uds_url:
+            socket_path = os.path.join(tmp, "node.sock")
+            processes.append(_start_simulator("--uds", socket_path))
+            uds_url = f"unix://{socket_path}"
+        try:
+            results = {}
+            for name, url in (("tcp", tcp_url), ("uds", uds_url)):
+                asyncio.run(_wait_ready(url))
+                results[name] = asyncio.run(_measure(url, args.requests, args.concurrency))
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+
+    print(f"requests: {args.requests}, concurrency: {args.concurrency}")
+    print(f"{'':6}{'p50 us':>10}{'p99 us':>10}{'req/s':>10}")
+    for name, result in results.items():
+        print(f"{name:6}{result['p50_us']:>10.0f}{result['p99_us']:>10.0f}{result['throughput']:>10.0f}")
+    tcp, uds = results["tcp"], results["uds"]
+    print(f"uds vs tcp: p50 {uds['p50_us'] / tcp['p50_us'] - 1:+.1%}, "
+          f"throughput {uds['throughput'] / tcp['throughput'] - 1:+.1%}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Cost of validating provider configs before they are sent to Node.
+
+Configs are produced by the real router and orchestrator from a set of
+sample requests, then checked with the validator compiled once (as main
+does at startup) and, for comparison, with the schema compiled on every
+call.
+
+    python benchmarks/payload_validation.py --iterations 100000
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from orchestrator import VideoOrchestrator  # noqa: E402
+from payload_validator import PayloadValidator, load_spec, DEFAULT_SPEC_PATH  # noqa: E402
+from routing import ProviderRouter  # noqa: E402
+from schemas import VideoRequest  # noqa: E402
+
+SAMPLE_REQUESTS = [
+    {"topic": "ocean life", "style": "cinematic", "duration": 45, "content_type": "educational"},
+    {"topic": "space cats", "style": "animation", "duration": 20, "priority": "high"},
+    {"topic": "quarterly update", "style": "documentary", "duration": 150, "content_type": "corporate"},
+    {"topic": "history of tea", "style": "slideshow_modern", "duration": 300, "voice_style": "calm"},
+]
+
+INVALID_UPDATES = [
+    {"aspect_ratio": "4:3"},
+    {"provider": "sora"},
+    {"duration": "45"},
+    {"topic": None, "prompt": None},
+]
+
+
+def _configs():
+    router = ProviderRouter()
+    orchestrator = VideoOrchestrator()
+    configs = []
+    for fields in SAMPLE_REQUESTS:
+        request = VideoRequest(**fields)
+        decision = asyncio.run(router.route_provider(request))
+        configs.append(orchestrator.prepare_provider_config(request, decision))
+    return configs
+
+
+def _time(check, configs, iterations):
+    n = len(configs)
+    start = time.perf_counter()
+    for i in range(iterations):
+        check(configs[i % n])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    spec = load_spec(str(DEFAULT_SPEC_PATH))
+    start = time.perf_counter()
+    validator = PayloadValidator(spec)
+    compile_us = (time.perf_counter() - start) * 1e6
+
+    valid = _configs()
+    invalid = [{**config, **update} for config, update in zip(valid, INVALID_UPDATES)]
+    assert not any(validator.errors(c) for c in valid), "sample configs should validate"
+    assert all(validator.errors(c) for c in invalid), "broken configs should be rejected"
+
+    valid_us = _time(validator.errors, valid, args.iterations)
+    invalid_us = _time(validator.errors, invalid, args.iterations)
+    uncompiled_us = _time(lambda c: PayloadValidator(spec).errors(c), valid, max(1, args.iterations // 100))
+
+    print(f"iterations:                {args.iterations}")
+    print(f"compile once:              {compile_us:.1f} us")
+    print(f"valid config:              {valid_us:.2f} us/op")
+    print(f"invalid config:            {invalid_us:.2f} us/op")
+    print(f"compiling on every call:   {uncompiled_us:.2f} us/op")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Provider registry scaling: routing, config preparation and health checks as model variants are added.
+
+Writes registries with the four built-in providers plus N synthetic model
+variants of the Node providers (jittered score rows, durations and
+optimization rules), then, in a fresh process per registry, times a fixed
+request mix through ProviderRouter.analyze and
+VideoOrchestrator.prepare_provider_config, and counts the Node probes one
+check_all_providers makes. Routing should grow with the number of
+providers it scores and nothing else; config preparation and probes
+should stay flat.
+
+    python benchmarks/provider_variants.py --variants 0 12 50 --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+STYLES = ["cinematic", "photorealistic", "animation", "artistic", "abstract", "documentary"]
+CONTENT_TYPES = [None, "educational", "entertainment", "corporate", "creative"]
+
+
+def build_registry(base: dict, variants: int, seed: int) -> dict:
+    """The shipped registry plus ``variants`` synthetic variants of its Node providers"""
+    rng = random.Random(seed)
+    providers = dict(base["providers"])
+    node_providers = [name for name, entry in base["providers"].items() if entry.get("health", "node") == "node"]
+    for i in range(variants):
+        parent = node_providers[i % len(node_providers)]
+        providers[f"{parent}_v{i}"] = {
+            "extends": parent,
+            "model": f"{parent}-v{i}",
+            "capabilities": {"max_duration": rng.choice([60, 120, 180, 300])},
+            "scores": {
+                "style": {s: round(rng.uniform(0.3, 1.0), 2) for s in STYLES},
+                "duration": {b: round(rng.uniform(0.5, 1.0), 2) for b in ("short", "medium", "long")}
+            },
+            "optimizations": [
+                {"when": {"style_in": rng.sample(STYLES, 2)}, "set": {"style_strength": 0.95}},
+                {"when": {"duration_lte": 20}, "set": {"generation_mode": "fast"}}
+            ]
+        }
+    return {"version": base.get("version", 1), "providers": providers}
+
+
+class CountingNodePool:
+    """Answers Node health probes with every provider healthy and counts them"""
+
+    def __init__(self, providers):
+        self.providers = providers
+        self.probes = 0
+
+    async def request(self, method, path, backend=None, **kwargs):
+        self.probes += 1
+        await asyncio.sleep(0.005)
+        return None, httpx.Response(200, json={"providers": {p: {"healthy": True} for p in self.providers}})
+
+
+def worker(requests: int) -> dict:
+    """Measure against the registry named by PROVIDER_REGISTRY"""
+    from provider_registry import REGISTRY, ProviderRegistry
+    from schemas import VideoRequest
+    from routing import ProviderRouter
+    from orchestrator import VideoOrchestrator
+    from providers import ProviderHealthChecker
+
+    start = time.perf_counter()
+    ProviderRegistry.from_env()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(7)
+    mix = [
+        VideoRequest(topic=f"topic {i}", style=rng.choice(STYLES), content_type=rng.choice(CONTENT_TYPES),
+                     duration=rng.choice([15, 45, 90, 150]), aspect_ratio=rng.choice(["16:9", "9:16", "1:1"]))
+        for i in range(requests)
+    ]
+    router = ProviderRouter(model=None)
+    orchestrator = VideoOrchestrator()
+    decisions = [router.analyze(r)[0] for r in mix[:50]]  # warm the feasibility cache
+
+    start = time.perf_counter()
+    decisions = [router.analyze(r)[0] for r in mix]
+    route_us = (time.perf_counter() - start) / requests * 1e6
+
+    start = time.perf_counter()
+    for r, d in zip(mix, decisions):
+        orchestrator.prepare_provider_config(r, d)
+    prepare_us = (time.perf_counter() - start) / requests * 1e6
+
+    pool = CountingNodePool(REGISTRY.node_providers)
+    checker = ProviderHealthChecker(pool)
+    start = time.perf_counter()
+    status = asyncio.run(checker.check_all_providers())
+    check_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "providers": len(REGISTRY.names),
+        "load_ms": load_ms,
+        "route_us": route_us,
+        "prepare_us": prepare_us,
+        "check_ms": check_ms,
+        "probes": pool.probes,
+        "healthy": sum(s.is_healthy for s in status.values()),
+        "chosen": len({d.provider for d in decisions})
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--variants", type=int, nargs="+", default=[0, 12, 50])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.requests)))
+        return
+
+    from provider_registry import DEFAULT_REGISTRY_PATH
+    base = json.loads(Path(DEFAULT_REGISTRY_PATH).read_text())
+
+    print(f"{args.requests} requests per registry")
+    print(f"{'providers':>9}{'load ms':>9}{'route us':>10}{'us/prov':>9}{'prepare us':>12}"
+          f"{'check ms':>10}{'probes':>8}{'healthy':>9}{'chosen':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for variants in args.variants:
+            path = Path(tmp) / f"registry-{variants}.json"
+            path.write_text(json.dumps(build_registry(base, variants, args.seed)))
+            output = subprocess.run(
+                [sys.executable, __file__, "--worker", "--requests", str(args.requests)],
+                env={**os.environ, "PROVIDER_REGISTRY": str(path)}, capture_output=True, text=True, check=True
+            ).stdout
+            r = json.loads(output.strip().splitlines()[-1])
+            print(f"{r['providers']:>9}{r['load_ms']:>9.1f}{r['route_us']:>10.1f}"
+                  f"{r['route_us'] / r['providers']:>9.2f}{r['prepare_us']:>12.1f}{r['check_ms']:>10.1f}"
+                  f"{r['probes']:>8}{r['healthy']:>9}{r['chosen']:>8}")
+
+
+if __name__ == "__main__":
+    main_cli()
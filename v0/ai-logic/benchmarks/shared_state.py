@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Shared state backends: per-operation cost, and Node health probes across replicas.
+
+Times get/set/incr on the in-process, SQLite and Redis-protocol backends
+(against redis_simulator unless --redis-url is given), and a read served
+from the SharedState near-cache. Then runs several simulated replicas, each
+with its own ProviderHealthChecker and near-cache, checking provider health
+on every request as orchestrate_video does. It counts how many health
+probes reach Node with and without a shared snapshot.
+
+    python benchmarks/shared_state.py --ops 2000 --replicas 4 --seconds 5
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from providers import ProviderHealthChecker  # noqa: E402
+from state_backend import SharedState, create_backend  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+HEALTH = {"providers": {p: {"healthy": True} for p in ("runway", "pika", "gemini_veo")}}
+
+
+class CountingNodePool:
+    """Answers Node health probes after ``latency`` seconds and counts them"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.probes = 0
+
+    async def request(self, method, path, backend=None, **kwargs):
+        self.probes += 1
+        await asyncio.sleep(self.latency)
+        return None, httpx.Response(200, json=HEALTH)
+
+
+async def _time_ops(url, ops):
+    backend = create_backend(url)
+    results = {}
+    for name, op in (("set", lambda i: backend.set(f"bench:{i % 100}", "x" * 200, ttl=60)),
+                     ("get", lambda i: backend.get(f"bench:{i % 100}")),
+                     ("incr", lambda i: backend.incr("bench:counter", ttl=60))):
+        start = time.perf_counter()
+        for i in range(ops):
+            await op(i)
+        results[name] = (time.perf_counter() - start) / ops * 1e6
+    state = SharedState(backend)
+    await state.get("near")
+    start = time.perf_counter()
+    for _ in range(ops):
+        await state.get("near")
+    results["near"] = (time.perf_counter() - start) / ops * 1e6
+    await backend.close()
+    return results
+
+
+async def _replicas(url, replicas, seconds, rps, snapshot_ttl):
+    os.environ["HEALTH_SNAPSHOT_TTL_S"] = str(snapshot_ttl)
+    pool = CountingNodePool(latency=0.005)
+    backend = create_backend(url) if url else None
+    checkers = [ProviderHealthChecker(pool, SharedState(backend) if backend else None) for _ in range(replicas)]
+    checks = 0
+
+    async def replica(checker):
+        nonlocal checks
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            await asyncio.gather(*(checker.check_provider("runway") for _ in range(rps // 10)))
+            checks += rps // 10
+            await asyncio.sleep(0.1)
+
+    await asyncio.gather(*(replica(c) for c in checkers))
+    if backend:
+        await backend.close()
+    return checks, pool.probes
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--redis-url", help="Existing Redis to measure instead of redis_simulator")
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rps", type=int, default=100, help="Health checks per second per replica")
+    parser.add_argument("--snapshot-ttl", type=float, default=1.0)
+    args = parser.parse_args()
+
+    process = None
+    redis_url = args.redis_url
+    if not redis_url:
+        process = subprocess.Popen([sys.executable, str(ROOT / "redis_simulator.py"), "--port", "6399"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        redis_url = "redis://127.0.0.1:6399/0"
+        time.sleep(1.0)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            backends = {"memory": "memory", "sqlite": f"sqlite://{tmp}/state.db", "redis": redis_url}
+            print(f"per-operation cost, us ({args.ops} ops)")
+            print(f"{'backend':8}{'set':>9}{'get':>9}{'incr':>9}{'near':>9}")
+            for name, url in backends.items():
+                r = asyncio.run(_time_ops(url, args.ops))
+                print(f"{name:8}{r['set']:>9.1f}{r['get']:>9.1f}{r['incr']:>9.1f}{r['near']:>9.2f}")
+
+            print(f"\nhealth probes reaching Node: {args.replicas} replicas x {args.rps} checks/s "
+                  f"for {args.seconds:g}s, snapshot TTL {args.snapshot_ttl:g}s")
+            for name, url in (("none", None), *backends.items()):
+                if name == "memory":
+                    continue  # one process-local store per replica shares nothing
+                checks, probes = asyncio.run(_replicas(url, args.replicas, args.seconds, args.rps,
+                                                       args.snapshot_ttl))
+                print(f"{name:8}{checks:>8} checks{probes:>8} probes")
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main_cli()
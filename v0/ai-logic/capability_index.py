@@ -0,0 +1,145 @@
+"""
+Hard capability constraints checked before provider scoring.
+
+ProviderRouter's scores are preferences: a provider that can't produce the
+requested duration only scores 0.0 for duration and can still win on the
+other factors, and aspect ratio isn't scored at all. Node would then reject
+the job or produce the wrong shape. CapabilityIndex answers "which providers
+can do this at all" from three indexes built once from the capabilities
+table:
+
+    max_duration   providers sorted by longest supported duration
+    aspect_ratio   aspect ratio -> providers with a matching resolution
+    features       feature -> providers offering it
+
+Each index yields a bitmask over providers and the feasible set is their
+AND, cached per (duration, aspect ratio, features) key along with the
+rejection reasons. Only feasible providers are scored, and fallbacks are
+chosen from the same set.
+"""
+
+import bisect
+from functools import lru_cache
+from math import gcd
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+NO_FEATURES: FrozenSet[str] = frozenset()
+
+
+class NoFeasibleProvider(ValueError):
+    """No provider satisfies the request's hard constraints"""
+
+    def __init__(self, message: str, rejections: Dict[str, List[str]]):
+        super().__init__(message)
+        self.rejections = rejections
+
+
+def normalize_aspect_ratio(value: str) -> Optional[str]:
+    """'16:9', '32:18' and '1920x1080' all become '16:9'; None when unparseable"""
+    for separator in (":", "x", "/"):
+        width, found, height = value.strip().lower().partition(separator)
+        if found:
+            break
+    else:
+        return None
+    try:
+        width, height = int(width), int(height)
+    except ValueError:
+        return None
+    if width <= 0 or height <= 0:
+        return None
+    divisor = gcd(width, height)
+    return f"{width // divisor}:{height // divisor}"
+
+
+class CapabilityIndex:
+    """Bitmask indexes over provider capabilities for hard-constraint pruning"""
+
+    def __init__(self, capabilities: Dict[str, Dict], providers: Optional[Sequence[str]] = None):
+        self.providers: Tuple[str, ...] = tuple(providers or capabilities)
+        self.capabilities = capabilities
+        self.all_mask = (1 << len(self.providers)) - 1
+        bits = {provider: 1 << i for i, provider in enumerate(self.providers)}
+
+        durations = sorted((capabilities.get(p, {}).get("max_duration", 300), p) for p in self.providers)
+        self._duration_limits = [limit for limit, _ in durations]
+        # Suffix masks: providers whose limit is at least durations[i]
+        self._duration_masks = [0] * (len(durations) + 1)
+        for i in range(len(durations) - 1, -1, -1):
+            self._duration_masks[i] = self._duration_masks[i + 1] | bits[durations[i][1]]
+
+        self._aspect_masks: Dict[str, int] = {}
+        self._feature_masks: Dict[str, int] = {}
+        for provider in self.providers:
+            caps = capabilities.get(provider, {})
+            for resolution in caps.get("resolutions", []):
+                ratio = normalize_aspect_ratio(resolution)
+                if ratio:
+                    self._aspect_masks[ratio] = self._aspect_masks.get(ratio, 0) | bits[provider]
+            for feature in caps.get("features", []):
+                self._feature_masks[feature] = self._feature_masks.get(feature, 0) | bits[provider]
+
+        self._feasible = lru_cache(maxsize=4096)(self._feasible_uncached)
+        self._rejections = lru_cache(maxsize=4096)(self._rejections_uncached)
+
+    @property
+    def aspect_ratios(self) -> List[str]:
+        return sorted(self._aspect_masks)
+
+    def feasible(self, duration: Optional[int] = None, aspect_ratio: Optional[str] = None,
+                 features: Iterable[str] = ()) -> Tuple[str, ...]:
+        """Providers meeting every constraint, in index order"""
+        return self._feasible(duration, aspect_ratio, frozenset(features) if features else NO_FEATURES)
+
+    def rejections(self, duration: Optional[int] = None, aspect_ratio: Optional[str] = None,
+                   features: Iterable[str] = ()) -> Dict[str, List[str]]:
+        """Why each infeasible provider was ruled out; shared between calls, don't mutate"""
+        return self._rejections(duration, aspect_ratio, frozenset(features) if features else NO_FEATURES)
+
+    def _rejections_uncached(self, duration: Optional[int], aspect_ratio: Optional[str],
+                             features: FrozenSet[str]) -> Dict[str, List[str]]:
+        ratio = normalize_aspect_ratio(aspect_ratio) if aspect_ratio else None
+        reasons: Dict[str, List[str]] = {}
+        for provider in self.providers:
+            caps = self.capabilities.get(provider, {})
+            provider_reasons = []
+            max_duration = caps.get("max_duration", 300)
+            if duration and duration > max_duration:
+                provider_reasons.append(f"cannot produce {duration}s videos (max {max_duration}s)")
+            if aspect_ratio and not (ratio and self._mask_for_aspect(ratio) & self._bit(provider)):
+                provider_reasons.append(f"has no {aspect_ratio} resolution")
+            missing = sorted(f for f in features if not self._feature_masks.get(f, 0) & self._bit(provider))
+            if missing:
+                provider_reasons.append(f"lacks {', '.join(missing)}")
+            if provider_reasons:
+                reasons[provider] = provider_reasons
+        return reasons
+
+    def require(self, duration: Optional[int] = None, aspect_ratio: Optional[str] = None,
+                features: Iterable[str] = ()) -> Tuple[str, ...]:
+        """Feasible providers, raising NoFeasibleProvider when there are none"""
+        features = frozenset(features) if features else NO_FEATURES
+        feasible = self._feasible(duration, aspect_ratio, features)
+        if not feasible:
+            rejections = self._rejections(duration, aspect_ratio, features)
+            summary = "; ".join(f"{p} {' and '.join(r)}" for p, r in rejections.items())
+            raise NoFeasibleProvider(f"No provider can handle this request: {summary}", rejections)
+        return feasible
+
+    def _bit(self, provider: str) -> int:
+        return 1 << self.providers.index(provider)
+
+    def _mask_for_aspect(self, ratio: str) -> int:
+        return self._aspect_masks.get(ratio, 0)
+
+    def _feasible_uncached(self, duration: Optional[int], aspect_ratio: Optional[str],
+                           features: FrozenSet[str]) -> Tuple[str, ...]:
+        mask = self.all_mask
+        if duration:
+            mask &= self._duration_masks[bisect.bisect_left(self._duration_limits, duration)]
+        if aspect_ratio:
+            ratio = normalize_aspect_ratio(aspect_ratio)
+            mask &= self._mask_for_aspect(ratio) if ratio else 0
+        for feature in features:
+            mask &= self._feature_masks.get(feature, 0)
+        return tuple(p for i, p in enumerate(self.providers) if mask >> i & 1)
@@ -6,19 +6,29 @@ Interactive terminal interface for building video generation workflows
 
 import click
 import asyncio
+import itertools
 import httpx
 import json
 import os
+import time
 from rich.console import Console
+from rich.live import Live
 from rich.table import Table
 from rich.panel import Panel
 from rich.prompt import Prompt, Confirm
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn, TimeElapsedColumn
 from typing import Dict, Any, Optional, List
 
 from schemas import VideoRequest, VideoStyle
 from routing import ProviderRouter
 from providers import ProviderHealthChecker
+from loadtest import LoadTestConfig, LoadTestReport, run_load_test
+from batch_runner import BatchRunner, Checkpoint, load_batch_items
+from planner import PlanWriter, iter_plan
+from traffic_log import TrafficReplayer, build_events, iter_traffic
+from job_watcher import JobWatcher, WatchedJob, load_job_ids, parse_eta, summarize
+from node_client import create_client, parse_node_urls
+from provider_registry import REGISTRY
 
 console = Console()
 
@@ -86,12 +96,247 @@ def analyze(config_file):
         console.print(f"[red]Invalid JSON in {config_file}[/red]")
 
 
+@cli.command()
+@click.argument('paths', nargs=-1, required=True)
+@click.option('--output', '-o', required=True, help='Output file (.csv or .jsonl)')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Output format (default: from extension)')
+@click.option('--workers', '-w', type=int, help='Worker processes (default: CPU count)')
+@click.option('--chunk-size', default=500, help='Files per worker task')
+def plan(paths, output, fmt, workers, chunk_size):
+    """Route config files offline and write the plan, without a server
+    
+    PATHS may be config files or directories (searched recursively for *.json).
+    """
+    files = collect_config_files(paths)
+    if not files:
+        console.print("[red]No configuration files found[/red]")
+        return
+    
+    console.print(f"[bold]Planning {len(files)} configuration files → {output}[/bold]")
+    
+    providers: Dict[str, int] = {}
+    errors = 0
+    start = time.perf_counter()
+    with PlanWriter(output, fmt) as writer, Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeElapsedColumn(),
+        console=console
+    ) as progress:
+        task = progress.add_task("Routing...", total=len(files))
+        for file_count, rows in iter_plan(files, workers=workers, chunk_size=chunk_size):
+            for row in rows:
+                if row['error']:
+                    errors += 1
+                else:
+                    providers[row['provider']] = providers.get(row['provider'], 0) + 1
+            writer.write(rows)
+            progress.advance(task, file_count)
+    elapsed = time.perf_counter() - start
+    
+    display_plan_summary(providers, errors, elapsed)
+
+
+@cli.command()
+@click.argument('logs', nargs=-1, required=True)
+@click.option('--grid', '-g', multiple=True,
+              help='Weight values to sweep, e.g. style=0.1:0.5:0.1 or cost=0.1,0.3 (repeatable)')
+@click.option('--candidates', type=click.Path(exists=True), help='JSON list of weight sets to evaluate')
+@click.option('--cost', multiple=True, help='Override relative cost per video second, e.g. runway=3.0')
+@click.option('--sort', 'sort_by', default='cost_per_request',
+              type=click.Choice(['cost_per_request', 'mean_eta_s', 'p95_eta_s', 'mean_confidence',
+                                 'infeasible', 'changed_vs_baseline']),
+              help='Metric to rank candidates by')
+@click.option('--top', default=10, help='Candidates to display')
+@click.option('--output', '-o', help='Write every candidate to CSV or JSONL')
+def whatif(logs, grid, candidates, cost, sort_by, top, output):
+    """Replay a request log under candidate routing weights
+    
+    LOGS are JSON or JSONL files of recorded requests. The current weights
+    are always evaluated as the baseline.
+    """
+    import numpy as np
+    from whatif import FACTORS, build_tensor, load_requests, parse_range, simulate, weight_grid
+    
+    requests, errors = load_requests(logs)
+    for source, error in errors[:10]:
+        console.print(f"[red]Skipping {source}: {error}[/red]")
+    if len(errors) > 10:
+        console.print(f"[red]... and {len(errors) - 10} more invalid records[/red]")
+    if not requests:
+        console.print("[red]No valid requests to replay[/red]")
+        return
+    
+    router = ProviderRouter()
+    weight_sets = []
+    if grid:
+        ranges = {}
+        for spec in grid:
+            factor, _, values = spec.partition('=')
+            if factor not in FACTORS:
+                raise click.BadParameter(f"Unknown factor '{factor}', expected one of {', '.join(FACTORS)}")
+            ranges[factor] = parse_range(values)
+        weight_sets.append(weight_grid(ranges, base=router.weights))
+    if candidates:
+        with open(candidates, 'r') as f:
+            listed = [[float(entry.get(factor, 0.0)) for factor in FACTORS] for entry in json.load(f)]
+        listed = np.array(listed, dtype=np.float64)
+        weight_sets.append(listed / listed.sum(axis=1, keepdims=True))
+    candidate_weights = np.vstack(weight_sets) if weight_sets else np.empty((0, len(FACTORS)))
+    
+    cost_units = {}
+    for spec in cost:
+        provider, _, units = spec.partition('=')
+        cost_units[provider] = float(units)
+    
+    start = time.perf_counter()
+    tensor = build_tensor(requests, router, cost_units=cost_units)
+    result = simulate(tensor, candidate_weights, baseline=[router.weights[f] for f in FACTORS])
+    elapsed = time.perf_counter() - start
+    
+    rows = result.rows()
+    if output:
+        with PlanWriter(output, fields=list(rows[0])) as writer:
+            writer.write(rows)
+        console.print(f"[green]Wrote {len(rows)} candidates to {output}[/green]")
+    
+    console.print(f"[bold]Replayed {result.requests} requests ({len(tensor.counts)} distinct) under "
+                  f"{len(rows) - 1} candidate weight sets in {elapsed:.2f}s[/bold]\n")
+    reverse = sort_by == 'mean_confidence'
+    ranked = sorted(rows[1:], key=lambda row: row[sort_by], reverse=reverse)[:top]
+    display_whatif_results([rows[0]] + ranked, FACTORS)
+
+
+@cli.command()
+@click.argument('outcome_files', nargs=-1, required=True)
+@click.option('--output', '-o', default='routing_model.json', help='Model file to write')
+@click.option('--holdout', default=0.2, help='Fraction of outcomes held out for evaluation')
+@click.option('--fit-tables', is_flag=True, help='Also fit style compatibility and content preference entries')
+@click.option('--shrinkage', default=20.0, help='Outcomes needed before a table entry moves halfway')
+@click.option('--latency-budget', default=600.0, help='Latency (s) that earns the full latency penalty')
+@click.option('--latency-weight', default=0.2, help='Share of utility lost at the latency budget')
+def fit(outcome_files, output, holdout, fit_tables, shrinkage, latency_budget, latency_weight):
+    """Fit routing weights from recorded outcomes and write a model file
+    
+    Load the result in ai-logic with ROUTING_MODEL_PATH=<output>.
+    """
+    from weight_fitting import fit_model, load_outcomes
+    
+    outcomes, errors = load_outcomes(outcome_files)
+    for source, error in errors[:10]:
+        console.print(f"[red]Skipping {source}: {error}[/red]")
+    if len(errors) > 10:
+        console.print(f"[red]... and {len(errors) - 10} more invalid records[/red]")
+    
+    try:
+        model, report = fit_model(outcomes, holdout=holdout, fit_tables=fit_tables, shrinkage=shrinkage,
+                                  latency_budget=latency_budget, latency_weight=latency_weight)
+    except ValueError as e:
+        console.print(f"[red]Cannot fit routing model: {str(e)}[/red]")
+        raise SystemExit(1)
+    
+    version = model.save(output)
+    display_fit_report(report)
+    console.print(f"\n[green]✅ Wrote routing model {version} to {output}[/green]")
+    console.print(f"[dim]Deploy with ROUTING_MODEL_PATH={output}[/dim]")
+
+
 @cli.command()
 @click.argument('config_files', nargs=-1, required=True)
-@click.option('--batch-size', '-b', default=5, help='Batch size for concurrent processing')
-def batch(config_files, batch_size):
-    """Process multiple video configurations in batch"""
-    asyncio.run(process_batch(config_files, batch_size))
+@click.option('--batch-size', '-b', default=5, help='Configurations per /batch/orchestrate request')
+@click.option('--concurrency', '-c', default=4, help='Batches submitted concurrently')
+@click.option('--checkpoint', default='batch.checkpoint.jsonl', help='Checkpoint file for resuming (empty to disable)')
+@click.option('--timeout', default=300.0, help='Per-batch request timeout in seconds')
+def batch(config_files, batch_size, concurrency, checkpoint, timeout):
+    """Process multiple video configurations in batch
+    
+    Each file may hold one configuration or a JSON list of them. Finished items
+    are recorded in the checkpoint file; re-running the same command skips the
+    ones that already succeeded.
+    """
+    asyncio.run(process_batch(config_files, batch_size, concurrency, checkpoint or None, timeout))
+
+
+@cli.command()
+@click.argument('job_ids', nargs=-1)
+@click.option('--file', '-f', 'files', multiple=True,
+              help='Job ids, an orchestration/batch result or a batch checkpoint (repeatable)')
+@click.option('--concurrency', '-c', default=20, help='Status requests in flight at once')
+@click.option('--min-interval', default=2.0, help='Shortest per-job poll interval in seconds')
+@click.option('--max-interval', default=60.0, help='Longest per-job poll interval in seconds')
+@click.option('--timeout', '-t', type=float, help='Stop watching after this many seconds')
+@click.option('--output', '-o', help='Write final job states as JSON')
+def watch(job_ids, files, concurrency, min_interval, max_interval, timeout, output):
+    """Watch many video jobs until they finish"""
+    sources = [{"job_id": job_id} for job_id in job_ids]
+    for path in files:
+        try:
+            sources.extend(load_job_ids(path))
+        except Exception as e:
+            console.print(f"[red]Error loading {path}: {str(e)}[/red]")
+    
+    jobs = {}
+    for source in sources:
+        jobs.setdefault(source["job_id"], WatchedJob(
+            job_id=source["job_id"],
+            provider=source.get("provider"),
+            eta=parse_eta(source.get("estimated_time"))
+        ))
+    
+    if not jobs:
+        console.print("[red]No job ids to watch[/red]")
+        return
+    
+    # With several Node backends, ai-logic knows which one owns each job
+    status_url = NODE_API_URL if len(parse_node_urls(NODE_API_URL)) == 1 else AI_LOGIC_URL
+    watcher = JobWatcher(status_url, os.getenv("API_KEY", "testkey"), concurrency=concurrency,
+                         min_interval=min_interval, max_interval=max_interval, timeout=timeout)
+    finished = asyncio.run(watch_jobs(watcher, list(jobs.values())))
+    
+    if output:
+        with open(output, 'w') as f:
+            json.dump([job_state(job) for job in finished], f, indent=2)
+        console.print(f"[green]Job states saved to {output}[/green]")
+    
+    if any(job.status != "completed" for job in finished):
+        raise SystemExit(1)
+
+
+@cli.command()
+@click.argument('paths', nargs=-1, required=True)
+@click.option('--speed', '-s', default=1.0, help='Time scale: 1 = original pacing, 2 = twice as fast, 0 = no pacing')
+@click.option('--concurrency', '-c', default=256, help='Maximum calls in flight')
+@click.option('--limit', type=int, help='Replay only the first N captured orchestrations')
+@click.option('--timeout', default=30.0, help='Per-call timeout in seconds')
+@click.option('--output', '-o', help='Write the JSON report to a file')
+def replay(paths, speed, concurrency, limit, timeout, output):
+    """Re-drive captured traffic (TRAFFIC_LOG_DIR files) against ai-logic"""
+    records = list(itertools.islice(iter_traffic(paths), limit))
+    if not records:
+        console.print("[red]No captured traffic found[/red]")
+        return
+    
+    events = build_events(records)
+    span = events[-1].offset
+    pacing = f"{speed:g}x speed" if speed > 0 else "no pacing"
+    console.print(f"[bold]Replaying {len(records)} orchestrations in {len(events)} calls "
+                  f"({span:.1f}s of traffic, {pacing}) against {AI_LOGIC_URL}[/bold]")
+    
+    replayer = TrafficReplayer(AI_LOGIC_URL, speed=speed, concurrency=concurrency, timeout=timeout)
+    report = asyncio.run(replayer.run(events))
+    display_load_test_report(report)
+    
+    summary = report.summary()
+    console.print(f"[bold]Drift vs capture:[/bold] {summary['provider_changed']} provider changes, "
+                  f"{summary['outcome_changed']} outcome changes across {summary['compared']} orchestrations; "
+                  f"max schedule lag {summary['max_schedule_lag_ms']:.0f}ms")
+    
+    if output:
+        with open(output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        console.print(f"[green]Report saved to {output}[/green]")
 
 
 @cli.command()
@@ -100,6 +345,47 @@ def health():
     asyncio.run(health_check())
 
 
+@cli.command()
+@click.option('--endpoint', '-e', type=click.Choice(['orchestrate', 'batch']), default='orchestrate',
+              help='Endpoint to drive')
+@click.option('--duration', '-d', default=30.0, help='Test duration in seconds')
+@click.option('--concurrency', '-c', default=10, help='Concurrent requests (max in flight with --rps)')
+@click.option('--rps', '-r', type=float, help='Target request rate (open-loop); closed-loop if omitted')
+@click.option('--batch-items', default=10, help='Items per /batch/orchestrate request')
+@click.option('--config-file', '-f', multiple=True, help='Request payload(s) to cycle through')
+@click.option('--output', '-o', help='Write the JSON report to a file')
+@click.option('--use-cache', is_flag=True, help='Let repeated payloads hit the result cache')
+def loadtest(endpoint, duration, concurrency, rps, batch_items, config_file, output, use_cache):
+    """Load test ai-logic and report throughput, latency and fallback rates"""
+    payloads = []
+    for path in config_file:
+        with open(path, 'r') as f:
+            payloads.append(json.load(f))
+    
+    config = LoadTestConfig(
+        target_url=AI_LOGIC_URL,
+        endpoint=endpoint,
+        duration=duration,
+        concurrency=concurrency,
+        rps=rps,
+        batch_items=batch_items,
+        use_cache=use_cache
+    )
+    if payloads:
+        config.payloads = payloads
+    
+    mode = f"{rps:g} rps open-loop" if rps else f"{concurrency} concurrent closed-loop"
+    console.print(f"[bold]Load testing {AI_LOGIC_URL} ({endpoint}, {mode}, {duration:g}s)[/bold]")
+    
+    report = asyncio.run(run_load_test(config))
+    display_load_test_report(report)
+    
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report.summary(), f, indent=2)
+        console.print(f"\n[green]Report saved to {output}[/green]")
+
+
 def interactive_video_builder() -> Dict[str, Any]:
     """Interactive video configuration builder"""
     
@@ -174,7 +460,7 @@ def interactive_video_builder() -> Dict[str, Any]:
     if Confirm.ask("Do you have a preferred provider?"):
         config['preferred_provider'] = Prompt.ask(
             "[bold]Preferred provider[/bold]",
-            choices=['runway', 'pika', 'gemini_veo', 'slideshow']
+            choices=list(REGISTRY.names)
         )
     
     # Priority
@@ -187,6 +473,19 @@ def interactive_video_builder() -> Dict[str, Any]:
     return config
 
 
+def collect_config_files(paths: List[str]) -> List[str]:
+    """Expand directories into the JSON files beneath them, keeping argument order"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith('.json'))
+        else:
+            files.append(path)
+    return files
+
+
 async def process_orchestration(config: Dict[str, Any], output_file: Optional[str] = None):
     """Process video orchestration request"""
     
@@ -327,55 +626,71 @@ async def analyze_configuration(config: Dict[str, Any]):
         console.print(f"[red]Error analyzing configuration: {str(e)}[/red]")
 
 
-async def process_batch(config_files: List[str], batch_size: int):
-    """Process multiple configurations in batch"""
-    
-    console.print(f"[bold]Processing {len(config_files)} configurations in batches of {batch_size}[/bold]\n")
+async def process_batch(config_files: List[str], batch_size: int, concurrency: int = 4,
+                        checkpoint: Optional[str] = None, timeout: float = 300.0):
+    """Process multiple configurations in concurrent, checkpointed batches"""
     
-    # Load configurations
-    requests = []
-    for i, config_file in enumerate(config_files):
-        try:
-            with open(config_file, 'r') as f:
-                config = json.load(f)
-            config['request_id'] = f"batch_{i}"
-            requests.append(VideoRequest(**config))
-        except Exception as e:
-            console.print(f"[red]Error loading {config_file}: {str(e)}[/red]")
+    items, errors = load_batch_items(config_files)
+    for source, error in errors:
+        console.print(f"[red]Error loading {source}: {error}[/red]")
     
-    if not requests:
+    if not items:
         console.print("[red]No valid configurations to process[/red]")
         return
     
-    try:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
-            
-            task = progress.add_task("Processing batch...", total=None)
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{AI_LOGIC_URL}/batch/orchestrate",
-                    json=[req.dict() for req in requests],
-                    timeout=60.0
-                )
-                
-                if response.status_code != 200:
-                    console.print(f"[red]Batch processing failed: {response.text}[/red]")
-                    return
-                
-                results = response.json()
-            
-            progress.update(task, completed=True)
+    runner = BatchRunner(AI_LOGIC_URL, chunk_size=batch_size, concurrency=concurrency,
+                         timeout=timeout, checkpoint=Checkpoint(checkpoint))
+    remaining, completed = await runner.pending(items)
+    
+    console.print(f"[bold]Processing {len(items)} configurations in batches of {batch_size} "
+                  f"({concurrency} concurrent)[/bold]")
+    if completed:
+        console.print(f"[dim]Resuming from {checkpoint}: {len(completed)} already completed or parked[/dim]")
+    console.print()
+    
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeElapsedColumn(),
+        console=console
+    ) as progress:
         
-        # Display results
-        display_batch_results(results)
+        task = progress.add_task("Processing batch...", total=len(items), completed=len(completed))
         
-    except Exception as e:
-        console.print(f"[red]Error processing batch: {str(e)}[/red]")
+        def on_item(record: Dict[str, Any]):
+            if record['status'] == 'parked':
+                progress.console.print(f"  [yellow]⏸ {record['source']}: parked as {record['parked']['ticket']}[/yellow]")
+            elif record['status'] != 'success':
+                progress.console.print(f"  [red]❌ {record['source']}: {record['error']}[/red]")
+            progress.advance(task)
+        
+        runner.on_item = on_item
+        try:
+            records = await runner.run(remaining)
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            console.print(f"[yellow]Interrupted - re-run to resume from {checkpoint}[/yellow]")
+            raise
+    
+    display_batch_results({'batch_results': completed + records})
+    if checkpoint and any(r['status'] != 'success' for r in completed + records):
+        console.print(f"[dim]Re-run the same command to retry failed items and collect parked ones "
+                      f"(checkpoint: {checkpoint})[/dim]")
+
+
+async def watch_jobs(watcher: JobWatcher, jobs: List[WatchedJob]) -> List[WatchedJob]:
+    """Poll jobs with a live status table, then print the summary"""
+    
+    console.print(f"[bold]Watching {len(jobs)} jobs on {watcher.base_url}[/bold]\n")
+    
+    with Live(render_watch_table(jobs), console=console, refresh_per_second=4) as live:
+        watcher.on_update = lambda job: live.update(render_watch_table(jobs))
+        await watcher.watch(jobs)
+        live.update(render_watch_table(jobs))
+    
+    display_watch_summary(summarize(jobs))
+    return jobs
 
 
 async def health_check():
@@ -383,7 +698,7 @@ async def health_check():
     
     services = [
         ("AI Logic Service", AI_LOGIC_URL, "/health"),
-        ("Node API", NODE_API_URL, "/health")
+        *(("Node API", url, "/health") for url in parse_node_urls(NODE_API_URL))
     ]
     
     table = Table(title="Service Health Check")
@@ -396,8 +711,8 @@ async def health_check():
         try:
             start_time = asyncio.get_event_loop().time()
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{base_url}{endpoint}", timeout=5.0)
+            async with create_client(base_url) as client:
+                response = await client.get(endpoint, timeout=5.0)
                 
                 end_time = asyncio.get_event_loop().time()
                 response_time = f"{(end_time - start_time) * 1000:.0f}ms"
@@ -429,6 +744,41 @@ def display_routing_analysis(analysis: Dict[str, Any]):
         title="Routing Decision"
     ))
     
+    details = analysis.get('analysis') or {}
+    factor_scores = details.get('factor_scores', {})
+    if factor_scores:
+        factors = Table(title="Score Breakdown")
+        factors.add_column("Factor", style="bold")
+        factors.add_column("Score", justify="right")
+        for factor in details.get('primary_factors', factor_scores.keys()):
+            factors.add_row(factor, f"{factor_scores.get(factor, 0):.2f}")
+        factors.add_row("[bold]total[/bold]", f"[bold]{details.get('total_score', 0):.3f}[/bold]")
+        console.print(factors)
+    
+    alternatives = details.get('alternatives', [])
+    if alternatives:
+        table = Table(title="Alternatives")
+        table.add_column("Rank", justify="right")
+        table.add_column("Provider", style="cyan")
+        table.add_column("Score", justify="right")
+        table.add_column("Delta", justify="right")
+        table.add_column("Strongest Factor")
+        for alt in alternatives:
+            table.add_row(
+                str(alt.get('rank')),
+                alt.get('provider', 'N/A'),
+                f"{alt.get('total_score', 0):.3f}",
+                f"{-alt.get('score_delta', 0):+.3f}",
+                alt.get('primary_factor', 'N/A')
+            )
+        console.print(table)
+    
+    recommendations = details.get('recommendations', [])
+    if recommendations:
+        console.print("\n[bold]Recommendations:[/bold]")
+        for recommendation in recommendations:
+            console.print(f"  • {recommendation}")
+    
     capabilities = analysis.get('provider_capabilities', {})
     if capabilities:
         console.print("\n[bold]Provider Capabilities:[/bold]")
@@ -450,7 +800,154 @@ def display_orchestration_result(result: Dict[str, Any]):
     ))
     
     console.print(f"\n[green]✅ Video generation job started successfully![/green]")
-    console.print(f"[dim]Track progress at: /video/url?id={result.get('job_id', '')}[/dim]")
+    console.print(f"[dim]Track progress with: python cli.py watch {result.get('job_id', '')}[/dim]")
+
+
+WATCH_STATUS_STYLES = {
+    "completed": "green",
+    "processing": "yellow",
+    "pending": "dim",
+    "failed": "red",
+    "not_found": "red",
+    "unreachable": "red",
+    "timed_out": "magenta"
+}
+
+
+def job_state(job: WatchedJob) -> Dict[str, Any]:
+    """JSON-friendly final state of a watched job"""
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "progress": job.progress,
+        "provider": job.provider,
+        "video_url": job.video_url,
+        "error": job.error,
+        "polls": job.polls,
+        "elapsed_s": round(job.elapsed, 1)
+    }
+
+
+def render_watch_table(jobs: List[WatchedJob], max_rows: int = 25) -> Table:
+    """Live table of the jobs still running, plus status counts"""
+    
+    counts: Dict[str, int] = {}
+    for job in jobs:
+        counts[job.status] = counts.get(job.status, 0) + 1
+    caption = "  ".join(f"[{WATCH_STATUS_STYLES.get(s, 'white')}]{s}: {n}[/]" for s, n in sorted(counts.items()))
+    
+    table = Table(title=f"Jobs ({len(jobs)})", caption=caption)
+    table.add_column("Job ID", style="cyan")
+    table.add_column("Provider")
+    table.add_column("Status")
+    table.add_column("Progress", justify="right")
+    table.add_column("Elapsed", justify="right")
+    table.add_column("Next Poll", justify="right")
+    
+    # Running jobs first, then the most recently finished
+    shown = sorted(jobs, key=lambda j: (j.done, -(j.finished or 0)))[:max_rows]
+    now = time.monotonic()
+    for job in shown:
+        style = WATCH_STATUS_STYLES.get(job.status, "white")
+        table.add_row(
+            job.job_id,
+            job.provider or "-",
+            f"[{style}]{job.status}[/{style}]",
+            f"{job.progress:.0f}%" if job.progress is not None else "-",
+            f"{job.elapsed:.0f}s",
+            "-" if job.done else f"{max(0.0, job.next_poll - now):.0f}s"
+        )
+    return table
+
+
+def display_watch_summary(summary: Dict[str, Any]):
+    """Display aggregated watch results"""
+    
+    console.print(f"\n[bold]Watched {summary['jobs']} jobs with {summary['polls']} status polls "
+                  f"({summary['polls_per_job']:.1f} per job)[/bold]")
+    for status, count in sorted(summary['by_status'].items()):
+        style = WATCH_STATUS_STYLES.get(status, "white")
+        console.print(f"[{style}]{status}: {count}[/{style}]")
+    if summary['median_completion_s'] is not None:
+        console.print(f"[dim]Completion time: median {summary['median_completion_s']:.0f}s, "
+                      f"max {summary['max_completion_s']:.0f}s[/dim]")
+
+
+def display_plan_summary(providers: Dict[str, int], errors: int, elapsed: float):
+    """Display provider distribution of an offline plan"""
+    
+    planned = sum(providers.values())
+    table = Table(title="Routing Plan")
+    table.add_column("Provider", style="cyan")
+    table.add_column("Requests", justify="right")
+    table.add_column("Share", justify="right")
+    
+    for provider, count in sorted(providers.items(), key=lambda item: -item[1]):
+        table.add_row(provider, str(count), f"{count / planned:.1%}")
+    
+    console.print(table)
+    rate = (planned + errors) / elapsed if elapsed > 0 else 0.0
+    console.print(f"[green]✅ Planned: {planned}[/green]  [red]❌ Invalid: {errors}[/red]  "
+                  f"[dim]({elapsed:.1f}s, {rate:,.0f} configs/s)[/dim]")
+
+
+def display_whatif_results(rows: List[Dict[str, Any]], factors):
+    """Display baseline and top what-if candidates"""
+    
+    providers = [key[len('share_'):] for key in rows[0] if key.startswith('share_')]
+    
+    table = Table(title="Routing What-If")
+    table.add_column("#", justify="right")
+    table.add_column("Weights\n" + "/".join(f[:3] for f in factors), no_wrap=True)
+    for provider in providers:
+        table.add_column(provider, justify="right")
+    table.add_column("Cost/req", justify="right")
+    table.add_column("ETA\nmean/p95", justify="right", no_wrap=True)
+    table.add_column("Changed", justify="right")
+    table.add_column("Infeasible", justify="right")
+    
+    for row in rows:
+        table.add_row(
+            "base" if row['baseline'] else str(row['candidate']),
+            "/".join(f"{row['w_' + f]:.2f}".lstrip("0") for f in factors),
+            *(f"{row['share_' + p]:.1%}" for p in providers),
+            f"{row['cost_per_request']:.2f}",
+            f"{row['mean_eta_s']:.0f}s/{row['p95_eta_s']:.0f}s",
+            f"{row['changed_vs_baseline']:.1%}",
+            str(row['infeasible']),
+            style="bold" if row['baseline'] else None
+        )
+    
+    console.print(table)
+    console.print("[dim]Cost is in relative units per video second; ETA is projected generation time.[/dim]")
+
+
+def display_fit_report(report: Dict[str, Any]):
+    """Display fitted vs current routing weights and held-out metrics"""
+    
+    baseline, fitted = report['baseline'], report['fitted']
+    
+    table = Table(title="Routing Model Fit", caption=f"{report['train']} train / {report['test']} held out")
+    table.add_column("", style="bold")
+    table.add_column(f"Current{' ' + baseline['version'] if baseline['version'] else ''}", justify="right")
+    table.add_column("Fitted", justify="right")
+    
+    for factor in fitted['weights']:
+        table.add_row(f"{factor} weight", f"{baseline['weights'][factor]:.3f}", f"{fitted['weights'][factor]:.3f}")
+    
+    def fmt(value, spec):
+        return "-" if value is None else format(value, spec)
+    
+    table.add_row("Held-out MSE", fmt(baseline['mse'], '.4f'), fmt(fitted['mse'], '.4f'))
+    table.add_row("Replay utility", fmt(baseline['replay_utility'], '.4f'), fmt(fitted['replay_utility'], '.4f'))
+    table.add_row("Replay matches", str(baseline['replay_matched']), str(fitted['replay_matched']))
+    
+    console.print(table)
+    console.print(f"[dim]Logged policy held-out utility: {fmt(report['logged_utility'], '.4f')}[/dim]")
+    if baseline['mse'] and fitted['mse'] is not None:
+        change = (baseline['mse'] - fitted['mse']) / baseline['mse']
+        color = "green" if change > 0 else "red"
+        console.print(f"[{color}]Held-out MSE {'improved' if change > 0 else 'worsened'} by {abs(change):.1%}[/{color}]")
 
 
 def display_batch_results(results: Dict[str, Any]):
@@ -460,10 +957,13 @@ def display_batch_results(results: Dict[str, Any]):
     
     success_count = len([r for r in batch_results if r['status'] == 'success'])
     error_count = len([r for r in batch_results if r['status'] == 'error'])
+    parked_count = len([r for r in batch_results if r['status'] == 'parked'])
     
     console.print(f"\n[bold]Batch Processing Complete[/bold]")
     console.print(f"[green]✅ Successful: {success_count}[/green]")
     console.print(f"[red]❌ Failed: {error_count}[/red]")
+    if parked_count:
+        console.print(f"[yellow]⏸ Parked: {parked_count}[/yellow]")
     
     if error_count > 0:
         console.print("\n[bold red]Errors:[/bold red]")
@@ -472,5 +972,27 @@ def display_batch_results(results: Dict[str, Any]):
                 console.print(f"  [red]{result['request_id']}: {result['error']}[/red]")
 
 
+def display_load_test_report(report: LoadTestReport):
+    """Display load test results"""
+    
+    summary = report.summary()
+    
+    table = Table(title="Load Test Results")
+    table.add_column("Metric", style="bold")
+    table.add_column("Value", justify="right")
+    
+    table.add_row("Requests", f"{summary['requests']} ({summary['failed_requests']} failed)")
+    table.add_row("Items", f"{summary['items']} ({summary['failed_items']} failed)")
+    table.add_row("Throughput", f"{summary['throughput_rps']:.1f} req/s, {summary['item_throughput']:.1f} items/s")
+    table.add_row("Latency p50", f"{summary['p50_ms']:.1f}ms")
+    table.add_row("Latency p95", f"{summary['p95_ms']:.1f}ms")
+    table.add_row("Latency p99", f"{summary['p99_ms']:.1f}ms")
+    table.add_row("Error rate", f"{summary['error_rate']:.2%}")
+    table.add_row("Fallback rate", f"{summary['fallback_rate']:.2%}")
+    table.add_row("Status codes", ", ".join(f"{k}: {v}" for k, v in sorted(summary['status_codes'].items())))
+    
+    console.print(table)
+
+
 if __name__ == '__main__':
     cli()
\ No newline at end of file
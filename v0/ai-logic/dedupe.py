@@ -0,0 +1,309 @@
+"""
+Near-duplicate request detection for batches.
+
+Requests are fingerprinted with MinHash over character shingles of their
+normalized topic + prompt and indexed with banded LSH, so a batch of N
+requests is checked in roughly O(N) instead of O(N^2). Candidates are
+confirmed against the configured Jaccard threshold and must share the same
+style.
+
+A near-duplicate whose generation parameters also match (duration, aspect
+ratio, voice, music, ...) can share the original's generation outright; one
+whose text matches but parameters differ can still reuse the original's
+images and script.
+
+Configuration (environment):
+    DEDUP_MODE           off (default), report (flag only) or share
+    DEDUP_THRESHOLD      estimated Jaccard similarity to count as duplicate (default 0.8)
+    DEDUP_HISTORY_SIZE   recent requests kept for cross-batch matching (default 10000)
+    DEDUP_HISTORY_TTL    seconds a recent request stays matchable (default 3600)
+"""
+
+import os
+import re
+import time
+from hashlib import blake2b
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from schemas import VideoRequest
+from provider_registry import REGISTRY
+
+_EMPTY = 1 << 64
+_ROTATION = 1 << 64
+_NON_WORD = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+# Seconds of generation per second of video, used to estimate savings
+GENERATION_TIME_PER_SECOND = {
+    name: capabilities.get("estimated_time_per_second", 1.0)
+    for name, capabilities in REGISTRY.capabilities.items()
+}
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Case-fold, strip punctuation and collapse whitespace"""
+    return _WHITESPACE.sub(" ", _NON_WORD.sub(" ", (text or "").casefold())).strip()
+
+
+def shingles(text: str, size: int = 4) -> set:
+    """Character shingles of a normalized string"""
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures via one-permutation hashing with rotation densification
+
+    Each shingle is hashed once and routed to one of ``num_perm`` bins, keeping
+    the minimum per bin; empty bins borrow from the next non-empty bin. This
+    costs O(shingles) per signature instead of O(shingles * num_perm).
+    """
+
+    def __init__(self, num_perm: int = 32, seed: int = 1):
+        self.num_perm = num_perm
+        self._key = seed.to_bytes(8, "little")
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        k = self.num_perm
+        key = self._key
+        bins = [_EMPTY] * k
+        for shingle in shingles(text):
+            h = int.from_bytes(blake2b(shingle.encode(), digest_size=8, key=key).digest(), "little")
+            slot, value = h % k, h // k
+            if value < bins[slot]:
+                bins[slot] = value
+
+        if _EMPTY in bins:
+            if all(v == _EMPTY for v in bins):
+                return (0,) * k
+            dense = list(bins)
+            for slot in range(k):
+                if bins[slot] == _EMPTY:
+                    distance = 1
+                    while bins[(slot + distance) % k] == _EMPTY:
+                        distance += 1
+                    dense[slot] = bins[(slot + distance) % k] + distance * _ROTATION
+            bins = dense
+        return tuple(bins)
+
+
+def estimated_similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity from two MinHash signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def lsh_params(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Pick (bands, rows) so the LSH S-curve crosses ``threshold``"""
+    best = (num_perm, 1)
+    best_error = float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        # Bias slightly low so borderline pairs still become candidates
+        error = abs((1 / bands) ** (1 / rows) - threshold * 0.9)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class LSHIndex:
+    """Banded locality-sensitive hashing over MinHash signatures"""
+
+    def __init__(self, bands: int, rows: int):
+        self.bands = bands
+        self.rows = rows
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], set] = {}
+
+    def _keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def add(self, key: Any, signature: Tuple[int, ...]) -> None:
+        for bucket in self._keys(signature):
+            self._buckets.setdefault(bucket, set()).add(key)
+
+    def remove(self, key: Any, signature: Tuple[int, ...]) -> None:
+        for bucket in self._keys(signature):
+            members = self._buckets.get(bucket)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._buckets[bucket]
+
+    def candidates(self, signature: Tuple[int, ...]) -> set:
+        found = set()
+        for bucket in self._keys(signature):
+            found.update(self._buckets.get(bucket, ()))
+        return found
+
+
+@dataclass(frozen=True, slots=True)
+class Fingerprint:
+    """What makes two requests interchangeable"""
+    style: str
+    signature: Tuple[int, ...]
+    params: Tuple[Any, ...]
+
+
+@dataclass
+class Entry:
+    key: str
+    fingerprint: Fingerprint
+    result: Any = None
+    recorded_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass(frozen=True, slots=True)
+class DuplicateMatch:
+    """A request matched against an earlier one"""
+    original: str
+    similarity: float
+    same_params: bool
+    from_history: bool
+    result: Any = None
+
+
+class NearDuplicateDetector:
+    """MinHash/LSH index over one batch plus a bounded window of recent history"""
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 32, history_size: int = 10000,
+                 history_ttl: float = 3600.0):
+        self.threshold = threshold
+        self.history_size = history_size
+        self.history_ttl = history_ttl
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = lsh_params(num_perm, threshold)
+        self._history_index = LSHIndex(self.bands, self.rows)
+        self._history: "OrderedDict[str, Entry]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> Optional["NearDuplicateDetector"]:
+        if os.getenv("DEDUP_MODE", "off") == "off":
+            return None
+        return cls(
+            threshold=float(os.getenv("DEDUP_THRESHOLD", "0.8")),
+            history_size=int(os.getenv("DEDUP_HISTORY_SIZE", "10000")),
+            history_ttl=float(os.getenv("DEDUP_HISTORY_TTL", "3600"))
+        )
+
+    def fingerprint(self, request: VideoRequest) -> Fingerprint:
+        text = normalize_text(f"{request.topic} {request.prompt or ''}")
+        return Fingerprint(
+            style=request.style,
+            signature=self.hasher.signature(text),
+            params=(
+                request.duration, request.aspect_ratio, request.voice_style, request.background_music,
+                request.theme, request.content_type, request.preferred_provider
+            )
+        )
+
+    def _best_match(self, fingerprint: Fingerprint, index: LSHIndex,
+                    entries: Dict[str, Entry]) -> Optional[Tuple[Entry, float]]:
+        best = None
+        for key in index.candidates(fingerprint.signature):
+            entry = entries[key]
+            if entry.fingerprint.style != fingerprint.style:
+                continue
+            similarity = estimated_similarity(fingerprint.signature, entry.fingerprint.signature)
+            if similarity < self.threshold:
+                continue
+            # Prefer an exact parameter match, then the most similar text
+            rank = (entry.fingerprint.params == fingerprint.params, similarity)
+            if best is None or rank > best[0]:
+                best = (rank, entry, similarity)
+        return (best[1], best[2]) if best else None
+
+    def scan_batch(self, requests: List[VideoRequest], keys: List[str]) -> List[Optional[DuplicateMatch]]:
+        """Match each request against earlier batch members and recent history"""
+        self._expire()
+        batch_index = LSHIndex(self.bands, self.rows)
+        batch_entries: Dict[str, Entry] = {}
+        matches: List[Optional[DuplicateMatch]] = []
+
+        for request, key in zip(requests, keys):
+            fingerprint = self.fingerprint(request)
+            match = None
+
+            found = self._best_match(fingerprint, batch_index, batch_entries)
+            if found:
+                entry, similarity = found
+                match = DuplicateMatch(entry.key, similarity, entry.fingerprint.params == fingerprint.params, False)
+            else:
+                found = self._best_match(fingerprint, self._history_index, self._history)
+                if found:
+                    entry, similarity = found
+                    match = DuplicateMatch(entry.key, similarity, entry.fingerprint.params == fingerprint.params,
+                                           True, entry.result)
+
+            matches.append(match)
+            if match is None:
+                batch_entries[key] = Entry(key, fingerprint)
+                batch_index.add(key, fingerprint.signature)
+
+        return matches
+
+    def record(self, key: str, request: VideoRequest, result: Any,
+               fingerprint: Optional[Fingerprint] = None) -> None:
+        """Remember a completed request so later batches can match it"""
+        fingerprint = fingerprint or self.fingerprint(request)
+        previous = self._history.pop(key, None)
+        if previous is not None:
+            self._history_index.remove(key, previous.fingerprint.signature)
+        self._history[key] = Entry(key, fingerprint, result)
+        self._history_index.add(key, fingerprint.signature)
+        while len(self._history) > self.history_size:
+            self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        key, entry = self._history.popitem(last=False)
+        self._history_index.remove(key, entry.fingerprint.signature)
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.history_ttl
+        while self._history and next(iter(self._history.values())).recorded_at < cutoff:
+            self._evict_oldest()
+
+
+@dataclass
+class DedupReport:
+    """Savings from near-duplicate detection in one batch"""
+    mode: str
+    threshold: float
+    requests: int = 0
+    duplicates: int = 0
+    within_batch: int = 0
+    from_history: int = 0
+    shared_generations: int = 0
+    asset_reuse: int = 0
+    generation_seconds_saved: float = 0.0
+
+    def add(self, match: DuplicateMatch, request: VideoRequest, provider: Optional[str], shared: bool) -> None:
+        self.duplicates += 1
+        if match.from_history:
+            self.from_history += 1
+        else:
+            self.within_batch += 1
+        if shared:
+            self.shared_generations += 1
+            rate = GENERATION_TIME_PER_SECOND.get(provider or "", 1.0)
+            self.generation_seconds_saved += rate * (request.duration or 30)
+        elif not match.same_params:
+            self.asset_reuse += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "threshold": self.threshold,
+            "requests": self.requests,
+            "duplicates": self.duplicates,
+            "within_batch": self.within_batch,
+            "from_history": self.from_history,
+            "shared_generations": self.shared_generations,
+            "asset_reuse": self.asset_reuse,
+            "submissions_saved": self.shared_generations,
+            "estimated_generation_seconds_saved": round(self.generation_seconds_saved, 1)
+        }
@@ -0,0 +1,317 @@
+"""
+Per-tenant weighted fair queuing in front of the Node submit path.
+
+Every Node submission takes a slot from a FairScheduler. When slots are
+free, a request goes straight through. Otherwise it waits in its tenant's
+FIFO queue, and freed slots go to the tenant whose head request has the
+smallest virtual finish tag (self-clocked fair queuing): each request
+advances its tenant's tag by 1/weight. A tenant with a 5k-item backlog
+therefore gets its weighted share of Node rather than all of it, and a
+tenant sending an occasional interactive request is served next.
+
+A tenant can also be capped at a number of concurrent submissions and at a
+submission rate (token bucket). A tenant at its cap is skipped without
+losing its place. A full tenant queue rejects with TenantQueueFull.
+
+With shared state configured, a tenant's rate is enforced across all
+replicas. Each submission first counts itself in a fixed window in the
+shared store and waits for the next window once ``rate`` is used up.
+Fixed windows allow up to twice the rate across a window boundary. If the
+store is unreachable, only the local bucket applies.
+
+Tenants come from the X-API-KEY header when it is mapped in the config.
+Otherwise the X-Tenant-ID header is used, then a hash of the API key, then
+"default".
+
+Configuration (environment):
+    FAIR_QUEUE_CONCURRENCY   concurrent Node submissions across all tenants
+    FAIR_QUEUE_TENANTS       tenant policies: inline JSON or a path to a JSON file
+
+    {"default": {"weight": 1, "max_queue": 1000},
+     "tenants": {"acme": {"weight": 4, "max_concurrency": 16, "rate": 10, "burst": 20}},
+     "api_keys": {"acme-live-key": "acme"}}
+
+Queuing is off unless one of the two is set.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, fields
+from typing import Any, AsyncIterator, Deque, Dict, Mapping, Optional, Set
+
+from state_backend import SharedState, StateBackendError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+
+# Tenant of the batch being orchestrated, for items that have no request of their own
+current_tenant: contextvars.ContextVar[str] = contextvars.ContextVar("current_tenant", default=DEFAULT_TENANT)
+
+
+class TenantQueueFull(Exception):
+    """The tenant already has max_queue requests waiting"""
+
+
+@dataclass
+class TenantPolicy:
+    """Share of Node submissions a tenant is entitled to"""
+    weight: float = 1.0
+    max_concurrency: Optional[int] = None
+    rate: Optional[float] = None        # submissions per second
+    burst: Optional[float] = None       # token bucket size, defaults to max(1, rate)
+    max_queue: int = 1000
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any], base: Optional["TenantPolicy"] = None) -> "TenantPolicy":
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown tenant policy keys: {sorted(unknown)}")
+        values = {f.name: getattr(base, f.name) for f in fields(cls)} if base else {}
+        values.update(data)
+        policy = cls(**values)
+        if policy.weight <= 0:
+            raise ValueError("Tenant weight must be positive")
+        return policy
+
+
+class _Waiter:
+    __slots__ = ("future", "finish", "enqueued")
+
+    def __init__(self, future: asyncio.Future, finish: float, enqueued: float):
+        self.future = future
+        self.finish = finish
+        self.enqueued = enqueued
+
+
+class _Tenant:
+    def __init__(self, policy: TenantPolicy, now: float):
+        self.policy = policy
+        self.queue: Deque[_Waiter] = deque()
+        self.in_flight = 0
+        self.gated = 0
+        self.last_finish = 0.0
+        self.burst = policy.burst if policy.burst is not None else max(1.0, policy.rate or 0.0)
+        self.tokens = self.burst
+        self.refilled = now
+        self.dispatched = 0
+        self.rejected = 0
+        self.waits_ms: Deque[float] = deque(maxlen=1024)
+
+    def at_capacity(self) -> bool:
+        return self.policy.max_concurrency is not None and self.in_flight >= self.policy.max_concurrency
+
+    def token_delay(self, now: float) -> float:
+        """Seconds until a rate token is available (0 when one is)"""
+        if not self.policy.rate:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.policy.rate)
+        self.refilled = now
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.policy.rate
+
+
+class FairScheduler:
+    """Weighted fair queue of Node submission slots shared by all tenants"""
+
+    def __init__(self, concurrency: int = 64, policies: Optional[Dict[str, TenantPolicy]] = None,
+                 default_policy: Optional[TenantPolicy] = None, api_keys: Optional[Dict[str, str]] = None,
+                 shared: Optional[SharedState] = None):
+        self.concurrency = concurrency
+        self.policies = policies or {}
+        self.default_policy = default_policy or TenantPolicy()
+        self.api_keys = api_keys or {}
+        self.shared = shared
+        self.in_flight = 0
+        self._tenants: Dict[str, _Tenant] = {}
+        self._waiting: Set[str] = set()
+        self._virtual = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_at = 0.0
+
+    @classmethod
+    def from_env(cls, shared: Optional[SharedState] = None) -> Optional["FairScheduler"]:
+        concurrency = os.getenv("FAIR_QUEUE_CONCURRENCY")
+        tenants = os.getenv("FAIR_QUEUE_TENANTS")
+        if not concurrency and not tenants:
+            return None
+        config: Dict[str, Any] = {}
+        if tenants:
+            if tenants.lstrip().startswith("{"):
+                config = json.loads(tenants)
+            else:
+                with open(tenants, "r") as f:
+                    config = json.load(f)
+        default = TenantPolicy.from_dict(config.get("default", {}))
+        return cls(
+            concurrency=int(concurrency or 64),
+            policies={name: TenantPolicy.from_dict(policy, default)
+                      for name, policy in config.get("tenants", {}).items()},
+            default_policy=default,
+            api_keys=config.get("api_keys", {}),
+            shared=shared
+        )
+
+    def tenant_for(self, headers: Mapping[str, str]) -> str:
+        api_key = headers.get("x-api-key")
+        if api_key and api_key in self.api_keys:
+            return self.api_keys[api_key]
+        tenant = headers.get("x-tenant-id")
+        if tenant:
+            return tenant
+        if api_key:
+            return "key-" + hashlib.sha256(api_key.encode()).hexdigest()[:12]
+        return DEFAULT_TENANT
+
+    @asynccontextmanager
+    async def slot(self, tenant: str) -> AsyncIterator[float]:
+        """Hold one Node submission slot for ``tenant``; yields the queue wait in ms"""
+        waited = await self.acquire(tenant)
+        try:
+            yield waited
+        finally:
+            self.release(tenant)
+
+    async def acquire(self, tenant: str) -> float:
+        state = self._tenant(tenant)
+        queued = len(state.queue) + state.gated
+        if queued >= state.policy.max_queue:
+            state.rejected += 1
+            raise TenantQueueFull(f"Tenant {tenant} has {queued} requests queued")
+        gated_at = time.monotonic()
+        if self.shared is not None and state.policy.rate:
+            state.gated += 1
+            try:
+                await self._shared_rate_gate(tenant, state.policy.rate)
+            finally:
+                state.gated -= 1
+        now = time.monotonic()
+        waiter = _Waiter(asyncio.get_running_loop().create_future(),
+                         max(self._virtual, state.last_finish) + 1.0 / state.policy.weight, now)
+        state.last_finish = waiter.finish
+        state.queue.append(waiter)
+        self._waiting.add(tenant)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as the caller gave up
+                self.release(tenant)
+            elif waiter in state.queue:
+                state.queue.remove(waiter)
+                if not state.queue:
+                    self._waiting.discard(tenant)
+            raise
+        return waiter.future.result() + (now - gated_at) * 1000
+
+    async def _shared_rate_gate(self, tenant: str, rate: float) -> None:
+        """Wait until the tenant's cluster-wide window has room for one more submission"""
+        window = max(1.0, 1.0 / rate)
+        limit = max(1, int(rate * window))
+        while True:
+            now = time.time()
+            index = int(now // window)
+            try:
+                count = await self.shared.incr(f"rate:{tenant}:{index}", ttl=window * 2)
+            except StateBackendError as e:
+                logger.warning(f"Shared rate limit unavailable for {tenant}, using the local bucket: {e}")
+                return
+            if count <= limit:
+                return
+            await asyncio.sleep((index + 1) * window - now)
+
+    def release(self, tenant: str) -> None:
+        self._tenants[tenant].in_flight -= 1
+        self.in_flight -= 1
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        tenants = {}
+        for name, state in sorted(self._tenants.items()):
+            waits = sorted(state.waits_ms)
+            tenants[name] = {
+                "weight": state.policy.weight,
+                "max_concurrency": state.policy.max_concurrency,
+                "rate": state.policy.rate,
+                "queued": len(state.queue) + state.gated,
+                "in_flight": state.in_flight,
+                "dispatched": state.dispatched,
+                "rejected": state.rejected,
+                "wait_ms": {
+                    "p50": round(waits[len(waits) // 2], 2) if waits else 0.0,
+                    "p95": round(waits[int(len(waits) * 0.95)], 2) if waits else 0.0,
+                    "max": round(waits[-1], 2) if waits else 0.0
+                }
+            }
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "queued": sum(len(state.queue) + state.gated for state in self._tenants.values()),
+            "tenants": tenants
+        }
+
+    def _tenant(self, name: str) -> _Tenant:
+        state = self._tenants.get(name)
+        if state is None:
+            policy = self.policies.get(name, self.default_policy)
+            state = self._tenants[name] = _Tenant(policy, time.monotonic())
+        return state
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        retry_in = None
+        while self.in_flight < self.concurrency and self._waiting:
+            best = None
+            for name in self._waiting:
+                state = self._tenants[name]
+                if state.at_capacity():
+                    continue
+                delay = state.token_delay(now)
+                if delay > 0:
+                    retry_in = delay if retry_in is None else min(retry_in, delay)
+                    continue
+                if best is None or state.queue[0].finish < best[1].queue[0].finish:
+                    best = (name, state)
+            if best is None:
+                break
+
+            name, state = best
+            waiter = state.queue.popleft()
+            if not state.queue:
+                self._waiting.discard(name)
+            if waiter.future.done():
+                # Cancelled before its own cleanup ran; it must not take the slot
+                continue
+            if state.policy.rate:
+                state.tokens -= 1.0
+            state.in_flight += 1
+            state.dispatched += 1
+            self.in_flight += 1
+            self._virtual = waiter.finish
+            waited = (now - waiter.enqueued) * 1000
+            state.waits_ms.append(waited)
+            waiter.future.set_result(waited)
+
+        if retry_in is not None and self._waiting:
+            self._schedule(now + retry_in)
+
+    def _schedule(self, at: float) -> None:
+        """Wake the dispatcher when a rate-limited tenant earns its next token"""
+        if self._timer is not None and self._timer_at <= at:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer_at = at
+        self._timer = asyncio.get_running_loop().call_later(max(0.0, at - time.monotonic()), self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
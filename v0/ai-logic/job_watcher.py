@@ -0,0 +1,296 @@
+"""
+Bulk job watcher for the CLI.
+
+Polls the Node API's /video/status/{jobId} for many jobs at once over one
+pooled client with bounded concurrency. Each job is rescheduled on its own
+interval: a job that reports progress is polled again around when its
+recent rate (progress gained between polls) says it will finish, one
+without progress uses the provider's estimated time, and a job whose status
+stops changing backs off toward the maximum interval. Elapsed time counts
+from the job's ``createdAt``, so jobs already running when the watch began
+are scheduled by their real age.
+"""
+
+import asyncio
+import heapq
+import json
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from node_client import create_client
+
+TERMINAL_STATUSES = frozenset({"completed", "failed", "not_found", "unreachable", "timed_out"})
+
+_ETA = re.compile(r"(\d+(?:\.\d+)?)\s*(?:-\s*(\d+(?:\.\d+)?))?\s*(second|sec|minute|min|hour)", re.IGNORECASE)
+_UNIT_SECONDS = {"sec": 1, "second": 1, "min": 60, "minute": 60, "hour": 3600}
+
+
+def parse_eta(text: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Parse an estimate like '1-3 minutes' or '30-60 seconds' into (low, high) seconds"""
+    if not text:
+        return None
+    match = _ETA.search(str(text))
+    if not match:
+        return None
+    unit = _UNIT_SECONDS[match.group(3).lower()]
+    low = float(match.group(1)) * unit
+    high = float(match.group(2)) * unit if match.group(2) else low
+    return low, high
+
+
+def parse_created_at(text: Optional[str]) -> Optional[float]:
+    """Seconds since an ISO 8601 ``createdAt`` timestamp, or None when it can't be parsed"""
+    if not text:
+        return None
+    try:
+        created = datetime.fromisoformat(str(text).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return max(0.0, (datetime.now(timezone.utc) - created).total_seconds())
+
+
+@dataclass
+class WatchedJob:
+    """Polling state of one job"""
+    job_id: str
+    provider: Optional[str] = None
+    eta: Optional[Tuple[float, float]] = None
+    status: str = "pending"
+    progress: Optional[float] = None
+    video_url: Optional[str] = None
+    error: Optional[str] = None
+    polls: int = 0
+    consecutive_errors: int = 0
+    unchanged_polls: int = 0
+    rate: Optional[float] = None            # progress points per second between the last two changes
+    progress_at: Optional[float] = None     # when the current progress was first seen
+    anchored: bool = False                  # started comes from the job's createdAt
+    started: float = field(default_factory=time.monotonic)
+    finished: Optional[float] = None
+    next_poll: float = 0.0
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+
+def load_job_ids(path: str) -> List[Dict[str, Any]]:
+    """Jobs from a file of ids, an orchestration result, a batch result or a batch checkpoint
+
+    Returns dicts with ``job_id`` and, when the source carries them,
+    ``provider`` and ``estimated_time``.
+    """
+    with open(path, "r") as f:
+        text = f.read()
+
+    try:
+        documents = [json.loads(text)]
+    except ValueError:
+        documents = []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                documents.append(json.loads(line))
+            except ValueError:
+                documents.append(line)
+
+    jobs = []
+    for document in documents:
+        jobs.extend(_extract_jobs(document))
+    return jobs
+
+
+def _extract_jobs(document: Any) -> Iterable[Dict[str, Any]]:
+    if isinstance(document, str):
+        yield {"job_id": document}
+    elif isinstance(document, list):
+        for item in document:
+            yield from _extract_jobs(item)
+    elif isinstance(document, dict):
+        if "batch_results" in document:
+            yield from _extract_jobs(document["batch_results"])
+        elif isinstance(document.get("result"), dict):
+            # Batch result item or checkpoint record; failed items carry no job
+            yield from _extract_jobs(document["result"])
+        elif document.get("job_id") or document.get("jobId"):
+            node = document.get("node_api_response") or {}
+            yield {
+                "job_id": document.get("job_id") or document.get("jobId"),
+                "provider": document.get("provider") or node.get("provider"),
+                "estimated_time": document.get("estimated_duration") or node.get("estimatedTime")
+            }
+
+
+class JobWatcher:
+    """Adaptive, concurrency-bounded poller for many Node API jobs"""
+
+    def __init__(self, base_url: str, api_key: str, concurrency: int = 20,
+                 min_interval: float = 2.0, max_interval: float = 60.0,
+                 max_errors: int = 5, timeout: Optional[float] = None,
+                 on_update: Optional[Callable[[WatchedJob], None]] = None):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.concurrency = max(1, concurrency)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_errors = max_errors
+        self.timeout = timeout
+        self.on_update = on_update or (lambda job: None)
+
+    def next_interval(self, job: WatchedJob) -> float:
+        """Seconds until this job should be polled again"""
+        if job.consecutive_errors:
+            interval = self.min_interval * 2 ** job.consecutive_errors
+        elif job.progress and 0 < job.progress < 100:
+            # Recent rate when two readings differ, else the average since the job started
+            if job.rate:
+                remaining = (100 - job.progress) / job.rate
+            else:
+                remaining = job.elapsed * (100 - job.progress) / job.progress
+            interval = remaining / 2
+        elif job.eta:
+            remaining = job.eta[0] - job.elapsed
+            interval = remaining / 2 if remaining > 0 else (job.eta[1] - job.eta[0]) / 4 or self.min_interval
+        else:
+            interval = self.min_interval
+        # Back off from jobs whose status has stopped moving
+        interval *= 1.5 ** min(job.unchanged_polls, 6)
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        return interval * random.uniform(0.9, 1.1)
+
+    async def watch(self, jobs: List[WatchedJob]) -> List[WatchedJob]:
+        """Poll until every job reaches a terminal status or the timeout elapses"""
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        queue = [(job.next_poll, i) for i, job in enumerate(jobs) if not job.done]
+        heapq.heapify(queue)
+        slots = asyncio.Semaphore(self.concurrency)
+        in_flight = set()
+        woken = asyncio.Event()
+
+        headers = {"X-API-KEY": self.api_key}
+        async with create_client(self.base_url, self.concurrency, headers=headers, timeout=30.0) as client:
+            async def poll(index: int):
+                job = jobs[index]
+                async with slots:
+                    await self._poll(client, job)
+                if not job.done:
+                    job.next_poll = time.monotonic() + self.next_interval(job)
+                    heapq.heappush(queue, (job.next_poll, index))
+                self.on_update(job)
+                woken.set()
+
+            while queue or in_flight:
+                now = time.monotonic()
+                if deadline and now >= deadline:
+                    break
+                while queue and queue[0][0] <= now:
+                    _, index = heapq.heappop(queue)
+                    task = asyncio.create_task(poll(index))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+
+                wait = queue[0][0] - now if queue else None
+                if deadline:
+                    wait = min(wait, deadline - now) if wait is not None else deadline - now
+                woken.clear()
+                try:
+                    await asyncio.wait_for(woken.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+
+            for task in list(in_flight):
+                task.cancel()
+
+        for job in jobs:
+            if not job.done:
+                job.status = "timed_out"
+                job.finished = time.monotonic()
+                self.on_update(job)
+        return jobs
+
+    async def _poll(self, client: httpx.AsyncClient, job: WatchedJob) -> None:
+        job.polls += 1
+        try:
+            response = await client.get(f"/video/status/{job.job_id}")
+        except httpx.HTTPError as e:
+            self._record_error(job, f"{type(e).__name__}: {e}")
+            return
+
+        if response.status_code == 404:
+            self._finish(job, "not_found", error="Job not found")
+            return
+        if response.status_code != 200:
+            self._record_error(job, f"HTTP {response.status_code}")
+            return
+
+        body = response.json()
+        now = time.monotonic()
+        job.consecutive_errors = 0
+        if not job.anchored:
+            age = parse_created_at(body.get("createdAt"))
+            if age is not None:
+                job.started = min(job.started, now - age)
+                job.anchored = True
+        status = body.get("status", "unknown")
+        progress = body.get("progress")
+        if (status, progress) == (job.status, job.progress):
+            job.unchanged_polls += 1
+        else:
+            job.unchanged_polls = 0
+        if isinstance(progress, (int, float)) and progress != job.progress:
+            if isinstance(job.progress, (int, float)) and job.progress_at is not None and progress > job.progress:
+                job.rate = (progress - job.progress) / max(now - job.progress_at, 1e-3)
+            job.progress_at = now
+        job.status = status
+        job.progress = progress
+        job.provider = job.provider or (body.get("routing") or {}).get("provider")
+        job.eta = job.eta or parse_eta(body.get("estimatedTime"))
+
+        if status == "completed":
+            job.video_url = (body.get("result") or {}).get("videoUrl")
+            self._finish(job, "completed")
+        elif status == "failed":
+            self._finish(job, "failed", error=body.get("error") or "Generation failed")
+
+    def _record_error(self, job: WatchedJob, error: str) -> None:
+        job.consecutive_errors += 1
+        job.error = error
+        if job.consecutive_errors >= self.max_errors:
+            self._finish(job, "unreachable", error=error)
+
+    @staticmethod
+    def _finish(job: WatchedJob, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.error = error
+        job.finished = time.monotonic()
+
+
+def summarize(jobs: List[WatchedJob]) -> Dict[str, Any]:
+    """Aggregate outcome of a watch run"""
+    by_status: Dict[str, int] = {}
+    for job in jobs:
+        by_status[job.status] = by_status.get(job.status, 0) + 1
+    completed = sorted(job.elapsed for job in jobs if job.status == "completed")
+    polls = sum(job.polls for job in jobs)
+    return {
+        "jobs": len(jobs),
+        "by_status": by_status,
+        "polls": polls,
+        "polls_per_job": polls / len(jobs) if jobs else 0.0,
+        "median_completion_s": completed[len(completed) // 2] if completed else None,
+        "max_completion_s": completed[-1] if completed else None
+    }
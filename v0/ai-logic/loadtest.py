@@ -0,0 +1,209 @@
+"""
+End-to-end load generation against ai-logic.
+
+Drives /orchestrate/video or /batch/orchestrate either closed-loop at a fixed
+concurrency or open-loop at a target request rate, and reports throughput,
+latency percentiles and fallback rates. Pair with node_simulator.py to run
+capacity planning on a laptop with no network.
+"""
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any
+
+import httpx
+
+DEFAULT_PAYLOADS = [
+    {"topic": "ocean life", "style": "cinematic", "duration": 45, "content_type": "educational"},
+    {"topic": "space cats", "style": "animation", "duration": 20, "priority": "high"},
+    {"topic": "quarterly update", "style": "documentary", "duration": 150, "content_type": "corporate"},
+    {"topic": "history of tea", "style": "slideshow_modern", "duration": 300, "voice_style": "calm"},
+    {"topic": "neon dreams", "style": "abstract", "duration": 30, "content_type": "creative"},
+    {"topic": "city at dawn", "style": "photorealistic", "duration": 60},
+]
+
+FALLBACK_REASON_PREFIX = "Primary provider unavailable"
+
+
+@dataclass
+class LoadTestConfig:
+    """Load test parameters"""
+    target_url: str
+    endpoint: str = "orchestrate"  # orchestrate or batch
+    duration: float = 30.0
+    concurrency: int = 10
+    rps: Optional[float] = None  # open-loop when set, closed-loop otherwise
+    batch_items: int = 10
+    timeout: float = 60.0
+    payloads: List[Dict[str, Any]] = field(default_factory=lambda: list(DEFAULT_PAYLOADS))
+    # The payloads repeat, so by default measure orchestration rather than result cache hits
+    use_cache: bool = False
+
+
+@dataclass
+class LoadTestReport:
+    """Aggregated load test results"""
+    elapsed: float = 0.0
+    requests: int = 0
+    failed_requests: int = 0
+    items: int = 0
+    failed_items: int = 0
+    fallbacks: int = 0
+    latencies_ms: List[float] = field(default_factory=list)
+    status_codes: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def throughput_rps(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def item_throughput(self) -> float:
+        return self.items / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def fallback_rate(self) -> float:
+        succeeded = self.items - self.failed_items
+        return self.fallbacks / succeeded if succeeded else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.failed_items / self.items if self.items else 0.0
+
+    def percentile(self, pct: float) -> float:
+        """Nearest-rank latency percentile in milliseconds"""
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        rank = max(1, min(len(ordered), int(round(pct / 100 * len(ordered) + 0.5))))
+        return ordered[rank - 1]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "elapsed_s": round(self.elapsed, 3),
+            "requests": self.requests,
+            "failed_requests": self.failed_requests,
+            "items": self.items,
+            "failed_items": self.failed_items,
+            "throughput_rps": round(self.throughput_rps, 2),
+            "item_throughput": round(self.item_throughput, 2),
+            "p50_ms": round(self.percentile(50), 2),
+            "p95_ms": round(self.percentile(95), 2),
+            "p99_ms": round(self.percentile(99), 2),
+            "error_rate": round(self.error_rate, 4),
+            "fallback_rate": round(self.fallback_rate, 4),
+            "status_codes": dict(self.status_codes)
+        }
+
+
+def _is_fallback(result: Dict[str, Any]) -> bool:
+    if "fallback_used" in result:
+        return bool(result["fallback_used"])
+    return str(result.get("routing_reason", "")).startswith(FALLBACK_REASON_PREFIX)
+
+
+class LoadGenerator:
+    """Issues load against one ai-logic instance over a single pooled client"""
+
+    def __init__(self, config: LoadTestConfig):
+        self.config = config
+        self.report = LoadTestReport()
+        self._payloads = itertools.cycle(config.payloads)
+        self._sequence = itertools.count()
+
+    def _next_body(self):
+        if self.config.endpoint == "batch":
+            return f"{self.config.target_url}/batch/orchestrate", [
+                self._tag(next(self._payloads)) for _ in range(self.config.batch_items)
+            ]
+        return f"{self.config.target_url}/orchestrate/video", self._tag(next(self._payloads))
+
+    def _tag(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {**payload, "request_id": f"load_{next(self._sequence)}", "use_cache": self.config.use_cache}
+
+    def _record(self, started: float, status: str, body: Any) -> None:
+        report = self.report
+        report.latencies_ms.append((time.perf_counter() - started) * 1000)
+        report.requests += 1
+        report.status_codes[status] = report.status_codes.get(status, 0) + 1
+
+        if self.config.endpoint == "batch":
+            results = body.get("batch_results", []) if isinstance(body, dict) else []
+            expected = self.config.batch_items
+            report.items += expected
+            if status != "200":
+                report.failed_requests += 1
+                report.failed_items += expected
+                return
+            succeeded = [r for r in results if r.get("status") == "success"]
+            report.failed_items += expected - len(succeeded)
+            report.fallbacks += sum(1 for r in succeeded if _is_fallback(r.get("result") or {}))
+        else:
+            report.items += 1
+            if status != "200":
+                report.failed_requests += 1
+                report.failed_items += 1
+            elif _is_fallback(body):
+                report.fallbacks += 1
+
+    async def _issue(self, client: httpx.AsyncClient, started: float) -> None:
+        url, body = self._next_body()
+        try:
+            response = await client.post(url, json=body, timeout=self.config.timeout)
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = None
+            self._record(started, str(response.status_code), payload)
+        except httpx.HTTPError as e:
+            self._record(started, type(e).__name__, None)
+
+    async def _closed_loop(self, client: httpx.AsyncClient, deadline: float) -> None:
+        async def worker():
+            while time.perf_counter() < deadline:
+                await self._issue(client, time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(self.config.concurrency)))
+
+    async def _open_loop(self, client: httpx.AsyncClient, start: float, deadline: float) -> None:
+        # Latency is measured from the scheduled arrival time so a saturated
+        # server is not hidden by the generator waiting for in-flight slots.
+        interval = 1.0 / self.config.rps
+        slots = asyncio.Semaphore(self.config.concurrency)
+        tasks = []
+
+        async def arrival(scheduled: float):
+            async with slots:
+                await self._issue(client, scheduled)
+
+        for n in itertools.count():
+            scheduled = start + n * interval
+            if scheduled >= deadline:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(arrival(scheduled)))
+
+        await asyncio.gather(*tasks)
+
+    async def run(self) -> LoadTestReport:
+        limits = httpx.Limits(
+            max_connections=self.config.concurrency,
+            max_keepalive_connections=self.config.concurrency
+        )
+        async with httpx.AsyncClient(limits=limits) as client:
+            start = time.perf_counter()
+            deadline = start + self.config.duration
+            if self.config.rps:
+                await self._open_loop(client, start, deadline)
+            else:
+                await self._closed_loop(client, deadline)
+            self.report.elapsed = time.perf_counter() - start
+        return self.report
+
+
+async def run_load_test(config: LoadTestConfig) -> LoadTestReport:
+    """Run a load test and return the aggregated report"""
+    return await LoadGenerator(config).run()
@@ -3,28 +3,69 @@ Potter Labs AI Logic Service
 Main orchestrator for AI video generation with intelligent provider routing.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, List, Any
+from contextlib import asynccontextmanager
+import asyncio
 import httpx
 import json
 import logging
+import time
+import uuid
 from pathlib import Path
 
 from orchestrator import VideoOrchestrator
-from routing import ProviderRouter, RoutingDecision
+from routing import ProviderRouter
+from capability_index import NoFeasibleProvider
 from providers import ProviderHealthChecker
-from schemas import VideoRequest, VideoResponse, OrchestrationResponse
+from schemas import VideoRequest, VideoResponse, OrchestrationResponse, VideoStyle
+from tracing import Tracer
+from profiler import SamplingProfiler, ProfilerBusy, dump_asyncio_tasks
+from prompt_enhancer import PromptEnhancer
+from dedupe import NearDuplicateDetector, DedupReport
+from result_cache import ResultCache, canonical_config_hash
+from traffic_log import TrafficRecorder, current_batch
+from payload_validator import PayloadValidator, ConfigValidationError
+from fair_queue import FairScheduler, TenantQueueFull, current_tenant
+from retry_policy import RetryPolicy
+from parking import ParkingLot, ParkingFull, RequestParked, dispatching
+from node_client import NodePool
+from state_backend import SharedState
+from prewarm import Prewarmer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start parked-request dispatch and the prewarm; close every service on shutdown"""
+    if parking_lot:
+        parking_lot.start()
+    if prewarmer:
+        prewarmer.start()
+    yield
+    if prewarmer:
+        await prewarmer.close()
+    if traffic_recorder:
+        # Write out captured traffic still queued for the log
+        await asyncio.to_thread(traffic_recorder.close)
+    if parking_lot:
+        await parking_lot.close()
+    await node_pool.close()
+    if shared_state:
+        await shared_state.close()
+
+
 app = FastAPI(
     title="Potter Labs AI Logic Service",
     description="Intelligent orchestrator for AI video generation",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -38,60 +79,253 @@ app.add_middleware(
 # Initialize services
 orchestrator = VideoOrchestrator()
 router = ProviderRouter()
-health_checker = ProviderHealthChecker()
+node_pool = NodePool.from_env()
+# Health snapshots, cached results and tenant rate windows shared between replicas
+shared_state = SharedState.from_env()
+health_checker = ProviderHealthChecker(node_pool, shared_state)
+tracer = Tracer.from_env()
+prompt_enhancer = PromptEnhancer.from_env()
+dedup_detector = NearDuplicateDetector.from_env()
+result_cache = ResultCache.from_env(shared_state, OrchestrationResponse)
+traffic_recorder = TrafficRecorder.from_env()
+payload_validator = PayloadValidator.from_env()
+fair_queue = FairScheduler.from_env(shared_state)
+retry_policy = RetryPolicy.from_env()
+# Parked requests are re-run through orchestrate_video once a provider recovers
+parking_lot = ParkingLot.from_env(health_checker, lambda request: orchestrate_video(request))
 
-# Node API base URL (configurable via environment)
 import os
-NODE_API_URL = os.getenv("NODE_API_URL", "http://localhost:3000")
+
+# Diagnostics endpoints are disabled unless explicitly enabled
+ENABLE_PROFILER = os.getenv("ENABLE_PROFILER", "").lower() in ("1", "true", "yes")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+profiler = SamplingProfiler()
+
+# Near-duplicate handling in batches: off, report or share
+DEDUP_MODE = os.getenv("DEDUP_MODE", "off")
+
+# Warm-up run in the background at startup; /ready stays false until it finishes
+prewarmer = Prewarmer.from_env()
+
+
+async def _prewarm_routing_tables() -> Dict[str, Any]:
+    """Fill the feasibility caches for every aspect ratio and score each style once"""
+    index = router.capability_index
+    for aspect_ratio in (None, *index.aspect_ratios):
+        index.feasible(None, aspect_ratio)
+        index.rejections(None, aspect_ratio)
+    for style in VideoStyle:
+        router.analyze(VideoRequest(topic="prewarm", style=style))
+    return {"providers": len(index.providers), "aspect_ratios": len(index.aspect_ratios)}
+
+
+async def _prewarm_shared_state() -> Dict[str, Any]:
+    await shared_state.get("prewarm", fresh=True)
+    return shared_state.info()
+
+
+async def _prewarm_provider_health() -> Dict[str, bool]:
+    return {provider: status.is_healthy for provider, status in (await health_checker.check_all_providers()).items()}
+
+
+async def _prewarm_synthetic_routing() -> Dict[str, Any]:
+    """One request through routing, health, config preparation and validation; nothing is submitted"""
+    request = VideoRequest(topic="prewarm", style="cinematic", duration=30, content_type="educational")
+    decision = await router.route_provider(request)
+    status = await health_checker.check_provider(decision.provider)
+    config = orchestrator.prepare_provider_config(request, decision)
+    errors = payload_validator.errors(config) if payload_validator else []
+    if errors:
+        raise ValueError(f"Synthetic config fails validation: {errors}")
+    return {"provider": decision.provider, "healthy": status.is_healthy}
+
+
+if prewarmer:
+    prewarmer.add("routing_tables", _prewarm_routing_tables, required=True)
+    prewarmer.add("node_connections", node_pool.warm)
+    if shared_state:
+        prewarmer.add("shared_state", _prewarm_shared_state)
+    prewarmer.add("provider_health", _prewarm_provider_health)
+    prewarmer.add("synthetic_routing", _prewarm_synthetic_routing, required=True)
 
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "ai-logic"}
+    """Liveness check endpoint; see /ready for whether to send traffic"""
+    return {
+        "status": "healthy",
+        "service": "ai-logic",
+        "routing_model": router.model.version if router.model else None
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check: 503 until the startup prewarm has finished"""
+    if not prewarmer:
+        return {"ready": True}
+    return JSONResponse(status_code=200 if prewarmer.ready else 503, content=prewarmer.to_dict())
 
 
 @app.post("/orchestrate/video", response_model=OrchestrationResponse)
-async def orchestrate_video(request: VideoRequest):
+async def orchestrate_video(request: VideoRequest, http_request: Request = None):
     """
     Main orchestration endpoint - determines provider and initiates video generation
     """
-    try:
-        logger.info(f"Orchestrating video generation: {request.dict()}")
-        
-        # 1. Analyze request and determine optimal provider routing
-        routing_decision = await router.route_provider(request)
-        logger.info(f"Routing decision: {routing_decision.dict()}")
-        
-        # 2. Check provider health and availability
-        provider_status = await health_checker.check_provider(routing_decision.provider)
-        if not provider_status.is_healthy:
-            # Try fallback provider
-            if routing_decision.fallback_provider:
-                routing_decision.provider = routing_decision.fallback_provider
-                routing_decision.reason = f"Primary provider unavailable, using fallback: {routing_decision.fallback_provider}"
+    traceparent = http_request.headers.get("traceparent") if http_request else None
+    tenant = fair_queue.tenant_for(http_request.headers) if fair_queue and http_request else current_tenant.get()
+    started = time.perf_counter()
+    timings = {}
+    routing_decision = None
+    fallback_used = hit = False
+    with tracer.span("orchestrate", traceparent=traceparent, request_id=request.request_id) as span:
+        try:
+            logger.info("Orchestrating video generation: %s", request)
+            
+            # 1. Analyze request and determine optimal provider routing
+            with tracer.span("route"):
+                try:
+                    routing_decision = await router.route_provider(request)
+                except NoFeasibleProvider as e:
+                    raise HTTPException(status_code=422, detail={"error": str(e), "rejections": e.rejections})
+            logger.info("Routing decision: %s", routing_decision)
+            
+            # 2. Check provider health and availability
+            with tracer.span("health", provider=routing_decision.provider):
+                provider_status = await health_checker.check_provider(routing_decision.provider)
+            if not provider_status.is_healthy:
+                # Try fallback provider
+                if routing_decision.fallback_provider:
+                    with tracer.span("health", provider=routing_decision.fallback_provider):
+                        fallback_status = await health_checker.check_provider(routing_decision.fallback_provider)
+                    if fallback_status.is_healthy:
+                        routing_decision = routing_decision.use_fallback()
+                        fallback_used = True
+                if not fallback_used:
+                    if parking_lot and not dispatching.get():
+                        # Hold the request until a provider recovers instead of inviting client retries
+                        try:
+                            parked = parking_lot.park(
+                                request, [routing_decision.provider, routing_decision.fallback_provider], tenant
+                            )
+                        except ParkingFull as e:
+                            raise HTTPException(status_code=503, detail=f"No healthy providers available; {e}")
+                        span.set_attribute("parked", parked.ticket)
+                        raise RequestParked(parked)
+                    raise HTTPException(status_code=503, detail="No healthy providers available")
+            
+            # 3. Enhance the prompt for the chosen provider's style
+            with tracer.span("enhance"):
+                enhanced_prompt = await prompt_enhancer.enhance_for(request, routing_decision)
+            
+            # 4. Prepare provider-specific configuration
+            with tracer.span("prepare"):
+                provider_config = orchestrator.prepare_provider_config(
+                    request, routing_decision, enhanced_prompt=enhanced_prompt
+                )
+            
+            # 5. Reject configs the Node API would refuse before spending a round trip
+            if payload_validator:
+                with tracer.span("validate"):
+                    try:
+                        payload_validator.validate(provider_config)
+                    except ConfigValidationError as e:
+                        raise HTTPException(
+                            status_code=422,
+                            detail={"error": "Invalid provider configuration", "details": e.errors}
+                        )
+            
+            async def node_submit() -> Dict[str, Any]:
+                with tracer.span("node_submit", provider=routing_decision.provider, tenant=tenant):
+                    submitted = time.perf_counter()
+                    node_response = await call_node_api(provider_config)
+                    timings["node_ms"] = round((time.perf_counter() - submitted) * 1000, 3)
+                return node_response
+            
+            async def submit() -> OrchestrationResponse:
+                # 6. Call Node API with explicit provider, within the tenant's fair share
+                if fair_queue:
+                    try:
+                        async with fair_queue.slot(tenant) as waited_ms:
+                            timings["queue_ms"] = round(waited_ms, 3)
+                            node_response = await node_submit()
+                    except TenantQueueFull as e:
+                        raise HTTPException(status_code=429, detail=str(e))
+                else:
+                    node_response = await node_submit()
+                
+                # 7. Return orchestration response
+                return OrchestrationResponse(
+                    job_id=node_response["jobId"],
+                    provider=routing_decision.provider,
+                    mode=routing_decision.mode,
+                    routing_reason=routing_decision.reason,
+                    estimated_duration=node_response.get("estimatedTime"),
+                    fallback_used=fallback_used,
+                    node_api_response=node_response
+                )
+            
+            # Identical configs share one generation unless the request opts out
+            if result_cache and request.use_cache:
+                response, hit = await result_cache.get_or_create(canonical_config_hash(provider_config), submit)
+                if hit:
+                    response = response.model_copy(update={"cached": True})
             else:
-                raise HTTPException(status_code=503, detail="No healthy providers available")
-        
-        # 3. Prepare provider-specific configuration
-        provider_config = orchestrator.prepare_provider_config(request, routing_decision)
-        
-        # 4. Call Node API with explicit provider
-        node_response = await call_node_api(provider_config)
-        
-        # 5. Return orchestration response
-        return OrchestrationResponse(
-            job_id=node_response["jobId"],
-            provider=routing_decision.provider,
-            mode=routing_decision.mode,
-            routing_reason=routing_decision.reason,
-            estimated_duration=node_response.get("estimatedDuration"),
-            node_api_response=node_response
+                response, hit = await submit(), False
+            
+            span.set_attribute("provider", routing_decision.provider)
+            span.set_attribute("fallback_used", fallback_used)
+            span.set_attribute("cached", hit)
+            if dedup_detector:
+                dedup_detector.record(response.job_id, request, response)
+            if traffic_recorder:
+                _capture(request, started, timings, routing_decision, fallback_used, hit, response=response)
+            return response
+            
+        except RequestParked as e:
+            if traffic_recorder:
+                _capture(request, started, timings, routing_decision, fallback_used, hit, error=e)
+            logger.info(f"Parked request {request.request_id} as {e.parked.ticket}")
+            raise
+        except Exception as e:
+            span.record_error(e)
+            if traffic_recorder:
+                _capture(request, started, timings, routing_decision, fallback_used, hit, error=e)
+            logger.error(f"Orchestration failed: {str(e)}")
+            if isinstance(e, HTTPException):
+                raise
+            raise HTTPException(status_code=500, detail=f"Orchestration failed: {str(e)}")
+
+
+@app.exception_handler(RequestParked)
+async def parked_response(request: Request, exc: RequestParked):
+    """A parked request is accepted; the ticket says where to poll for its job"""
+    return JSONResponse(status_code=202, content=exc.parked.to_dict())
+
+
+@app.get("/orchestrate/parked/{ticket}")
+async def parked_status(ticket: str):
+    """Status of a parked request, including its orchestration result once dispatched"""
+    parked = parking_lot.get(ticket) if parking_lot else None
+    if parked is None:
+        raise HTTPException(status_code=404, detail="Unknown ticket")
+    return parked.to_dict()
+
+
+@app.get("/video/status/{job_id}")
+async def job_status(job_id: str):
+    """Status of a Node job, fetched from the backend that accepted it"""
+    try:
+        response = await node_pool.job_status(
+            job_id, headers={"X-API-KEY": os.getenv("API_KEY", "testkey")}, timeout=10.0
         )
-        
-    except Exception as e:
-        logger.error(f"Orchestration failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Orchestration failed: {str(e)}")
+    except httpx.TransportError as e:
+        raise HTTPException(status_code=502, detail=f"Node API unreachable: {type(e).__name__}")
+    status = response.json()
+    if result_cache and response.status_code == 200 and status.get("status") == "failed":
+        # Don't hand a failed generation to later identical requests
+        await result_cache.discard_job(job_id)
+    return JSONResponse(status_code=response.status_code, content=status)
 
 
 @app.post("/analyze/request")
@@ -99,20 +333,24 @@ async def analyze_request(request: VideoRequest):
     """
     Analyze a request and return routing recommendations without executing
     """
-    routing_decision = await router.route_provider(request)
+    try:
+        routing_decision, analysis = router.analyze(request)
+    except NoFeasibleProvider as e:
+        raise HTTPException(status_code=422, detail={"error": str(e), "rejections": e.rejections})
     provider_capabilities = await router.get_provider_capabilities()
     
     return {
-        "routing_decision": routing_decision.dict(),
+        "routing_decision": routing_decision.to_schema().dict(),
         "provider_capabilities": provider_capabilities,
-        "analysis": router.get_routing_analysis(request)
+        "analysis": analysis
     }
 
 
 @app.get("/providers/status")
 async def get_provider_status():
     """Get status of all providers"""
-    return await health_checker.check_all_providers()
+    all_status = await health_checker.check_all_providers()
+    return {provider: status.to_schema() for provider, status in all_status.items()}
 
 
 @app.get("/providers/capabilities")
@@ -122,43 +360,208 @@ async def get_provider_capabilities():
 
 
 @app.post("/batch/orchestrate")
-async def batch_orchestrate(requests: List[VideoRequest]):
+async def batch_orchestrate(requests: List[VideoRequest], http_request: Request = None):
     """
     Batch orchestration for multiple video requests
     """
+    traceparent = http_request.headers.get("traceparent") if http_request else None
     results = []
-    for request in requests:
-        try:
-            result = await orchestrate_video(request)
-            results.append({"status": "success", "request_id": request.request_id, "result": result})
-        except Exception as e:
-            results.append({"status": "error", "request_id": request.request_id, "error": str(e)})
+    batch_id = traffic_recorder.next_batch_id() if traffic_recorder else None
+    if fair_queue and http_request:
+        current_tenant.set(fair_queue.tenant_for(http_request.headers))
+    with tracer.span("batch_orchestrate", traceparent=traceparent, batch_size=len(requests)):
+        keys = [str(i) for i in range(len(requests))]
+        if dedup_detector:
+            matches = dedup_detector.scan_batch(requests, keys)
+            report = DedupReport(mode=DEDUP_MODE, threshold=dedup_detector.threshold, requests=len(requests))
+        else:
+            matches = [None] * len(requests)
+            report = None
+        completed = {}
+        
+        for key, request, match in zip(keys, requests, matches):
+            try:
+                original = None
+                if match:
+                    original = match.result if match.from_history else completed.get(match.original)
+                
+                if original is not None and DEDUP_MODE == "share":
+                    if match.same_params:
+                        # Share the original's generation instead of submitting again
+                        report.add(match, request, original.provider, shared=True)
+                        results.append({
+                            "status": "success",
+                            "request_id": request.request_id,
+                            "result": original,
+                            "duplicate_of": _duplicate_info(match, original, requests)
+                        })
+                        continue
+                    request = request.model_copy(update={"reuse_assets_from": original.job_id})
+                
+                token = current_batch.set((batch_id, int(key), len(requests))) if batch_id else None
+                try:
+                    result = await orchestrate_video(request)
+                finally:
+                    if token:
+                        current_batch.reset(token)
+                completed[key] = result
+                entry = {"status": "success", "request_id": request.request_id, "result": result}
+                if match:
+                    report.add(match, request, result.provider,
+                               shared=DEDUP_MODE == "report" and original is not None and match.same_params)
+                    entry["duplicate_of"] = _duplicate_info(match, original, requests)
+                results.append(entry)
+            except RequestParked as e:
+                results.append({"status": "parked", "request_id": request.request_id, "parked": e.parked.to_dict()})
+            except Exception as e:
+                results.append({"status": "error", "request_id": request.request_id, "error": str(e)})
+    
+    response = {"batch_results": results}
+    if report:
+        response["dedup_report"] = {**report.to_dict(), "applied": DEDUP_MODE == "share"}
+    return response
+
+
+def _capture(request: VideoRequest, started: float, timings: Dict[str, float], routing_decision,
+             fallback_used: bool, cached: bool, response: Optional[OrchestrationResponse] = None,
+             error: Optional[Exception] = None) -> None:
+    """Queue one orchestration for the traffic log"""
+    if routing_decision is not None:
+        routing = {"provider": routing_decision.provider, "mode": routing_decision.mode,
+                   "fallback_used": fallback_used, "cached": cached}
+    else:
+        routing = None
+    if response is not None:
+        outcome = {"status": "success", "job_id": response.job_id}
+    elif isinstance(error, RequestParked):
+        outcome = {"status": "parked", "ticket": error.parked.ticket, "http_status": error.status_code}
+    else:
+        outcome = {"status": "error", "error": str(error),
+                   "http_status": getattr(error, "status_code", 500)}
+    elapsed = time.perf_counter() - started
+    traffic_recorder.record({
+        "ts": time.time() - elapsed,
+        "request": request.model_dump(mode="json"),
+        "batch": current_batch.get(),
+        "routing": routing,
+        "timings": {"total_ms": round(elapsed * 1000, 3), **timings},
+        "outcome": outcome
+    })
+
+
+def _duplicate_info(match, original: Optional[OrchestrationResponse], requests: List[VideoRequest]) -> Dict[str, Any]:
+    """Describe which earlier request a near-duplicate matched"""
+    return {
+        "request_id": None if match.from_history else requests[int(match.original)].request_id,
+        "job_id": original.job_id if original is not None else None,
+        "similarity": round(match.similarity, 3),
+        "same_params": match.same_params,
+        "from_history": match.from_history
+    }
+
+
+def _require_admin(http_request: Request) -> None:
+    """Hide diagnostics unless enabled, and require the admin token when one is set"""
+    if not ENABLE_PROFILER:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if ADMIN_TOKEN and http_request.headers.get("X-Admin-Token") != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.get("/admin/profile", response_class=PlainTextResponse)
+async def profile_process(http_request: Request, seconds: float = 10.0, interval_ms: float = 10.0):
+    """
+    Sample the live process for N seconds and return folded stacks for flamegraph tools
+    """
+    _require_admin(http_request)
+    loop = asyncio.get_running_loop()
+    try:
+        folded = await loop.run_in_executor(None, profiler.profile, seconds, interval_ms / 1000)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     
-    return {"batch_results": results}
+    return PlainTextResponse(
+        folded,
+        headers={"Content-Disposition": 'attachment; filename="ai-logic.folded"'}
+    )
+
+
+@app.get("/admin/queues")
+async def queue_stats(http_request: Request):
+    """Per-tenant queue depth, in-flight submissions and queue wait"""
+    _require_admin(http_request)
+    if not fair_queue:
+        return {"enabled": False}
+    return {"enabled": True, **fair_queue.stats()}
+
+
+@app.get("/admin/backends")
+async def backend_stats(http_request: Request):
+    """Load and passive health of each Node API backend"""
+    _require_admin(http_request)
+    return {"backends": node_pool.stats()}
+
+
+@app.get("/admin/state")
+async def state_stats(http_request: Request):
+    """Shared state backend and near-cache counters"""
+    _require_admin(http_request)
+    if not shared_state:
+        return {"enabled": False}
+    return {"enabled": True, **shared_state.info()}
+
+
+@app.get("/admin/tasks")
+async def dump_tasks(http_request: Request):
+    """Dump pending asyncio tasks and the awaits they are suspended in"""
+    _require_admin(http_request)
+    tasks = dump_asyncio_tasks()
+    return {"task_count": len(tasks), "tasks": tasks}
 
 
 async def call_node_api(provider_config: Dict[str, Any]) -> Dict[str, Any]:
     """
     Call the Node.js API with provider-specific configuration
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{NODE_API_URL}/video/generate",
+    headers = {
+        "X-API-KEY": os.getenv("API_KEY", "testkey"),
+        "Content-Type": "application/json",
+        # Same key on every attempt so a retried submit can't start a second job
+        "Idempotency-Key": uuid.uuid4().hex
+    }
+    traceparent = tracer.current_traceparent()
+    if traceparent:
+        headers["traceparent"] = traceparent
+    
+    # Each attempt may go to a different backend; only the one that accepted the job knows it
+    accepted_by = {}
+    
+    async def send() -> httpx.Response:
+        backend, response = await node_pool.request(
+            "POST",
+            "/video/generate",
             json=provider_config,
-            headers={
-                "X-API-KEY": os.getenv("API_KEY", "testkey"),
-                "Content-Type": "application/json"
-            },
+            headers=headers,
             timeout=30.0
         )
-        
-        if response.status_code != 202:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Node API error: {response.text}"
-            )
-        
-        return response.json()
+        accepted_by["backend"] = backend
+        return response
+    
+    try:
+        response = await retry_policy.call(send)
+    except httpx.TransportError as e:
+        raise HTTPException(status_code=502, detail=f"Node API unreachable: {type(e).__name__}")
+    
+    if response.status_code != 202:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Node API error: {response.text}"
+        )
+    
+    node_response = response.json()
+    if node_response.get("jobId"):
+        node_pool.assign(node_response["jobId"], accepted_by["backend"])
+    return node_response
 
 
 if __name__ == "__main__":
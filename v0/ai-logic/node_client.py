@@ -0,0 +1,244 @@
+"""
+Shared HTTP clients for the Node API backends.
+
+NODE_API_URL is one URL or a comma-separated list of them. Each may be a
+normal ``http://host:port`` URL or ``unix:///path/to.sock`` when Node runs on
+the same host and listens on a Unix domain socket (NODE_SOCKET_PATH on the
+Node side). Every backend gets one pooled httpx.AsyncClient, so submits and
+health checks reuse keep-alive connections.
+
+With several backends, NodePool sends each request to the less loaded of two
+randomly chosen backends (power of two choices, by outstanding requests).
+Backends are health-checked passively: after ``eject_failures`` consecutive
+connection errors or 500/502/504 responses, a backend is ejected for
+``eject_base`` seconds, doubling on each repeat up to ``eject_max``. 429 and 503
+are load shedding or provider outages, not a sick backend, and don't count.
+A backend coming back from ejection ramps from 10% to its full share over
+``slow_start`` seconds. Jobs are only known to the Node instance that created
+them, so status lookups go to the backend that accepted the submit.
+
+Configuration (environment):
+    NODE_API_URL           backend URL(s), comma-separated (default http://localhost:3000)
+    NODE_MAX_CONNECTIONS   pooled connections per backend (default 100)
+    NODE_EJECT_FAILURES    consecutive failures before ejection (default 5)
+    NODE_EJECT_BASE_S      first ejection length (default 10)
+    NODE_EJECT_MAX_S       longest ejection (default 300)
+    NODE_SLOW_START_S      ramp-up after ejection (default 30)
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+UNIX_SCHEME = "unix://"
+
+# Requests over a socket still need an HTTP authority for the Host header
+UDS_BASE_URL = "http://localhost"
+
+BACKEND_FAILURE_STATUS = frozenset({500, 502, 504})
+
+
+def parse_node_url(url: str) -> Tuple[str, Optional[str]]:
+    """(base URL, socket path) for a NODE_API_URL; the socket path is None for TCP"""
+    if url.startswith(UNIX_SCHEME):
+        path = url[len(UNIX_SCHEME):]
+        if not path.startswith("/"):
+            raise ValueError(f"Unix socket URL must have an absolute path: {url!r}")
+        return UDS_BASE_URL, path
+    return url.rstrip("/"), None
+
+
+def parse_node_urls(value: str) -> List[str]:
+    urls = [url.strip() for url in value.split(",") if url.strip()]
+    if not urls:
+        raise ValueError("NODE_API_URL names no backends")
+    for url in urls:
+        parse_node_url(url)
+    return urls
+
+
+def create_client(url: str, max_connections: int = 100, **kwargs) -> httpx.AsyncClient:
+    """AsyncClient whose relative URLs resolve against ``url`` over TCP or a Unix socket"""
+    base_url, socket_path = parse_node_url(url)
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    transport = httpx.AsyncHTTPTransport(uds=socket_path, limits=limits) if socket_path else None
+    return httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, **kwargs)
+
+
+class Backend:
+    """One Node API instance and its passive health state"""
+
+    def __init__(self, url: str, max_connections: int):
+        self.url = url
+        self.max_connections = max_connections
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.recovered_at = 0.0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = create_client(self.url, self.max_connections)
+        return self._client
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def share(self, now: float, slow_start: float) -> float:
+        """Fraction of a full share this backend takes while ramping up after ejection"""
+        if slow_start <= 0 or not self.recovered_at:
+            return 1.0
+        return min(1.0, max(0.1, (now - self.recovered_at) / slow_start))
+
+    def to_dict(self, now: float, slow_start: float) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejected": not self.available(now),
+            "ejected_for_s": round(max(0.0, self.ejected_until - now), 1),
+            "ejections": self.ejections,
+            "share": round(self.share(now, slow_start), 2)
+        }
+
+
+class NodePool:
+    """Least-outstanding (power of two choices) balancing over Node backends"""
+
+    def __init__(self, urls: List[str], max_connections: int = 100, eject_failures: int = 5,
+                 eject_base: float = 10.0, eject_max: float = 300.0, slow_start: float = 30.0,
+                 max_jobs: int = 100000, rng: Optional[random.Random] = None):
+        self.backends = [Backend(url, max_connections) for url in urls]
+        self.eject_failures = eject_failures
+        self.eject_base = eject_base
+        self.eject_max = eject_max
+        self.slow_start = slow_start
+        self.max_jobs = max_jobs
+        self.rng = rng or random.Random()
+        self._owners: "OrderedDict[str, Backend]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "NodePool":
+        return cls(
+            parse_node_urls(os.getenv("NODE_API_URL", "http://localhost:3000")),
+            max_connections=int(os.getenv("NODE_MAX_CONNECTIONS", "100")),
+            eject_failures=int(os.getenv("NODE_EJECT_FAILURES", "5")),
+            eject_base=float(os.getenv("NODE_EJECT_BASE_S", "10")),
+            eject_max=float(os.getenv("NODE_EJECT_MAX_S", "300")),
+            slow_start=float(os.getenv("NODE_SLOW_START_S", "30"))
+        )
+
+    def pick(self) -> Backend:
+        """Less loaded of two random available backends; the soonest back if all are ejected"""
+        now = time.monotonic()
+        candidates = [b for b in self.backends if b.available(now)]
+        if not candidates:
+            return min(self.backends, key=lambda b: b.ejected_until)
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = self.rng.sample(candidates, 2)
+        load = lambda b: (b.outstanding + 1) / b.share(now, self.slow_start)  # noqa: E731
+        return first if load(first) <= load(second) else second
+
+    async def request(self, method: str, path: str, backend: Optional[Backend] = None,
+                      **kwargs) -> Tuple[Backend, httpx.Response]:
+        """Send to ``backend`` (or a picked one), tracking load and passive health"""
+        backend = backend or self.pick()
+        backend.outstanding += 1
+        backend.requests += 1
+        try:
+            response = await backend.client.request(method, path, **kwargs)
+        except httpx.TransportError:
+            self._record(backend, ok=False)
+            raise
+        finally:
+            backend.outstanding -= 1
+        self._record(backend, ok=response.status_code not in BACKEND_FAILURE_STATUS)
+        return backend, response
+
+    def assign(self, job_id: str, backend: Backend) -> None:
+        """Remember which backend owns a job so status lookups go there"""
+        self._owners[job_id] = backend
+        self._owners.move_to_end(job_id)
+        while len(self._owners) > self.max_jobs:
+            self._owners.popitem(last=False)
+
+    def owner(self, job_id: str) -> Optional[Backend]:
+        return self._owners.get(job_id)
+
+    async def job_status(self, job_id: str, **kwargs) -> httpx.Response:
+        """GET /video/status/{job_id} from the owning backend, searching all when it is unknown"""
+        path = f"/video/status/{job_id}"
+        owner = self.owner(job_id)
+        if owner is not None or len(self.backends) == 1:
+            _, response = await self.request("GET", path, backend=owner or self.backends[0], **kwargs)
+            return response
+
+        response = None
+        for backend in self.backends:
+            try:
+                _, response = await self.request("GET", path, backend=backend, **kwargs)
+            except httpx.TransportError:
+                continue
+            if response.status_code != 404:
+                self.assign(job_id, backend)
+                return response
+        if response is None:
+            raise httpx.ConnectError(f"No Node backend reachable for job {job_id}")
+        return response
+
+    async def warm(self, timeout: float = 5.0) -> Dict[str, Any]:
+        """GET /health on every backend, leaving a keep-alive connection open to each
+
+        Returns each backend's status code or error. Raises ConnectionError only
+        when no backend answered.
+        """
+        async def probe(backend: Backend) -> Any:
+            try:
+                _, response = await self.request("GET", "/health", backend=backend, timeout=timeout)
+                return response.status_code
+            except httpx.HTTPError as e:
+                return f"{type(e).__name__}: {e}"
+
+        results = await asyncio.gather(*(probe(backend) for backend in self.backends))
+        status = {backend.url: result for backend, result in zip(self.backends, results)}
+        if not any(isinstance(result, int) for result in results):
+            raise ConnectionError(f"No Node backend reachable: {status}")
+        return status
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [backend.to_dict(now, self.slow_start) for backend in self.backends]
+
+    async def close(self) -> None:
+        for backend in self.backends:
+            if backend._client is not None:
+                await backend._client.aclose()
+                backend._client = None
+
+    def _record(self, backend: Backend, ok: bool) -> None:
+        now = time.monotonic()
+        if ok:
+            backend.consecutive_failures = 0
+            if backend.ejections and now >= backend.recovered_at + self.slow_start:
+                # Healthy through a whole slow start; the next ejection starts short again
+                backend.ejections = 0
+            return
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        if backend.consecutive_failures >= self.eject_failures and backend.available(now):
+            backend.ejections += 1
+            backend.ejected_until = now + min(self.eject_max, self.eject_base * 2 ** (backend.ejections - 1))
+            backend.recovered_at = backend.ejected_until
+            backend.consecutive_failures = 0
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Local Node API simulator for load testing ai-logic without the real Node API
+or real providers.
+
+Stands in for /video/generate, /video/providers/health and /video/status/{id}
+with configurable latency distributions, error rates and per-provider outages.
+
+    python node_simulator.py --port 3000 --latency lognormal:40:0.5 \\
+        --provider-latency runway=lognormal:120:0.6 --error-rate 0.01 \\
+        --outage runway:30-90 --outage pika
+
+    python node_simulator.py --uds /tmp/node-api.sock   # NODE_API_URL=unix:///tmp/node-api.sock
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+PROVIDER_NAMES = ("runway", "pika", "gemini_veo", "slideshow")
+
+# Seconds of generation per second of video, mirroring ProviderRouter capabilities
+GENERATION_TIME_PER_SECOND = {
+    "runway": 2.0,
+    "pika": 1.5,
+    "gemini_veo": 1.0,
+    "slideshow": 0.1
+}
+
+ESTIMATED_TIMES = {
+    "runway": "3-8 minutes",
+    "pika": "1-3 minutes",
+    "gemini_veo": "1-3 minutes",
+    "slideshow": "30-60 seconds"
+}
+
+
+@dataclass
+class LatencyModel:
+    """Latency distribution in milliseconds, parsed from ``kind:arg[:arg]``
+
+    Supported kinds:
+        fixed:MS, uniform:LO:HI, normal:MEAN:STD, lognormal:MEDIAN:SIGMA, exp:MEAN
+    """
+    kind: str = "fixed"
+    params: tuple = (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, _, rest = spec.partition(":")
+        arity = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+        if kind not in arity:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        params = tuple(float(p) for p in rest.split(":")) if rest else ()
+        if len(params) != arity[kind]:
+            raise ValueError(f"{kind} latency takes {arity[kind]} parameter(s), got {spec!r}")
+        return cls(kind, params)
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(*self.params)
+        elif self.kind == "normal":
+            value = rng.gauss(*self.params)
+        elif self.kind == "lognormal":
+            value = rng.lognormvariate(math.log(max(self.params[0], 1e-3)), self.params[1])
+        else:
+            value = rng.expovariate(1.0 / self.params[0]) if self.params[0] > 0 else 0.0
+        return max(value, 0.0)
+
+
+@dataclass
+class Outage:
+    """Provider outage window in seconds since simulator start (open-ended if end is None)"""
+    provider: str
+    start: float = 0.0
+    end: Optional[float] = None
+
+    @classmethod
+    def parse(cls, spec: str) -> "Outage":
+        provider, _, window = spec.partition(":")
+        if provider not in PROVIDER_NAMES:
+            raise ValueError(f"Unknown provider in outage spec: {provider}")
+        if not window:
+            return cls(provider)
+        start, _, end = window.partition("-")
+        return cls(provider, float(start or 0), float(end) if end else None)
+
+    def active(self, elapsed: float) -> bool:
+        return elapsed >= self.start and (self.end is None or elapsed < self.end)
+
+
+@dataclass
+class SimulatorConfig:
+    """Behaviour of the simulated Node API"""
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    provider_latency: Dict[str, LatencyModel] = field(default_factory=dict)
+    health_latency: LatencyModel = field(default_factory=lambda: LatencyModel("fixed", (2.0,)))
+    error_rate: float = 0.0
+    error_status: int = 503
+    # Retry-After seconds sent with simulated errors and outages
+    retry_after: Optional[float] = None
+    # Submits processed at once, modelling one Node process; the rest queue (None is unlimited)
+    capacity: Optional[int] = None
+    outages: List[Outage] = field(default_factory=list)
+    # Multiplier applied to simulated job generation time so jobs finish quickly
+    job_time_scale: float = 0.01
+    seed: Optional[int] = None
+
+
+class NodeSimulator:
+    """In-memory job store and fault model behind the simulated endpoints"""
+
+    def __init__(self, config: SimulatorConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.started_at = time.monotonic()
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.idempotent: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"generate": 0, "errors": 0, "outage_rejections": 0, "replayed": 0, "health": 0, "status": 0}
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def provider_down(self, provider: str) -> bool:
+        elapsed = self.elapsed()
+        return any(o.provider == provider and o.active(elapsed) for o in self.config.outages)
+
+    async def delay(self, model: LatencyModel) -> None:
+        delay_ms = model.sample_ms(self.rng)
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000)
+
+    def create_job(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        provider = config.get("provider")
+        job_id = f"job_{int(time.time() * 1000)}_{uuid.uuid4().hex[:9]}"
+        duration = config.get("duration") or 30
+        generation_seconds = GENERATION_TIME_PER_SECOND.get(provider, 1.0) * duration * self.config.job_time_scale
+        self.jobs[job_id] = {
+            "id": job_id,
+            "config": config,
+            "routing": {
+                "provider": provider,
+                "mode": config.get("mode"),
+                "reason": config.get("routing_reason")
+            },
+            "created": time.monotonic(),
+            "createdAt": datetime.now(timezone.utc).isoformat(),
+            "generation_seconds": generation_seconds,
+            "estimatedTime": ESTIMATED_TIMES.get(provider, "2-5 minutes")
+        }
+        return {
+            "jobId": job_id,
+            "status": "processing",
+            "message": "Video generation started",
+            "estimatedTime": ESTIMATED_TIMES.get(provider, "2-5 minutes"),
+            "pollUrl": f"/video/status/{job_id}",
+            "provider": provider,
+            "mode": config.get("mode"),
+            "reason": config.get("routing_reason")
+        }
+
+    def job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        age = time.monotonic() - job["created"]
+        total = job["generation_seconds"]
+        progress = 100 if total <= 0 else min(100, int(age / total * 100))
+        status = "completed" if progress >= 100 else "processing"
+        result = {
+            "id": job_id,
+            "status": status,
+            "progress": progress,
+            "routing": job["routing"],
+            "createdAt": job["createdAt"],
+            "estimatedTime": job["estimatedTime"]
+        }
+        if status == "completed":
+            result["result"] = {"videoUrl": f"https://sim.local/videos/{job_id}.mp4"}
+        return result
+
+
+def create_app(config: SimulatorConfig) -> FastAPI:
+    """Build the simulated Node API application"""
+    sim = NodeSimulator(config)
+    app = FastAPI(title="Potter Labs Node API Simulator")
+    app.state.simulator = sim
+
+    slots = asyncio.Semaphore(config.capacity) if config.capacity else None
+
+    @app.post("/video/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        provider = body.get("provider")
+        sim.stats["generate"] += 1
+        if slots:
+            async with slots:
+                await sim.delay(config.provider_latency.get(provider, config.latency))
+        else:
+            await sim.delay(config.provider_latency.get(provider, config.latency))
+
+        key = request.headers.get("idempotency-key")
+        if key and key in sim.idempotent:
+            sim.stats["replayed"] += 1
+            return JSONResponse(status_code=202, content=sim.idempotent[key])
+        retry_headers = {"Retry-After": f"{config.retry_after:g}"} if config.retry_after is not None else None
+
+        if not provider:
+            return JSONResponse(status_code=400, content={
+                "error": "Provider must be explicitly specified",
+                "details": ["provider field is required"]
+            })
+        if sim.provider_down(provider):
+            sim.stats["outage_rejections"] += 1
+            return JSONResponse(status_code=503, content={"error": f"Provider {provider} unavailable"},
+                                headers=retry_headers)
+        if config.error_rate and sim.rng.random() < config.error_rate:
+            sim.stats["errors"] += 1
+            return JSONResponse(status_code=config.error_status, content={"error": "Simulated failure"},
+                                headers=retry_headers)
+
+        job = sim.create_job(body)
+        if key:
+            sim.idempotent[key] = job
+        return JSONResponse(status_code=202, content=job)
+
+    @app.get("/video/providers/health")
+    async def providers_health():
+        sim.stats["health"] += 1
+        await sim.delay(config.health_latency)
+        providers = {}
+        for provider in PROVIDER_NAMES:
+            down = sim.provider_down(provider)
+            providers[provider] = {
+                "healthy": not down,
+                "reason": "Simulated outage" if down else "Simulated provider"
+            }
+        return {"providers": providers}
+
+    @app.get("/video/status/{job_id}")
+    async def job_status(job_id: str):
+        sim.stats["status"] += 1
+        status = sim.job_status(job_id)
+        if status is None:
+            return JSONResponse(status_code=404, content={"error": "Job not found", "jobId": job_id})
+        return status
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", "service": "node-simulator", "stats": sim.stats}
+
+    return app
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local Node API simulator for ai-logic load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--uds", help="Listen on this Unix domain socket instead of TCP")
+    parser.add_argument("--latency", default="fixed:0",
+                        help="Default /video/generate latency, e.g. lognormal:40:0.5")
+    parser.add_argument("--provider-latency", action="append", default=[], metavar="PROVIDER=SPEC",
+                        help="Per-provider /video/generate latency (repeatable)")
+    parser.add_argument("--health-latency", default="fixed:2")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of submits that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=float, help="Retry-After seconds sent with simulated errors")
+    parser.add_argument("--outage", action="append", default=[], metavar="PROVIDER[:START-END]",
+                        help="Provider outage window in seconds since start (repeatable)")
+    parser.add_argument("--capacity", type=int, help="Submits processed concurrently; the rest queue")
+    parser.add_argument("--job-time-scale", type=float, default=0.01,
+                        help="Multiplier on simulated generation time")
+    parser.add_argument("--seed", type=int)
+    return parser.parse_args(argv)
+
+
+def config_from_args(args: argparse.Namespace) -> SimulatorConfig:
+    provider_latency = {}
+    for item in args.provider_latency:
+        provider, _, spec = item.partition("=")
+        provider_latency[provider] = LatencyModel.parse(spec)
+    return SimulatorConfig(
+        latency=LatencyModel.parse(args.latency),
+        provider_latency=provider_latency,
+        health_latency=LatencyModel.parse(args.health_latency),
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        outages=[Outage.parse(o) for o in args.outage],
+        job_time_scale=args.job_time_scale,
+        capacity=args.capacity,
+        seed=args.seed
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = parse_args()
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, uds=args.uds,
+                log_level="warning")
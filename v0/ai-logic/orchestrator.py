@@ -3,8 +3,11 @@ Video orchestration logic - prepares provider-specific configurations
 """
 
 import logging
-from typing import Dict, Any
-from schemas import VideoRequest, RoutingDecision, VideoProvider
+from typing import Dict, Any, Optional
+from schemas import VideoRequest
+from records import RouteRecord
+from provider_registry import REGISTRY, ProviderSpec
+from capability_index import normalize_aspect_ratio
 
 logger = logging.getLogger(__name__)
 
@@ -18,70 +21,36 @@ class VideoOrchestrator:
     def _load_provider_templates(self) -> Dict[str, Dict[str, Any]]:
         """Load provider-specific configuration templates"""
         return {
-            "runway": {
-                "provider": "runway",
-                "mode": "ai_generated",
-                "default_params": {
-                    "resolution": "1920x1080",
-                    "fps": 24,
-                    "quality": "high",
-                    "style_strength": 0.8
-                }
-            },
-            "pika": {
-                "provider": "pika", 
-                "mode": "ai_generated",
-                "default_params": {
-                    "resolution": "1280x720",
-                    "fps": 24,
-                    "quality": "creative",
-                    "style_strength": 0.9
-                }
-            },
-            "gemini_veo": {
-                "provider": "gemini_veo",
-                "mode": "ai_generated", 
-                "default_params": {
-                    "resolution": "1280x720",
-                    "fps": 24,
-                    "quality": "creative",
-                    "style_strength": 0.7
-                }
-            },
-            "slideshow": {
-                "provider": "slideshow",
-                "mode": "slideshow",
-                "default_params": {
-                    "resolution": "1920x1080",
-                    "transition_duration": 0.5,
-                    "image_display_time": 3.0,
-                    "include_captions": True
-                }
-            }
+            spec.name: {"provider": spec.node_provider, "mode": spec.mode, "default_params": spec.defaults}
+            for spec in REGISTRY.specs.values()
         }
     
-    def prepare_provider_config(self, request: VideoRequest, routing: RoutingDecision) -> Dict[str, Any]:
+    def prepare_provider_config(self, request: VideoRequest, routing: RouteRecord,
+                                enhanced_prompt: Optional[str] = None) -> Dict[str, Any]:
         """
         Prepare provider-specific configuration for the Node API
         This is where we transform the high-level request into provider-specific parameters
+        
+        ``enhanced_prompt`` is the output of the prompt enhancement stage; when it is
+        not supplied the style note is appended to the prompt inline.
         """
-        provider = routing.provider.value
+        provider = routing.provider
         template = self.provider_config_templates.get(provider, {})
         
         # Start with base request data
         config = {
             "topic": request.topic,
             "prompt": request.prompt,
-            "style": request.style.value,
+            "style": request.style,
             "theme": request.theme,
             "duration": request.duration,
             "aspect_ratio": request.aspect_ratio,
             "voice_style": request.voice_style,
             "background_music": request.background_music,
             
-            # Provider routing information (explicit)
-            "provider": provider,
-            "mode": routing.mode.value,
+            # Provider routing information (explicit); variants submit as their base provider
+            "provider": template.get("provider", provider),
+            "mode": routing.mode,
             "routing_reason": routing.reason,
             
             # Request metadata
@@ -89,6 +58,13 @@ class VideoOrchestrator:
             "priority": request.priority
         }
         
+        spec = REGISTRY.specs.get(provider)
+        if spec and spec.model:
+            config["model"] = spec.model
+        
+        if request.reuse_assets_from:
+            config["reuse_assets_from"] = request.reuse_assets_from
+        
         # Apply provider-specific defaults
         if template:
             config.update(template.get("default_params", {}))
@@ -98,7 +74,9 @@ class VideoOrchestrator:
             config["adaptations"] = routing.adaptations
             
             # Apply specific adaptations
-            if "prompt_enhancement" in routing.adaptations:
+            if enhanced_prompt is not None:
+                config["prompt"] = enhanced_prompt
+            elif "prompt_enhancement" in routing.adaptations:
                 original_prompt = config.get("prompt", "")
                 enhanced_prompt = f"{original_prompt}. Style note: {routing.adaptations['prompt_enhancement']}"
                 config["prompt"] = enhanced_prompt
@@ -109,105 +87,40 @@ class VideoOrchestrator:
         # Provider-specific optimizations
         config = self._apply_provider_optimizations(config, provider, request, routing)
         
-        logger.info(f"Prepared config for {provider}: {config}")
+        logger.info("Prepared config for %s: %s", provider, config)
         return config
     
     def _apply_provider_optimizations(self, config: Dict[str, Any], provider: str, 
-                                    request: VideoRequest, routing: RoutingDecision) -> Dict[str, Any]:
-        """Apply provider-specific optimizations"""
-        
-        if provider == "runway":
-            config = self._optimize_for_runway(config, request)
-        elif provider == "pika":
-            config = self._optimize_for_pika(config, request)
-        elif provider == "gemini_veo":
-            config = self._optimize_for_gemini_veo(config, request)
-        elif provider == "slideshow":
-            config = self._optimize_for_slideshow(config, request)
-        
-        return config
-    
-    def _optimize_for_runway(self, config: Dict[str, Any], request: VideoRequest) -> Dict[str, Any]:
-        """Runway-specific optimizations"""
-        
-        # Optimize for cinematic content
-        if request.style.value in ["cinematic", "photorealistic", "documentary"]:
-            config["quality"] = "high"
-            config["style_strength"] = 0.9
-            config["enable_camera_movements"] = True
+                                    request: VideoRequest, routing: RouteRecord) -> Dict[str, Any]:
+        """Apply the provider's registry optimization rules, then match resolution to aspect ratio"""
+        spec = REGISTRY.specs.get(provider)
+        if spec is None:
+            return config
         
-        # Duration-based optimizations
-        if request.duration and request.duration > 60:
-            config["segment_generation"] = True
-            config["max_segment_length"] = 30
+        for rule in spec.optimizations:
+            rule.apply(config, request)
         
         # Resolution optimization based on aspect ratio
-        if request.aspect_ratio == "9:16":
-            config["resolution"] = "1080x1920"
-        elif request.aspect_ratio == "1:1":
-            config["resolution"] = "1080x1080"
-        
-        return config
-    
-    def _optimize_for_pika(self, config: Dict[str, Any], request: VideoRequest) -> Dict[str, Any]:
-        """Pika-specific optimizations"""
-        
-        # Optimize for creative/artistic content
-        if request.style.value in ["animation", "artistic", "abstract"]:
-            config["creativity_boost"] = True
-            config["style_strength"] = 1.0
-        
-        # Faster generation for shorter content
-        if request.duration and request.duration <= 30:
-            config["generation_mode"] = "fast"
-            config["quality"] = "balanced"
-        
-        return config
-    
-    def _optimize_for_gemini_veo(self, config: Dict[str, Any], request: VideoRequest) -> Dict[str, Any]:
-        """Gemini Veo-specific optimizations"""
-        
-        # Optimize for animation and creative content
-        if request.style.value in ["animation", "artistic"]:
-            config["animation_strength"] = 0.9
-            config["creative_freedom"] = 0.8
-        
-        # Cost optimization
-        config["cost_optimization"] = True
+        resolution = self._resolution_for(spec, config.get("resolution"), request.aspect_ratio)
+        if resolution:
+            config["resolution"] = resolution
         
         return config
     
-    def _optimize_for_slideshow(self, config: Dict[str, Any], request: VideoRequest) -> Dict[str, Any]:
-        """Slideshow-specific optimizations"""
-        
-        # Educational content optimizations
-        if request.content_type == "educational":
-            config["image_display_time"] = 4.0  # Longer display for reading
-            config["include_captions"] = True
-            config["caption_position"] = "bottom"
-            config["transition_style"] = "fade"
-        
-        # Corporate content optimizations
-        elif request.content_type == "corporate":
-            config["transition_style"] = "professional"
-            config["image_style"] = "clean"
-            config["include_logo_space"] = True
-        
-        # Duration-based image count calculation
-        if request.duration:
-            display_time = config.get("image_display_time", 3.0)
-            transition_time = config.get("transition_duration", 0.5)
-            images_needed = max(3, int(request.duration / (display_time + transition_time)))
-            config["target_image_count"] = images_needed
-        
-        # Voice synchronization
-        if request.voice_style:
-            config["sync_to_voice"] = True
-            config["voice_pause_detection"] = True
-        
-        return config
+    def _resolution_for(self, spec: ProviderSpec, current: Optional[str],
+                        aspect_ratio: Optional[str]) -> Optional[str]:
+        """The provider's first resolution in the requested aspect ratio, keeping ``current`` if it fits"""
+        ratio = normalize_aspect_ratio(aspect_ratio) if aspect_ratio else None
+        if not ratio:
+            return None
+        if current and normalize_aspect_ratio(current) == ratio:
+            return current
+        return next(
+            (r for r in spec.capabilities.get("resolutions", []) if normalize_aspect_ratio(r) == ratio),
+            None
+        )
     
-    def prepare_batch_config(self, requests: list[VideoRequest], routing_decisions: list[RoutingDecision]) -> list[Dict[str, Any]]:
+    def prepare_batch_config(self, requests: list[VideoRequest], routing_decisions: list[RouteRecord]) -> list[Dict[str, Any]]:
         """Prepare configurations for batch processing"""
         configs = []
         
@@ -234,8 +147,9 @@ class VideoOrchestrator:
         
         # Apply provider-specific batch optimizations
         for provider, group in provider_groups.items():
-            if provider == "slideshow":
-                # Slideshow can process multiple videos efficiently
+            spec = REGISTRY.specs.get(provider)
+            if spec and spec.batch_parallel:
+                # Providers like slideshow can process multiple videos efficiently
                 for i, config in group:
                     config["batch_priority"] = "high"
             elif len(group) > 1:
@@ -0,0 +1,382 @@
+"""
+Parking for requests that arrive while no suitable provider is healthy.
+
+Instead of a 503 that clients answer with retries, orchestrate_video can
+park the request and return a ticket. A single dispatcher waits on the
+shared provider RecoveryWatchers. When a parked request's primary or
+fallback provider recovers, the dispatcher re-runs the orchestration for
+it, highest priority first.
+
+Dispatch is paced so a provider that has just come back isn't stampeded by
+the backlog. It starts at ``start_rate`` per second and doubles every
+second up to ``max_rate``. If a dispatched request finds no healthy
+provider again, it goes back in the queue and dispatch pauses until the
+next recovery.
+
+With a journal path, parks and completions are appended to a JSONL file,
+and requests still parked are restored on restart. The journal is written
+from a background thread, which batches whatever has queued up into one
+write and one fsync, so parking never blocks the event loop on the disk.
+Once the completions written since the last compaction outnumber the
+requests still parked by ``compact_ratio`` (and at least ``compact_min``),
+the writer rewrites the file down to the parked requests.
+
+Configuration (environment):
+    PARK_REQUESTS             on to park instead of returning 503 (default off)
+    PARK_MAX                  parked requests held at once (default 1000)
+    PARK_MAX_AGE_S            parked requests expire after this long (default 3600)
+    PARK_JOURNAL              JSONL journal making parked requests survive restarts
+    PARK_DISPATCH_RATE        dispatches per second once ramped up (default 5)
+    PARK_DISPATCH_START_RATE  dispatches per second right after recovery (default 0.5)
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from fastapi import HTTPException
+
+from schemas import VideoRequest
+from fair_queue import DEFAULT_TENANT, current_tenant
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_RANK = {"high": 0, "standard": 1, "low": 2}
+
+# Set while the dispatcher re-runs a parked request, so it isn't parked again
+dispatching: contextvars.ContextVar[bool] = contextvars.ContextVar("dispatching", default=False)
+
+
+class ParkingFull(Exception):
+    """The parking lot already holds max_size requests"""
+
+
+@dataclass
+class ParkedRequest:
+    """A request waiting for one of its providers to recover"""
+    ticket: str
+    request: VideoRequest
+    providers: List[str]
+    tenant: str = DEFAULT_TENANT
+    parked_at: float = field(default_factory=time.time)
+    status: str = "parked"
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+    @property
+    def rank(self) -> int:
+        return PRIORITY_RANK.get(self.request.priority, PRIORITY_RANK["standard"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ticket": self.ticket,
+            "status": self.status,
+            "request_id": self.request.request_id,
+            "providers": self.providers,
+            "parked_at": self.parked_at,
+            "attempts": self.attempts,
+            "poll_url": f"/orchestrate/parked/{self.ticket}",
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class RequestParked(Exception):
+    """Raised out of orchestrate_video when a request was parked instead of submitted"""
+    status_code = 202
+
+    def __init__(self, parked: ParkedRequest):
+        self.parked = parked
+        super().__init__(f"Parked as {parked.ticket}")
+
+
+_STOP = object()
+
+
+class ParkingJournal:
+    """JSONL journal of parks and completions, appended and compacted by a writer thread"""
+
+    def __init__(self, path: str, compact_ratio: float = 4.0, compact_min: int = 1000):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.compact_min = compact_min
+        self.compactions = 0
+        self._live: Dict[str, Dict[str, Any]] = {}
+        self._done = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Park records that have no completion yet"""
+        live: Dict[str, Dict[str, Any]] = {}
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn final line
+                if record.get("op") == "park":
+                    live[record["ticket"]] = record
+                elif record.get("op") == "done":
+                    live.pop(record.get("ticket"), None)
+        return list(live.values())
+
+    def start(self, records: List[Dict[str, Any]]) -> None:
+        """Compact the file down to ``records`` and start the writer"""
+        self._live = {record["ticket"]: record for record in records}
+        self._compact()
+        self._thread = threading.Thread(target=self._run, name="ParkingJournal", daemon=True)
+        self._thread.start()
+
+    def append(self, record: Dict[str, Any]) -> None:
+        self._queue.put(record)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write out queued records and stop the writer"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not _STOP]
+            try:
+                self._write(records)
+            except OSError as e:
+                logger.warning(f"Failed to write parking journal {self.path}: {e}")
+            if len(records) < len(batch):
+                return
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        with open(self.path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for record in records:
+            if record["op"] == "park":
+                self._live[record["ticket"]] = record
+            elif self._live.pop(record["ticket"], None) is not None:
+                self._done += 1
+        if self._done >= max(self.compact_min, self.compact_ratio * len(self._live)):
+            self._compact()
+
+    def _compact(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            for record in self._live.values():
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._done = 0
+        self.compactions += 1
+
+
+class ParkingLot:
+    """Bounded priority queue of parked requests plus the paced dispatcher that drains it"""
+
+    def __init__(self, health_checker, dispatch: Callable[[VideoRequest], Awaitable[Any]],
+                 max_size: int = 1000, max_age: float = 3600.0, journal: Optional[str] = None,
+                 max_rate: float = 5.0, start_rate: float = 0.5, max_results: int = 10000):
+        self.health_checker = health_checker
+        self.dispatch = dispatch
+        self.max_size = max_size
+        self.max_age = max_age
+        self.journal = ParkingJournal(journal) if journal else None
+        self.max_rate = max_rate
+        self.start_rate = min(start_rate, max_rate)
+        self.max_results = max_results
+        self.stats = {"parked": 0, "dispatched": 0, "reparked": 0, "failed": 0, "expired": 0, "rejected": 0}
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._parked: Dict[str, ParkedRequest] = {}
+        self._finished: "OrderedDict[str, ParkedRequest]" = OrderedDict()
+        self._changed = asyncio.Event()
+        self._watching: Set[str] = set()
+        self._stalled = False
+        self._task: Optional[asyncio.Task] = None
+        if journal:
+            self._restore()
+
+    @classmethod
+    def from_env(cls, health_checker, dispatch) -> Optional["ParkingLot"]:
+        if os.getenv("PARK_REQUESTS", "").lower() not in ("1", "on", "true", "yes"):
+            return None
+        return cls(
+            health_checker,
+            dispatch,
+            max_size=int(os.getenv("PARK_MAX", "1000")),
+            max_age=float(os.getenv("PARK_MAX_AGE_S", "3600")),
+            journal=os.getenv("PARK_JOURNAL") or None,
+            max_rate=float(os.getenv("PARK_DISPATCH_RATE", "5")),
+            start_rate=float(os.getenv("PARK_DISPATCH_START_RATE", "0.5"))
+        )
+
+    @property
+    def pending(self) -> int:
+        return len(self._parked)
+
+    def park(self, request: VideoRequest, providers: List[str], tenant: str = DEFAULT_TENANT) -> ParkedRequest:
+        if len(self._parked) >= self.max_size:
+            self.stats["rejected"] += 1
+            raise ParkingFull(f"{len(self._parked)} requests already parked")
+        parked = ParkedRequest(uuid.uuid4().hex, request, [p for p in providers if p], tenant)
+        self._push(parked)
+        self._log({"op": "park", "ticket": parked.ticket, "request": request.model_dump(mode="json"),
+                   "providers": parked.providers, "tenant": tenant, "parked_at": parked.parked_at})
+        self.stats["parked"] += 1
+        self.start()
+        if not self._watching.issuperset(parked.providers):
+            self._changed.set()
+        return parked
+
+    def get(self, ticket: str) -> Optional[ParkedRequest]:
+        return self._parked.get(ticket) or self._finished.get(ticket)
+
+    def start(self) -> None:
+        """Start the dispatcher if anything is parked and it isn't running"""
+        if self._parked and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self.journal:
+            await asyncio.to_thread(self.journal.close)
+
+    def _push(self, parked: ParkedRequest) -> None:
+        self._parked[parked.ticket] = parked
+        heapq.heappush(self._heap, (parked.rank, parked.parked_at, next(self._sequence), parked))
+
+    async def _run(self) -> None:
+        while self._parked:
+            self._expire()
+            providers = sorted({p for parked in self._parked.values() for p in parked.providers})
+            if not providers:
+                break
+            self._changed.clear()
+            self._watching = set(providers)
+            waits = {
+                asyncio.create_task(self.health_checker.wait_for_provider_recovery(p, self.max_age)): p
+                for p in providers
+            }
+            changed = asyncio.create_task(self._changed.wait())
+            try:
+                done, _ = await asyncio.wait([*waits, changed], return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in [*waits, changed]:
+                    task.cancel()
+            recovered = {waits[task] for task in done if task is not changed and task.result()}
+            self._watching = set()
+            if recovered:
+                logger.info(f"Dispatching parked requests for recovered providers: {sorted(recovered)}")
+                await self._drain(recovered)
+
+    async def _drain(self, recovered: Set[str]) -> None:
+        """Dispatch parked requests for ``recovered`` providers in priority order, ramping up the rate"""
+        self._stalled = False
+        rate = self.start_rate
+        ramped_at = time.monotonic()
+        skipped = []
+        tasks = []
+        while self._heap and not self._stalled:
+            entry = heapq.heappop(self._heap)
+            parked = entry[-1]
+            if parked.ticket not in self._parked:
+                continue
+            if not recovered.intersection(parked.providers):
+                skipped.append(entry)
+                continue
+            del self._parked[parked.ticket]
+            tasks.append(asyncio.create_task(self._dispatch_one(parked)))
+
+            now = time.monotonic()
+            if now - ramped_at >= 1.0:
+                rate = min(self.max_rate, rate * 2)
+                ramped_at = now
+            await asyncio.sleep(1.0 / rate)
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        await asyncio.gather(*tasks)
+
+    async def _dispatch_one(self, parked: ParkedRequest) -> None:
+        parked.attempts += 1
+        dispatching.set(True)
+        current_tenant.set(parked.tenant)
+        try:
+            response = await self.dispatch(parked.request)
+        except HTTPException as e:
+            if e.status_code == 503:
+                # Still nothing healthy for this request; wait for the next recovery
+                self._stalled = True
+                self.stats["reparked"] += 1
+                self._push(parked)
+                return
+            self._finish(parked, "failed", error=str(e.detail))
+            return
+        except Exception as e:
+            self._finish(parked, "failed", error=str(e))
+            return
+        self._finish(parked, "dispatched", result=response.model_dump(mode="json"))
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.max_age
+        for parked in [p for p in self._parked.values() if p.parked_at < cutoff]:
+            del self._parked[parked.ticket]
+            self._finish(parked, "expired", error=f"No provider recovered within {self.max_age:g}s")
+        self._heap = [entry for entry in self._heap if entry[-1].ticket in self._parked]
+        heapq.heapify(self._heap)
+
+    def _finish(self, parked: ParkedRequest, status: str, result: Optional[Dict[str, Any]] = None,
+                error: Optional[str] = None) -> None:
+        parked.status, parked.result, parked.error = status, result, error
+        self.stats[status] += 1
+        self._finished[parked.ticket] = parked
+        while len(self._finished) > self.max_results:
+            self._finished.popitem(last=False)
+        self._log({"op": "done", "ticket": parked.ticket, "status": status})
+
+    def _log(self, record: Dict[str, Any]) -> None:
+        if self.journal:
+            self.journal.append(record)
+
+    def _restore(self) -> None:
+        """Reload requests still parked and compact the journal down to them"""
+        records = []
+        for record in self.journal.load():
+            try:
+                request = VideoRequest(**record["request"])
+            except Exception as e:
+                logger.warning(f"Dropping unreadable parked request {record['ticket']}: {e}")
+                continue
+            self._push(ParkedRequest(record["ticket"], request, record["providers"],
+                                     record.get("tenant", DEFAULT_TENANT), record["parked_at"]))
+            records.append(record)
+        self.journal.start(records)
+        if self._parked:
+            logger.info(f"Restored {len(self._parked)} parked requests from {self.journal.path}")
@@ -0,0 +1,251 @@
+"""
+Provider config validation against the shared OpenAPI spec.
+
+The VideoGenerationRequest schema in shared/openapi-ai-video-spec.json is
+compiled once at startup into nested closures - one per schema node, with
+types, enums and property tables resolved up front - so checking a config
+is a handful of dict lookups and isinstance calls rather than a walk over
+the schema document. Configs are checked after prepare_provider_config, so
+a malformed one fails in microseconds with a precise error instead of after
+a round trip to Node.
+
+ai-logic's config differs from the public request schema in a few places
+(duration is an integer number of seconds, and Node requires the provider
+fields), so CONFIG_SCHEMA_OVERRIDES is layered over the spec; everything
+else comes from the spec. Null values are treated as absent, matching how
+Node reads them.
+
+Configuration (environment):
+    PAYLOAD_SPEC_PATH     spec to compile (default shared/openapi-ai-video-spec.json)
+    PAYLOAD_VALIDATION    on (default) or off
+"""
+
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from schemas import VideoMode, VideoStyle
+from provider_registry import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# shared/ sits beside the service in the container and one level up in the repo
+_SPEC_CANDIDATES = [
+    Path(__file__).resolve().parent / "shared" / "openapi-ai-video-spec.json",
+    Path(__file__).resolve().parent.parent / "shared" / "openapi-ai-video-spec.json"
+]
+DEFAULT_SPEC_PATH = next((p for p in _SPEC_CANDIDATES if p.exists()), _SPEC_CANDIDATES[-1])
+REQUEST_SCHEMA = "VideoGenerationRequest"
+
+# Where the Node contract ai-logic submits to differs from the public request schema
+CONFIG_SCHEMA_OVERRIDES = {
+    "properties": {
+        "duration": {"type": "integer", "minimum": 1, "maximum": 3600},
+        "provider": {"type": "string", "enum": list(REGISTRY.node_providers)},
+        "mode": {"type": "string", "enum": [m.value for m in VideoMode]},
+        "style": {"type": "string", "enum": [s.value for s in VideoStyle]}
+    },
+    "required": ["provider", "mode", "style"],
+    "anyOf": [{"required": ["topic"]}, {"required": ["prompt"]}]
+}
+
+_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "object": (dict,),
+    "array": (list,)
+}
+_URI = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*://\S+$")
+
+Check = Callable[[Any, str, List[str]], None]
+
+
+class ConfigValidationError(ValueError):
+    """A provider config does not match the Node API contract"""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+
+def load_spec(path: str) -> Dict[str, Any]:
+    """Parse the spec; the shared .json file may actually hold YAML"""
+    with open(path, "r") as f:
+        text = f.read()
+    try:
+        return json.loads(text)
+    except ValueError:
+        import yaml
+
+        return yaml.safe_load(text)
+
+
+def _resolve(schema: Dict[str, Any], spec: Dict[str, Any]) -> Dict[str, Any]:
+    seen = set()
+    while "$ref" in schema:
+        ref = schema["$ref"]
+        if ref in seen or not ref.startswith("#/"):
+            raise ValueError(f"Unresolvable $ref {ref}")
+        seen.add(ref)
+        node: Any = spec
+        for part in ref[2:].split("/"):
+            node = node[part]
+        schema = node
+    return schema
+
+
+def compile_schema(schema: Dict[str, Any], spec: Dict[str, Any]) -> Check:
+    """Compile one schema node into a ``check(value, path, errors)`` closure"""
+    schema = _resolve(schema, spec)
+    checks: List[Check] = []
+
+    schema_type = schema.get("type")
+    if schema_type in _TYPES:
+        expected = _TYPES[schema_type]
+        reject_bool = schema_type in ("integer", "number")
+
+        def check_type(value, path, errors):
+            if not isinstance(value, expected) or (reject_bool and isinstance(value, bool)):
+                errors.append(f"{path}: expected {schema_type}, got {type(value).__name__}")
+                return False
+            return True
+    else:
+        def check_type(value, path, errors):
+            return True
+
+    if "enum" in schema:
+        allowed = frozenset(schema["enum"])
+        shown = ", ".join(map(str, schema["enum"]))
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(f"{path}: {value!r} is not one of [{shown}]")
+        checks.append(check_enum)
+
+    if schema.get("format") == "uri":
+        def check_uri(value, path, errors):
+            if isinstance(value, str) and not _URI.match(value):
+                errors.append(f"{path}: {value!r} is not a valid URI")
+        checks.append(check_uri)
+
+    minimum, maximum = schema.get("minimum"), schema.get("maximum")
+    if minimum is not None or maximum is not None:
+        def check_range(value, path, errors):
+            if minimum is not None and value < minimum:
+                errors.append(f"{path}: {value} is below the minimum {minimum}")
+            elif maximum is not None and value > maximum:
+                errors.append(f"{path}: {value} is above the maximum {maximum}")
+        checks.append(check_range)
+
+    min_length, max_length = schema.get("minLength"), schema.get("maxLength")
+    if min_length is not None or max_length is not None:
+        def check_length(value, path, errors):
+            if min_length is not None and len(value) < min_length:
+                errors.append(f"{path}: shorter than {min_length} characters")
+            elif max_length is not None and len(value) > max_length:
+                errors.append(f"{path}: longer than {max_length} characters")
+        checks.append(check_length)
+
+    if "pattern" in schema:
+        pattern = re.compile(schema["pattern"])
+
+        def check_pattern(value, path, errors):
+            if not pattern.search(value):
+                errors.append(f"{path}: {value!r} does not match {pattern.pattern}")
+        checks.append(check_pattern)
+
+    if "properties" in schema or "required" in schema:
+        properties = {
+            name: compile_schema(sub, spec) for name, sub in (schema.get("properties") or {}).items()
+        }
+        required = tuple(schema.get("required") or ())
+
+        def check_object(value, path, errors):
+            for name in required:
+                if value.get(name) is None:
+                    errors.append(f"{path}.{name}: required")
+            for name, item in value.items():
+                if item is not None:
+                    check = properties.get(name)
+                    if check is not None:
+                        check(item, f"{path}.{name}", errors)
+        checks.append(check_object)
+
+    if "items" in schema:
+        item_check = compile_schema(schema["items"], spec)
+
+        def check_items(value, path, errors):
+            for i, item in enumerate(value):
+                item_check(item, f"{path}[{i}]", errors)
+        checks.append(check_items)
+
+    if "anyOf" in schema:
+        options = [compile_schema(sub, spec) for sub in schema["anyOf"]]
+        summary = " or ".join(
+            "/".join(sub.get("required", [])) or "alternative" for sub in schema["anyOf"]
+        )
+
+        def check_any_of(value, path, errors):
+            for option in options:
+                option_errors: List[str] = []
+                option(value, path, option_errors)
+                if not option_errors:
+                    return
+            errors.append(f"{path}: requires {summary}")
+        checks.append(check_any_of)
+
+    def check(value, path, errors):
+        if check_type(value, path, errors):
+            for sub_check in checks:
+                sub_check(value, path, errors)
+
+    return check
+
+
+def merge_schema(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Overlay ``overrides`` on a resolved object schema"""
+    merged = dict(base)
+    merged["properties"] = {**(base.get("properties") or {}), **overrides.get("properties", {})}
+    merged["required"] = sorted(set(base.get("required") or ()) | set(overrides.get("required", ())))
+    for key, value in overrides.items():
+        if key not in ("properties", "required"):
+            merged[key] = value
+    return merged
+
+
+class PayloadValidator:
+    """Compiled validator for provider configs sent to the Node API"""
+
+    def __init__(self, spec: Dict[str, Any], schema_name: str = REQUEST_SCHEMA,
+                 overrides: Optional[Dict[str, Any]] = None):
+        base = _resolve({"$ref": f"#/components/schemas/{schema_name}"}, spec)
+        schema = merge_schema(base, overrides if overrides is not None else CONFIG_SCHEMA_OVERRIDES)
+        self._check = compile_schema(schema, spec)
+
+    @classmethod
+    def from_env(cls) -> Optional["PayloadValidator"]:
+        if os.getenv("PAYLOAD_VALIDATION", "on").lower() in ("0", "off", "false", "no"):
+            return None
+        path = os.getenv("PAYLOAD_SPEC_PATH", str(DEFAULT_SPEC_PATH))
+        try:
+            return cls(load_spec(path))
+        except Exception as e:
+            logger.error(f"Failed to compile payload validator from {path}, validation disabled: {e}")
+            return None
+
+    def errors(self, config: Dict[str, Any]) -> List[str]:
+        errors: List[str] = []
+        self._check(config, "$", errors)
+        return errors
+
+    def validate(self, config: Dict[str, Any]) -> None:
+        """Raise ConfigValidationError listing every problem with ``config``"""
+        errors: List[str] = []
+        self._check(config, "$", errors)
+        if errors:
+            raise ConfigValidationError(errors)
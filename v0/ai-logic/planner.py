@@ -0,0 +1,133 @@
+"""
+Offline routing planner.
+
+Routes large sets of config files in-process with ProviderRouter - no
+ai-logic server needed. Files are parsed, validated and routed in chunks
+across a process pool (one router per worker), and the decisions, scores
+and fallbacks are streamed to CSV or JSONL in input order.
+"""
+
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from schemas import VideoRequest
+from routing import ProviderRouter
+from routing_model import FACTORS
+
+PLAN_FIELDS = [
+    "source", "request_id", "topic", "style", "duration", "content_type",
+    "provider", "mode", "confidence", "fallback_provider", "total_score",
+    *(f"{factor}_score" for factor in FACTORS),
+    "runner_up", "runner_up_score", "reason", "error"
+]
+
+_router: Optional[ProviderRouter] = None
+
+
+def _init_worker() -> None:
+    global _router
+    _router = ProviderRouter()
+
+
+def _load_configs(path: str) -> Iterator[tuple]:
+    with open(path, "r") as f:
+        loaded = json.load(f)
+    configs = loaded if isinstance(loaded, list) else [loaded]
+    for index, config in enumerate(configs):
+        yield (path if len(configs) == 1 else f"{path}#{index}"), config
+
+
+def plan_request(router: ProviderRouter, source: str, request: VideoRequest) -> Dict[str, Any]:
+    """One planned routing decision as a flat row"""
+    decision, analysis = router.analyze(request)
+    # Alternatives exclude the chosen provider and are already in rank order
+    runner_up = analysis.alternatives[0] if analysis.alternatives else None
+    return {
+        "source": source,
+        "request_id": request.request_id,
+        "topic": request.topic,
+        "style": request.style,
+        "duration": request.duration,
+        "content_type": request.content_type,
+        "provider": decision.provider,
+        "mode": decision.mode,
+        "confidence": round(decision.confidence, 4),
+        "fallback_provider": decision.fallback_provider,
+        "total_score": round(analysis.total_score, 4) if analysis.total_score is not None else None,
+        **{f"{factor}_score": round(analysis.factor_scores[factor], 4) for factor in FACTORS},
+        "runner_up": runner_up["provider"] if runner_up else None,
+        "runner_up_score": runner_up["total_score"] if runner_up else None,
+        "reason": decision.reason,
+        "error": None
+    }
+
+
+def plan_files(paths: List[str]) -> List[Dict[str, Any]]:
+    """Parse, validate and route a chunk of files; invalid inputs become error rows"""
+    router = _router or ProviderRouter()
+    rows = []
+    for path in paths:
+        try:
+            configs = list(_load_configs(path))
+        except Exception as e:
+            rows.append(_error_row(path, e))
+            continue
+        for source, config in configs:
+            try:
+                rows.append(plan_request(router, source, VideoRequest(**config)))
+            except Exception as e:
+                rows.append(_error_row(source, e))
+    return rows
+
+
+def _error_row(source: str, error: Exception) -> Dict[str, Any]:
+    row = dict.fromkeys(PLAN_FIELDS)
+    row["source"] = source
+    row["error"] = f"{type(error).__name__}: {error}".replace("\n", " ")
+    return row
+
+
+def iter_plan(paths: List[str], workers: Optional[int] = None,
+              chunk_size: int = 500) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """(files, rows) for each chunk of ``paths``, in input order"""
+    workers = workers or os.cpu_count() or 1
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        _init_worker()
+        for chunk in chunks:
+            yield len(chunk), plan_files(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker) as pool:
+        for chunk, rows in zip(chunks, pool.map(plan_files, chunks)):
+            yield len(chunk), rows
+
+
+class PlanWriter:
+    """Streams plan rows (or any flat rows with ``fields``) to a CSV or JSONL file"""
+
+    def __init__(self, path: str, fmt: Optional[str] = None, fields: Optional[List[str]] = None):
+        self.path = path
+        self.format = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        self.fields = fields or PLAN_FIELDS
+        self._file = None
+        self._csv = None
+
+    def __enter__(self) -> "PlanWriter":
+        self._file = open(self.path, "w", newline="")
+        if self.format == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=self.fields)
+            self._csv.writeheader()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._file.close()
+
+    def write(self, rows: Iterable[Dict[str, Any]]) -> None:
+        if self._csv is not None:
+            self._csv.writerows(rows)
+        else:
+            self._file.writelines(json.dumps(row) + "\n" for row in rows)
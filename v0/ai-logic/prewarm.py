@@ -0,0 +1,113 @@
+"""
+Startup prewarm and readiness.
+
+The process answers /health as soon as it is up, but the first requests
+would still pay for opening Node connections, the first provider health
+probe and first-call costs in routing and validation. Prewarmer runs those
+steps once in the background at startup, and /ready reports false until
+they have all finished, so a load balancer only sends traffic to a warm
+replica. /health stays a pure liveness check.
+
+A step that fails or times out is recorded in /ready output. Only a
+``required`` step keeps the replica unready when it fails: a Node outage at
+startup shouldn't, because requests can still be parked until it recovers,
+but a routing failure would fail every request.
+
+Configuration (environment):
+    PREWARM             run the prewarm at startup (default on; off means ready at once)
+    PREWARM_TIMEOUT_S   time limit per step (default 10)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PrewarmStep:
+    """One named warm-up action and its outcome"""
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    required: bool = False
+    status: str = "pending"  # pending, ok, failed
+    duration_ms: Optional[float] = None
+    detail: Any = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "required": self.required,
+            "duration_ms": self.duration_ms,
+            "detail": self.detail
+        }
+
+
+class Prewarmer:
+    """Runs warm-up steps in order once, then reports whether the service is ready"""
+
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+        self.steps: List[PrewarmStep] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["Prewarmer"]:
+        if os.getenv("PREWARM", "on").lower() in ("0", "off", "false", "no"):
+            return None
+        return cls(timeout=float(os.getenv("PREWARM_TIMEOUT_S", "10")))
+
+    def add(self, name: str, run: Callable[[], Awaitable[Any]], required: bool = False) -> None:
+        self.steps.append(PrewarmStep(name, run, required))
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def ready(self) -> bool:
+        return self.finished and not any(step.required and step.status != "ok" for step in self.steps)
+
+    def start(self) -> asyncio.Task:
+        """Run the steps in the background; safe to call more than once"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def run(self) -> None:
+        self.started_at = time.monotonic()
+        for step in self.steps:
+            start = time.perf_counter()
+            try:
+                step.detail = await asyncio.wait_for(step.run(), self.timeout)
+                step.status = "ok"
+            except asyncio.TimeoutError:
+                step.status, step.detail = "failed", f"timed out after {self.timeout:g}s"
+            except Exception as e:
+                step.status, step.detail = "failed", f"{type(e).__name__}: {e}"
+            step.duration_ms = round((time.perf_counter() - start) * 1000, 1)
+            log = logger.info if step.status == "ok" else logger.warning
+            log(f"Prewarm {step.name} {step.status} in {step.duration_ms}ms")
+        self.finished_at = time.monotonic()
+        logger.info(f"Prewarm finished in {(self.finished_at - self.started_at) * 1000:.0f}ms, ready={self.ready}")
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "finished": self.finished,
+            "steps": {step.name: step.to_dict() for step in self.steps}
+        }
@@ -0,0 +1,118 @@
+"""
+On-demand diagnostics for a live process.
+
+SamplingProfiler periodically snapshots every thread's stack from a
+background thread and aggregates them into the folded-stack format read by
+flamegraph.pl, speedscope and inferno. The event loop is never paused, so it
+is safe to run under full load; the overhead is one stack walk per thread
+per sampling interval.
+
+dump_asyncio_tasks() lists every pending task with the chain of awaits it is
+currently suspended in, which is what you need to find stuck awaits.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# Hard cap so a mistyped request cannot tie up the profiler for long
+MAX_PROFILE_SECONDS = 120.0
+MIN_INTERVAL_SECONDS = 0.001
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another is running"""
+
+
+class SamplingProfiler:
+    """Low-overhead statistical profiler producing folded stacks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, seconds: float, interval: float = 0.01) -> str:
+        """Sample all threads for ``seconds`` and return folded stacks
+
+        Blocks the calling thread; run it in an executor from async code.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            return self._sample(
+                min(max(seconds, 0.0), MAX_PROFILE_SECONDS),
+                max(interval, MIN_INTERVAL_SECONDS)
+            )
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float) -> str:
+        own_id = threading.get_ident()
+        names = {}
+        stacks: Counter = Counter()
+        code_labels: Dict[Any, str] = {}
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = code_labels.get(code)
+                    if label is None:
+                        label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                        code_labels[code] = label
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                stacks[";".join(reversed(stack))] += 1
+            time.sleep(interval)
+
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def _await_chain(coro) -> List[str]:
+    """Follow cr_await/gi_yieldfrom from a task's coroutine to what it is blocked on"""
+    chain = []
+    seen = set()
+    while coro is not None and id(coro) not in seen:
+        seen.add(id(coro))
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        name = getattr(coro, "__qualname__", None) or type(coro).__name__
+        if frame is not None:
+            chain.append(f"{name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})")
+        else:
+            chain.append(repr(coro) if not hasattr(coro, "__qualname__") else name)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return chain
+
+
+def dump_asyncio_tasks(loop: Optional[asyncio.AbstractEventLoop] = None) -> List[Dict[str, Any]]:
+    """Describe every pending asyncio task and where it is suspended"""
+    loop = loop or asyncio.get_running_loop()
+    current = asyncio.current_task(loop)
+    tasks = []
+    for task in asyncio.all_tasks(loop):
+        if task is current:
+            continue
+        waiter = getattr(task, "_fut_waiter", None)
+        tasks.append({
+            "name": task.get_name(),
+            "coroutine": getattr(task.get_coro(), "__qualname__", repr(task.get_coro())),
+            "done": task.done(),
+            "awaiting": repr(waiter) if waiter is not None else None,
+            "await_chain": _await_chain(task.get_coro())
+        })
+    tasks.sort(key=lambda t: t["coroutine"])
+    return tasks
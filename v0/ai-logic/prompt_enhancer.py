@@ -0,0 +1,326 @@
+"""
+Prompt enhancement stage.
+
+Rewrites a request prompt with the style notes a routing decision carries
+(``adaptations['prompt_enhancement']``) using a pluggable backend: the local
+template rewriter, or an OpenAI model when PROMPT_REWRITER=openai.
+
+Model rewrites are cached in a content-addressed on-disk store keyed on
+the normalized prompt, style, provider, style note and backend, so repeated
+topics pay no model latency. Identical rewrites already in flight are
+coalesced onto one future, and concurrent distinct rewrites are collected
+for a short window and sent to the backend as one batch. A local rewriter
+such as the template one is cheaper than any of that, so it is called
+directly with no batch window and no cache.
+
+Configuration (environment):
+    PROMPT_REWRITER            template (default) or openai
+    PROMPT_REWRITER_MODEL      model for the openai backend (default gpt-4o-mini)
+    PROMPT_CACHE_DIR           on-disk cache location (default .cache/prompt_enhancement)
+    PROMPT_CACHE_MAX_ENTRIES   files kept on disk before the oldest are pruned (default 10000)
+    PROMPT_BATCH_WINDOW_MS     how long to collect a batch (default 5)
+    PROMPT_BATCH_SIZE          maximum rewrites per backend call (default 16)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from schemas import VideoRequest
+from records import RouteRecord
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: Optional[str]) -> str:
+    """Canonical form used for cache keys: trimmed, single-spaced, case-folded"""
+    return _WHITESPACE.sub(" ", prompt or "").strip().casefold()
+
+
+@dataclass(frozen=True, slots=True)
+class RewriteInput:
+    """One prompt to rewrite"""
+    prompt: str
+    style: str
+    provider: str
+    enhancement: str
+
+
+class PromptRewriter(ABC):
+    """Backend interface - rewrites a batch of prompts in one call
+
+    ``local`` rewriters run in-process and cost less than batching or caching
+    would save, so PromptEnhancer calls them directly.
+    """
+    name = "base"
+    local = False
+
+    @abstractmethod
+    async def rewrite_batch(self, items: List[RewriteInput]) -> List[str]:
+        ...
+
+
+class TemplateRewriter(PromptRewriter):
+    """Local stand-in that appends the style note to the prompt"""
+    name = "template-v1"
+    local = True
+
+    async def rewrite_batch(self, items: List[RewriteInput]) -> List[str]:
+        return [self.rewrite(item) for item in items]
+
+    @staticmethod
+    def rewrite(item: RewriteInput) -> str:
+        if not item.prompt:
+            return f"Style note: {item.enhancement}"
+        return f"{item.prompt}. Style note: {item.enhancement}"
+
+
+class OpenAIRewriter(PromptRewriter):
+    """Rewrites prompts with an OpenAI chat model, one request per batch"""
+
+    SYSTEM_PROMPT = (
+        "You rewrite prompts for AI video generation providers. For each input, "
+        "produce a single vivid prompt that keeps the original subject and applies "
+        "the style note for the named provider. Reply with a JSON object "
+        '{"prompts": [...]} containing exactly one rewritten prompt per input, in order.'
+    )
+
+    def __init__(self, model: str = "gpt-4o-mini"):
+        from openai import AsyncOpenAI
+
+        self.model = model
+        self.name = f"openai-{model}"
+        self.client = AsyncOpenAI()
+
+    async def rewrite_batch(self, items: List[RewriteInput]) -> List[str]:
+        payload = [
+            {"prompt": item.prompt, "style": item.style, "provider": item.provider, "style_note": item.enhancement}
+            for item in items
+        ]
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps(payload)}
+            ]
+        )
+        prompts = json.loads(response.choices[0].message.content).get("prompts", [])
+        if len(prompts) != len(items):
+            raise ValueError(f"Expected {len(items)} rewritten prompts, got {len(prompts)}")
+        return [str(p) for p in prompts]
+
+
+class PromptCache:
+    """Content-addressed on-disk store of rewritten prompts with a small in-memory front
+
+    Disk reads and writes run in a worker thread. Once more than
+    ``max_entries`` files are on disk, the least recently written are
+    pruned down to 90% of the limit.
+    """
+
+    def __init__(self, directory: str, memory_entries: int = 1024, max_entries: int = 10000):
+        self.directory = Path(directory)
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._disk_entries: Optional[int] = None
+        self._disk_lock = threading.Lock()
+
+    @staticmethod
+    def key(item: RewriteInput, backend: str) -> str:
+        material = json.dumps(
+            [normalize_prompt(item.prompt), item.style, item.provider, item.enhancement, backend],
+            separators=(",", ":")
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+            return value
+        value = await asyncio.to_thread(self._read, key)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    async def put(self, key: str, value: str) -> None:
+        self._remember(key, value)
+        await asyncio.to_thread(self._write, key, value)
+
+    def _read(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)["prompt"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, key: str, value: str) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            existed = path.exists()
+            # Write-then-rename so concurrent readers never see a partial entry
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"prompt": value}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Failed to persist prompt cache entry {key}: {e}")
+            return
+        with self._disk_lock:
+            if self._disk_entries is None:
+                self._disk_entries = sum(1 for _ in self.directory.glob("*/*.json"))
+            elif not existed:
+                self._disk_entries += 1
+            if self._disk_entries > self.max_entries:
+                self._prune()
+
+    def _prune(self) -> None:
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                entries.append((path.stat().st_mtime_ns, path))
+            except OSError:
+                continue
+        entries.sort()
+        excess = len(entries) - int(self.max_entries * 0.9)
+        for _, path in entries[:max(0, excess)]:
+            try:
+                path.unlink()
+            except OSError:
+                continue
+        self._disk_entries = len(entries) - max(0, excess)
+
+    def _remember(self, key: str, value: str) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+
+class PromptEnhancer:
+    """Cached, coalescing, batching front end to a PromptRewriter"""
+
+    def __init__(self, rewriter: PromptRewriter, cache: Optional[PromptCache] = None,
+                 batch_window: float = 0.005, batch_size: int = 16):
+        self.rewriter = rewriter
+        self.cache = cache
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._pending: List[tuple] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "batches": 0, "failures": 0, "local": 0}
+
+    @classmethod
+    def from_env(cls) -> "PromptEnhancer":
+        backend = os.getenv("PROMPT_REWRITER", "template")
+        if backend == "openai":
+            rewriter = OpenAIRewriter(os.getenv("PROMPT_REWRITER_MODEL", "gpt-4o-mini"))
+        else:
+            rewriter = TemplateRewriter()
+        cache = None
+        if not rewriter.local:
+            cache = PromptCache(
+                os.getenv("PROMPT_CACHE_DIR", ".cache/prompt_enhancement"),
+                max_entries=int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "10000"))
+            )
+        return cls(
+            rewriter,
+            cache=cache,
+            batch_window=float(os.getenv("PROMPT_BATCH_WINDOW_MS", "5")) / 1000,
+            batch_size=int(os.getenv("PROMPT_BATCH_SIZE", "16"))
+        )
+
+    async def enhance_for(self, request: VideoRequest, routing: RouteRecord) -> Optional[str]:
+        """Enhanced prompt for a routed request, or None when no style note applies"""
+        enhancement = (routing.adaptations or {}).get("prompt_enhancement")
+        if not enhancement:
+            return None
+        return await self.enhance(RewriteInput(request.prompt or "", request.style, routing.provider, enhancement))
+
+    async def enhance(self, item: RewriteInput) -> str:
+        if self.rewriter.local:
+            self.stats["local"] += 1
+            return (await self.rewriter.rewrite_batch([item]))[0]
+
+        key = PromptCache.key(item, self.rewriter.name)
+
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                self.stats["hits"] += 1
+                return cached
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(in_flight)
+
+        self.stats["misses"] += 1
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._in_flight[key] = future
+        self._pending.append((key, item, future))
+
+        if len(self._pending) >= self.batch_size:
+            self._schedule_flush(loop, immediate=True)
+        elif self._flush_handle is None:
+            self._schedule_flush(loop)
+
+        return await asyncio.shield(future)
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop, immediate: bool = False) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        if immediate:
+            self._flush_handle = None
+            loop.create_task(self._flush())
+        else:
+            self._flush_handle = loop.call_later(self.batch_window, lambda: loop.create_task(self._flush()))
+
+    async def _flush(self) -> None:
+        self._flush_handle = None
+        batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+        if self._pending:
+            self._schedule_flush(asyncio.get_running_loop(), immediate=True)
+        if not batch:
+            return
+
+        self.stats["batches"] += 1
+        items = [item for _, item, _ in batch]
+        try:
+            results = await self.rewriter.rewrite_batch(items)
+        except Exception as e:
+            # Never fail an orchestration because the rewriter is unavailable
+            self.stats["failures"] += 1
+            logger.warning(f"Prompt rewrite via {self.rewriter.name} failed, using template: {e}")
+            results = [TemplateRewriter.rewrite(item) for item in items]
+            cacheable = False
+        else:
+            cacheable = True
+
+        for (key, _, future), result in zip(batch, results):
+            self._in_flight.pop(key, None)
+            if not future.done():
+                future.set_result(result)
+        if cacheable and self.cache is not None:
+            for (key, _, _), result in zip(batch, results):
+                await self.cache.put(key, result)
@@ -0,0 +1,246 @@
+"""
+Provider registry loaded from shared/provider_registry.json.
+
+Each provider, or model variant of one, is declared once with everything
+the service knows about it: capabilities, its row in the style, content
+and duration score tables, style adaptations, default generation params,
+optimization rules, env key and how its health is checked. Routing, health
+checks, config preparation and payload validation all read from here, so
+adding a model is a config change.
+
+A variant names its base with "extends" and overrides only what differs;
+objects are merged key by key and anything else is replaced. Variants are
+submitted to Node as their base provider ("node_provider") with a "model"
+field, and share that provider's health.
+
+Optimization rules are applied in order. Each has a "when" condition (all
+keys must hold, an empty condition always matches) and may "set" params
+and run named "derive" steps:
+
+    style_in      request style is one of the listed styles
+    content_type  request content_type equals the value
+    duration_gt   request duration is set and greater than the value
+    duration_lte  request duration is set and at most the value
+    aspect_ratio  request aspect ratio equals the value
+    priority      request priority equals the value
+    has           the named request field is set
+
+Configuration (environment):
+    PROVIDER_REGISTRY   registry file (default shared/provider_registry.json)
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# shared/ sits beside the service in the container and one level up in the repo
+_REGISTRY_CANDIDATES = [
+    Path(__file__).resolve().parent / "shared" / "provider_registry.json",
+    Path(__file__).resolve().parent.parent / "shared" / "provider_registry.json"
+]
+DEFAULT_REGISTRY_PATH = next((p for p in _REGISTRY_CANDIDATES if p.exists()), _REGISTRY_CANDIDATES[-1])
+
+MODES = ("ai_generated", "slideshow")
+HEALTH_SOURCES = ("node", "local")
+DURATION_BUCKETS = ("short", "medium", "long")
+
+
+class ProviderRegistryError(ValueError):
+    """The provider registry file is malformed"""
+
+
+def _slideshow_image_count(config: Dict[str, Any], request: Any) -> None:
+    display_time = config.get("image_display_time", 3.0)
+    transition_time = config.get("transition_duration", 0.5)
+    config["target_image_count"] = max(3, int(request.duration / (display_time + transition_time)))
+
+
+# Config adjustments too involved for "set", referenced by name from rules
+DERIVATIONS: Dict[str, Callable[[Dict[str, Any], Any], None]] = {
+    "slideshow_image_count": _slideshow_image_count
+}
+
+_CONDITIONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "style_in": lambda request, value: request.style in value,
+    "content_type": lambda request, value: request.content_type == value,
+    "duration_gt": lambda request, value: bool(request.duration) and request.duration > value,
+    "duration_lte": lambda request, value: bool(request.duration) and request.duration <= value,
+    "aspect_ratio": lambda request, value: request.aspect_ratio == value,
+    "priority": lambda request, value: request.priority == value,
+    "has": lambda request, value: bool(getattr(request, value, None))
+}
+
+
+@dataclass(frozen=True)
+class OptimizationRule:
+    """Params set, and derivations run, when a request matches ``when``"""
+    when: Tuple[Tuple[str, Any], ...] = ()
+    set: Dict[str, Any] = field(default_factory=dict)
+    derive: Tuple[str, ...] = ()
+
+    def matches(self, request: Any) -> bool:
+        return all(_CONDITIONS[condition](request, value) for condition, value in self.when)
+
+    def apply(self, config: Dict[str, Any], request: Any) -> None:
+        if not self.matches(request):
+            return
+        config.update(self.set)
+        for name in self.derive:
+            DERIVATIONS[name](config, request)
+
+
+@dataclass(frozen=True)
+class ProviderSpec:
+    """One provider or model variant, with ``extends`` already resolved"""
+    name: str
+    display_name: str
+    mode: str
+    env_key: Optional[str]
+    health: str
+    node_provider: str
+    model: Optional[str]
+    capabilities: Dict[str, Any]
+    style_scores: Dict[str, float]
+    content_scores: Dict[str, float]
+    duration_scores: Dict[str, float]
+    adaptations: Dict[str, Dict[str, str]]
+    defaults: Dict[str, Any]
+    optimizations: Tuple[OptimizationRule, ...]
+    batch_parallel: bool
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _resolve(raw: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Flatten "extends" chains, keeping file order"""
+    resolved: Dict[str, Dict[str, Any]] = {}
+
+    def resolve(name: str, chain: Tuple[str, ...]) -> Dict[str, Any]:
+        if name in resolved:
+            return resolved[name]
+        if name in chain:
+            raise ProviderRegistryError(f"Provider {name} extends itself via {' -> '.join(chain)}")
+        entry = raw[name]
+        base_name = entry.get("extends")
+        if base_name is None:
+            resolved[name] = dict(entry)
+        elif base_name not in raw:
+            raise ProviderRegistryError(f"Provider {name} extends unknown provider {base_name}")
+        else:
+            base = resolve(base_name, chain + (name,))
+            resolved[name] = _merge(base, {"node_provider": base.get("node_provider", base_name), **entry})
+        return resolved[name]
+
+    for name in raw:
+        resolve(name, ())
+    return resolved
+
+
+def _rule(provider: str, raw: Dict[str, Any]) -> OptimizationRule:
+    when = raw.get("when", {})
+    unknown = set(when) - set(_CONDITIONS)
+    if unknown:
+        raise ProviderRegistryError(f"Provider {provider} has rules on unknown conditions {sorted(unknown)}")
+    derive = tuple(raw.get("derive", ()))
+    unknown = set(derive) - set(DERIVATIONS)
+    if unknown:
+        raise ProviderRegistryError(f"Provider {provider} derives unknown steps {sorted(unknown)}")
+    when = tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in when.items())
+    return OptimizationRule(when=when, set=dict(raw.get("set", {})), derive=derive)
+
+
+def _spec(name: str, entry: Dict[str, Any]) -> ProviderSpec:
+    mode = entry.get("mode", "ai_generated")
+    if mode not in MODES:
+        raise ProviderRegistryError(f"Provider {name} has unknown mode {mode}")
+    health = entry.get("health", "node")
+    if health not in HEALTH_SOURCES:
+        raise ProviderRegistryError(f"Provider {name} has unknown health source {health}")
+    scores = entry.get("scores", {})
+    return ProviderSpec(
+        name=name,
+        display_name=entry.get("name", name),
+        mode=mode,
+        env_key=entry.get("env_key"),
+        health=health,
+        node_provider=entry.get("node_provider", name),
+        model=entry.get("model"),
+        capabilities=dict(entry.get("capabilities", {})),
+        style_scores=dict(scores.get("style", {})),
+        content_scores=dict(scores.get("content", {})),
+        duration_scores=dict(scores.get("duration", {})),
+        adaptations=dict(entry.get("adaptations", {})),
+        defaults=dict(entry.get("defaults", {})),
+        optimizations=tuple(_rule(name, rule) for rule in entry.get("optimizations", ())),
+        batch_parallel=bool(entry.get("batch_parallel", False))
+    )
+
+
+class ProviderRegistry:
+    """Validated provider specs, in file order, with inverted lookup tables built once"""
+
+    def __init__(self, specs: List[ProviderSpec]):
+        if not specs:
+            raise ProviderRegistryError("Provider registry declares no providers")
+        self.specs: Dict[str, ProviderSpec] = {spec.name: spec for spec in specs}
+        self.names: Tuple[str, ...] = tuple(self.specs)
+
+        for spec in specs:
+            if spec.node_provider not in self.specs:
+                raise ProviderRegistryError(f"Provider {spec.name} submits as unknown provider {spec.node_provider}")
+            unknown = set(spec.capabilities.get("fallbacks", ())) - set(self.specs)
+            if unknown:
+                raise ProviderRegistryError(f"Provider {spec.name} falls back to unknown providers {sorted(unknown)}")
+            unknown = set(spec.duration_scores) - set(DURATION_BUCKETS)
+            if unknown:
+                raise ProviderRegistryError(f"Provider {spec.name} scores unknown duration buckets {sorted(unknown)}")
+
+        self.node_providers: Tuple[str, ...] = tuple(dict.fromkeys(spec.node_provider for spec in specs))
+        self.capabilities: Dict[str, Dict[str, Any]] = {spec.name: spec.capabilities for spec in specs}
+        # Score tables keyed the way the router looks them up: factor value -> provider -> score
+        self.style_compatibility = self._invert("style_scores")
+        self.content_preferences = self._invert("content_scores")
+        self.duration_preferences = self._invert("duration_scores")
+        self.style_adaptations = self._invert("adaptations")
+
+    @classmethod
+    def load(cls, path: Path) -> "ProviderRegistry":
+        try:
+            with open(path, "r") as f:
+                document = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ProviderRegistryError(f"Cannot read provider registry {path}: {e}")
+        raw = document.get("providers", {})
+        registry = cls([_spec(name, entry) for name, entry in _resolve(raw).items()])
+        logger.info(f"Loaded {len(registry.names)} providers from {path}")
+        return registry
+
+    @classmethod
+    def from_env(cls) -> "ProviderRegistry":
+        return cls.load(Path(os.getenv("PROVIDER_REGISTRY", str(DEFAULT_REGISTRY_PATH))))
+
+    def get(self, name: str) -> ProviderSpec:
+        return self.specs[name]
+
+    def _invert(self, attribute: str) -> Dict[str, Dict[str, Any]]:
+        table: Dict[str, Dict[str, Any]] = {}
+        for spec in self.specs.values():
+            for key, value in getattr(spec, attribute).items():
+                table.setdefault(key, {})[spec.name] = value
+        return table
+
+
+REGISTRY = ProviderRegistry.from_env()
@@ -1,39 +1,129 @@
 """
 Provider health checking and management
+
+With shared state configured, the Node provider health response is kept as
+a snapshot for HEALTH_SNAPSHOT_TTL_S seconds (default 5). When it expires,
+one replica takes a short lease and probes Node while the others wait for
+its snapshot, so N replicas cost one probe per interval instead of N per
+request.
+
+Health comes from the provider registry: "local" providers are always
+available and "node" ones take their Node provider's health, so model
+variants of one provider share a single entry in Node's response.
 """
 
 import asyncio
-import httpx
 import logging
 import os
-from typing import Dict, List
-from schemas import VideoProvider, ProviderStatus
+import socket
+from typing import Any, Dict, List, Optional, Sequence
+from provider_registry import REGISTRY
+from records import HealthRecord
+from node_client import NodePool
+from state_backend import SharedState, StateBackendError
 
 logger = logging.getLogger(__name__)
 
+PROVIDER_NAMES = REGISTRY.names
+
+HEALTH_SNAPSHOT_KEY = "health:node-providers"
+HEALTH_LEASE_KEY = "health:probe-lease"
+
+
+class RecoveryWatcher:
+    """One probe loop per provider, shared by every coroutine waiting for it to recover
+    
+    The loop runs only while someone is waiting and backs off through
+    ``delays`` (repeating the last), so probe traffic during an outage is the
+    same for one waiter or a thousand. Waiters time out or cancel on their own.
+    """
+    
+    def __init__(self, checker: "ProviderHealthChecker", provider: str,
+                 delays: Sequence[float] = (5, 10, 20, 30, 60)):
+        self.checker = checker
+        self.provider = provider
+        self.delays = tuple(delays)
+        self.waiters = 0
+        self.probes = 0
+        self._recovered = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """True once the provider is healthy again, False if ``timeout`` passes first"""
+        recovered = self._recovered
+        self.waiters += 1
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch(recovered))
+        try:
+            await asyncio.wait_for(recovered.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiters -= 1
+            if self.waiters == 0 and self._task is not None and not recovered.is_set():
+                # Nobody is waiting any more; stop probing
+                self._task.cancel()
+                self._task = None
+    
+    def recovered(self) -> None:
+        """Wake all current waiters; later waiters start a new watch"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._recovered.set()
+        self._recovered = asyncio.Event()
+    
+    async def _watch(self, recovered: asyncio.Event) -> None:
+        attempt = 0
+        while not recovered.is_set():
+            delay = self.delays[min(attempt, len(self.delays) - 1)]
+            attempt += 1
+            logger.info(f"Waiting {delay}s for {self.provider} to recover...")
+            await asyncio.sleep(delay)
+            self.probes += 1
+            status = await self.checker.check_provider(self.provider)
+            if status.is_healthy:
+                # check_provider has already woken the waiters
+                return
+
 
 class ProviderHealthChecker:
     """Manages provider health checking and status monitoring"""
     
-    def __init__(self):
-        self.node_api_url = os.getenv("NODE_API_URL", "http://localhost:3000")
+    def __init__(self, node_pool: Optional[NodePool] = None, shared: Optional[SharedState] = None):
+        self.node_pool = node_pool or NodePool.from_env()
+        self.shared = shared
         self.api_key = os.getenv("API_KEY", "testkey")
         self.timeout = 10.0
+        self.snapshot_ttl = float(os.getenv("HEALTH_SNAPSHOT_TTL_S", "5"))
+        self.replica_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._watchers: Dict[str, RecoveryWatcher] = {}
+        self._refreshing: Optional[asyncio.Future] = None
     
-    async def check_provider(self, provider: VideoProvider) -> ProviderStatus:
-        """Check health of a specific provider"""
+    async def check_provider(self, provider: str, node_health: Optional[asyncio.Future] = None) -> HealthRecord:
+        """Check health of a specific provider
+        
+        ``node_health`` is a probe of Node's provider health shared by several
+        checks; without one this check makes its own.
+        """
         try:
             start_time = asyncio.get_event_loop().time()
             
             # Check provider-specific health endpoint or capability
-            is_healthy = await self._check_provider_health(provider)
+            is_healthy = await self._check_provider_health(provider, node_health)
             
             end_time = asyncio.get_event_loop().time()
             response_time = (end_time - start_time) * 1000  # Convert to ms
             
             capabilities = self._get_provider_capabilities(provider)
             
-            return ProviderStatus(
+            watcher = self._watchers.get(provider)
+            if is_healthy and watcher and watcher.waiters:
+                logger.info(f"{provider} has recovered!")
+                watcher.recovered()
+            
+            return HealthRecord(
                 provider=provider,
                 is_healthy=is_healthy,
                 response_time_ms=response_time,
@@ -42,56 +132,49 @@ class ProviderHealthChecker:
             
         except Exception as e:
             logger.error(f"Health check failed for {provider}: {str(e)}")
-            return ProviderStatus(
+            return HealthRecord(
                 provider=provider,
                 is_healthy=False,
                 error=str(e)
             )
     
-    async def check_all_providers(self) -> Dict[str, ProviderStatus]:
-        """Check health of all providers concurrently"""
-        tasks = []
-        for provider in VideoProvider:
-            task = self.check_provider(provider)
-            tasks.append(task)
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+    async def check_all_providers(self) -> Dict[str, HealthRecord]:
+        """Check health of all providers concurrently, from one Node probe"""
+        node_health = None
+        if any(REGISTRY.get(provider).health == "node" for provider in PROVIDER_NAMES):
+            node_health = asyncio.ensure_future(self._node_provider_health())
+        results = await asyncio.gather(
+            *(self.check_provider(provider, node_health) for provider in PROVIDER_NAMES),
+            return_exceptions=True
+        )
         
         status_map = {}
-        for i, result in enumerate(results):
-            provider = list(VideoProvider)[i]
+        for provider, result in zip(PROVIDER_NAMES, results):
             if isinstance(result, Exception):
-                status_map[provider.value] = ProviderStatus(
+                status_map[provider] = HealthRecord(
                     provider=provider,
                     is_healthy=False,
                     error=str(result)
                 )
             else:
-                status_map[provider.value] = result
+                status_map[provider] = result
         
         return status_map
     
-    async def _check_provider_health(self, provider: VideoProvider) -> bool:
+    async def _check_provider_health(self, provider: str, node_health: Optional[asyncio.Future] = None) -> bool:
         """Provider-specific health checking logic"""
-        
-        if provider == VideoProvider.SLIDESHOW:
-            # Slideshow is always available (local generation)
+        spec = REGISTRY.get(provider)
+        if spec.health == "local":
+            # Generated locally, always available
             return True
         
         try:
             # For AI providers, check if we can reach the Node API
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.node_api_url}/video/providers/health",
-                    headers={"X-API-KEY": self.api_key},
-                    timeout=self.timeout
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("providers", {}).get(provider.value, {}).get("healthy", False)
-                
-                return False
+            if node_health is not None:
+                providers = await asyncio.shield(node_health)
+            else:
+                providers = await self._node_provider_health()
+            return providers.get(spec.node_provider, {}).get("healthy", False)
                 
         except Exception as e:
             logger.warning(f"Node API health check failed for {provider}: {str(e)}")
@@ -99,84 +182,88 @@ class ProviderHealthChecker:
             # Fallback: Check environment variables for API keys
             return self._check_provider_env_keys(provider)
     
-    def _check_provider_env_keys(self, provider: VideoProvider) -> bool:
-        """Check if required environment variables are set for provider"""
-        env_key_map = {
-            VideoProvider.RUNWAY: "RUNWAY_API_KEY",
-            VideoProvider.PIKA: "PIKA_API_KEY", 
-            VideoProvider.GEMINI_VEO: "GEMINI_API_KEY",
-            VideoProvider.SLIDESHOW: None  # No key required
-        }
+    async def _fetch_node_provider_health(self) -> Dict[str, Any]:
+        _, response = await self.node_pool.request(
+            "GET",
+            "/video/providers/health",
+            headers={"X-API-KEY": self.api_key},
+            timeout=self.timeout
+        )
+        if response.status_code == 200:
+            return response.json().get("providers", {})
+        return {}
+    
+    async def _node_provider_health(self) -> Dict[str, Any]:
+        """Node's per-provider health, from the shared snapshot when there is one"""
+        if self.shared is None:
+            return await self._fetch_node_provider_health()
+        try:
+            snapshot = await self.shared.get(HEALTH_SNAPSHOT_KEY)
+            if snapshot is None:
+                if self._refreshing is None:
+                    self._refreshing = asyncio.ensure_future(self._refresh_snapshot())
+                    self._refreshing.add_done_callback(lambda _: setattr(self, "_refreshing", None))
+                snapshot = await asyncio.shield(self._refreshing)
+        except StateBackendError as e:
+            logger.warning(f"Shared health snapshot unavailable, probing directly: {e}")
+            return await self._fetch_node_provider_health()
+        if "error" in snapshot:
+            raise ConnectionError(f"Node API health probe failed: {snapshot['error']}")
+        return snapshot["providers"]
+    
+    async def _refresh_snapshot(self) -> Dict[str, Any]:
+        """Probe Node under the lease, or wait for the replica holding it"""
+        if await self.shared.set(HEALTH_LEASE_KEY, self.replica_id, ttl=self.timeout, nx=True):
+            try:
+                snapshot = {"providers": await self._fetch_node_provider_health()}
+            except Exception as e:
+                # Share the failure too, so replicas don't all retry a dead Node
+                snapshot = {"error": f"{type(e).__name__}: {e}"}
+            await self.shared.set(HEALTH_SNAPSHOT_KEY, snapshot, ttl=self.snapshot_ttl)
+            await self.shared.delete(HEALTH_LEASE_KEY)
+            return snapshot
         
-        required_key = env_key_map.get(provider)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while loop.time() < deadline:
+            await asyncio.sleep(0.05)
+            snapshot = await self.shared.get(HEALTH_SNAPSHOT_KEY, fresh=True)
+            if snapshot is not None:
+                return snapshot
+        # The lease holder went away without publishing
+        return {"providers": await self._fetch_node_provider_health()}
+    
+    def _check_provider_env_keys(self, provider: str) -> bool:
+        """Check if required environment variables are set for provider"""
+        required_key = REGISTRY.get(provider).env_key
         if not required_key:
             return True  # No key required
         
         return bool(os.getenv(required_key))
     
-    def _get_provider_capabilities(self, provider: VideoProvider) -> Dict[str, any]:
+    def _get_provider_capabilities(self, provider: str) -> Dict[str, any]:
         """Get static capabilities for a provider"""
-        capabilities = {
-            VideoProvider.RUNWAY: {
-                "max_duration": 300,
-                "resolutions": ["1920x1080", "1080x1920", "1080x1080"],
-                "features": ["cinematic_quality", "camera_movements", "photorealism"],
-                "cost_tier": "high",
-                "quality": "high"
-            },
-            VideoProvider.PIKA: {
-                "max_duration": 120,
-                "resolutions": ["1280x720", "720x1280", "1080x1080"],
-                "features": ["artistic_styles", "fast_generation", "experimental"],
-                "cost_tier": "medium", 
-                "quality": "creative"
-            },
-            VideoProvider.GEMINI_VEO: {
-                "max_duration": 180,
-                "resolutions": ["1280x720", "720x1280", "1080x1080"],
-                "features": ["fast_generation", "creative_effects", "animation"],
-                "cost_tier": "low",
-                "quality": "creative"
-            },
-            VideoProvider.SLIDESHOW: {
-                "max_duration": 600,
-                "resolutions": ["1920x1080", "1080x1920", "1080x1080"],
-                "features": ["cost_effective", "voice_sync", "fast_generation", "image_generation"],
-                "cost_tier": "very_low",
-                "quality": "standard"
-            }
-        }
-        
-        return capabilities.get(provider, {})
+        return REGISTRY.capabilities.get(provider, {})
     
-    async def get_healthy_providers(self) -> List[VideoProvider]:
+    async def get_healthy_providers(self) -> List[str]:
         """Get list of currently healthy providers"""
         all_status = await self.check_all_providers()
         healthy_providers = []
         
         for provider_name, status in all_status.items():
             if status.is_healthy:
-                healthy_providers.append(VideoProvider(provider_name))
+                healthy_providers.append(provider_name)
         
         return healthy_providers
     
-    async def wait_for_provider_recovery(self, provider: VideoProvider, max_wait_time: int = 300) -> bool:
-        """Wait for a provider to recover, with exponential backoff"""
-        wait_times = [5, 10, 20, 30, 60]  # seconds
-        total_waited = 0
+    async def wait_for_provider_recovery(self, provider: str, max_wait_time: int = 300) -> bool:
+        """Wait for a provider to recover, sharing one backed-off probe loop with other waiters"""
+        watcher = self._watchers.get(provider)
+        if watcher is None:
+            watcher = self._watchers[provider] = RecoveryWatcher(self, provider)
         
-        for wait_time in wait_times:
-            if total_waited >= max_wait_time:
-                break
-                
-            logger.info(f"Waiting {wait_time}s for {provider} to recover...")
-            await asyncio.sleep(wait_time)
-            total_waited += wait_time
-            
-            status = await self.check_provider(provider)
-            if status.is_healthy:
-                logger.info(f"{provider} has recovered!")
-                return True
+        if await watcher.wait(max_wait_time):
+            return True
         
         logger.warning(f"{provider} did not recover within {max_wait_time}s")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,88 @@
+"""
+Compact internal records for routing and health checking.
+
+These never leave the process on their own - conversion to the Pydantic
+schemas in schemas.py happens only at the HTTP boundary via ``to_schema()``.
+"""
+
+from dataclasses import dataclass, replace
+from typing import Optional, Dict, Any
+
+from schemas import RoutingDecision, ProviderStatus
+from provider_registry import REGISTRY
+
+
+@dataclass(frozen=True, slots=True)
+class ProviderScore:
+    """Per-provider scoring breakdown produced by ProviderRouter"""
+    provider: str
+    total_score: float
+    style_score: float
+    content_score: float
+    duration_score: float
+    quality_score: float
+    cost_score: float
+    primary_factor: str
+
+    def factor_scores(self) -> Dict[str, float]:
+        return {
+            "style": self.style_score,
+            "content": self.content_score,
+            "duration": self.duration_score,
+            "quality": self.quality_score,
+            "cost": self.cost_score
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class RouteRecord:
+    """Internal provider routing decision"""
+    provider: str
+    mode: str
+    reason: str
+    confidence: float = 1.0
+    fallback_provider: Optional[str] = None
+    adaptations: Optional[Dict[str, Any]] = None
+
+    def use_fallback(self) -> "RouteRecord":
+        """Return a copy of this decision switched over to the fallback provider"""
+        return replace(
+            self,
+            provider=self.fallback_provider,
+            mode=provider_mode(self.fallback_provider),
+            reason=f"Primary provider unavailable, using fallback: {self.fallback_provider}"
+        )
+
+    def to_schema(self) -> RoutingDecision:
+        return RoutingDecision(
+            provider=self.provider,
+            mode=self.mode,
+            reason=self.reason,
+            confidence=self.confidence,
+            fallback_provider=self.fallback_provider,
+            adaptations=self.adaptations
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class HealthRecord:
+    """Internal provider health status"""
+    provider: str
+    is_healthy: bool
+    response_time_ms: Optional[float] = None
+    capabilities: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def to_schema(self) -> ProviderStatus:
+        return ProviderStatus(
+            provider=self.provider,
+            is_healthy=self.is_healthy,
+            response_time_ms=self.response_time_ms,
+            capabilities=self.capabilities,
+            error=self.error
+        )
+
+
+def provider_mode(provider: str) -> str:
+    """Video mode implied by a provider"""
+    return REGISTRY.get(provider).mode
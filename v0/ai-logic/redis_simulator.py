@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Local Redis stand-in for running ai-logic's shared state without Redis.
+
+Speaks RESP2 and implements the commands RespBackend sends, backed by a
+MemoryBackend: PING, AUTH, SELECT, GET, SET (EX/PX/NX/XX), INCR, INCRBY,
+EXPIRE, PEXPIRE, DEL, EXISTS, FLUSHDB and QUIT. Each database number gets
+its own store.
+
+    python redis_simulator.py --port 6390
+    STATE_BACKEND=redis://127.0.0.1:6390/0 uvicorn main:app
+"""
+
+import argparse
+import asyncio
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from state_backend import MemoryBackend, StateBackendError, read_reply
+
+
+def encode_reply(value: Any) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, bool):
+        return b":%d\r\n" % int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, StateBackendError):
+        return b"-%s\r\n" % str(value).encode()
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode()
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class RedisSimulator:
+    """The subset of Redis commands ai-logic uses, over asyncio streams"""
+
+    def __init__(self, password: Optional[str] = None):
+        self.password = password
+        self.databases: Dict[int, MemoryBackend] = defaultdict(MemoryBackend)
+        self.commands = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session = {"db": 0, "authenticated": self.password is None}
+        try:
+            while True:
+                try:
+                    request = await read_reply(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                if not isinstance(request, list) or not request:
+                    writer.write(encode_reply(StateBackendError("ERR Protocol error: expected array")))
+                    break
+                self.commands += 1
+                name = request[0].decode().upper()
+                if name == "QUIT":
+                    writer.write(encode_reply("OK"))
+                    break
+                try:
+                    reply = await self.execute(session, name, [arg.decode() for arg in request[1:]])
+                except StateBackendError as e:
+                    reply = e
+                except (ValueError, IndexError):
+                    reply = StateBackendError(f"ERR syntax error in '{name.lower()}'")
+                writer.write(encode_reply(reply))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def execute(self, session: Dict[str, Any], name: str, args: List[str]) -> Any:
+        if name == "AUTH":
+            if args[-1] != self.password:
+                raise StateBackendError("WRONGPASS invalid password")
+            session["authenticated"] = True
+            return "OK"
+        if not session["authenticated"]:
+            raise StateBackendError("NOAUTH Authentication required.")
+        if name == "PING":
+            return args[0].encode() if args else "PONG"
+        if name == "SELECT":
+            session["db"] = int(args[0])
+            return "OK"
+
+        store = self.databases[session["db"]]
+        if name == "GET":
+            value = await store.get(args[0])
+            return value.encode() if value is not None else None
+        if name == "SET":
+            return await self._set(store, args)
+        if name in ("INCR", "INCRBY"):
+            try:
+                return await store.incr(args[0], int(args[1]) if name == "INCRBY" else 1)
+            except StateBackendError:
+                raise StateBackendError("ERR value is not an integer or out of range")
+        if name in ("EXPIRE", "PEXPIRE"):
+            ttl = float(args[1]) / (1000 if name == "PEXPIRE" else 1)
+            return await store.expire(args[0], ttl)
+        if name == "DEL":
+            existing = [key for key in args if await store.get(key) is not None]
+            for key in existing:
+                await store.delete(key)
+            return len(existing)
+        if name == "EXISTS":
+            return sum([await store.get(key) is not None for key in args])
+        if name == "FLUSHDB":
+            store.flush()
+            return "OK"
+        raise StateBackendError(f"ERR unknown command '{name.lower()}'")
+
+    async def _set(self, store: MemoryBackend, args: List[str]) -> Any:
+        key, value = args[0], args[1]
+        ttl, nx, xx = None, False, False
+        options = iter(args[2:])
+        for option in options:
+            option = option.upper()
+            if option == "EX":
+                ttl = float(next(options))
+            elif option == "PX":
+                ttl = float(next(options)) / 1000
+            elif option == "NX":
+                nx = True
+            elif option == "XX":
+                xx = True
+            else:
+                raise ValueError(option)
+        if xx and await store.get(key) is None:
+            return None
+        return "OK" if await store.set(key, value, ttl, nx) else None
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local Redis stand-in for ai-logic shared state")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--password", help="Require AUTH with this password")
+    return parser.parse_args(argv)
+
+
+async def serve(args: argparse.Namespace) -> None:
+    simulator = RedisSimulator(args.password)
+    server = await asyncio.start_server(simulator.handle, args.host, args.port)
+    print(f"Redis simulator listening on {args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,193 @@
+"""
+Orchestration result cache.
+
+Keyed on a canonical hash of the provider config produced by
+VideoOrchestrator.prepare_provider_config (minus per-request identifiers),
+so two users asking for the same style, prompt, duration and aspect ratio
+share one provider generation. Concurrent identical submissions are
+coalesced onto the first one in flight.
+
+With shared state configured, results are also stored there, so a
+generation started on one replica is reused by the others. The local LRU
+stays in front of it.
+
+A cached job that later fails on Node must not be handed out again, so
+discard_job() drops the entry for a job id (main calls it when
+/video/status reports the job failed). With shared state the entry is
+removed there too; local copies already pulled by other replicas run out
+with their TTL.
+
+Configuration (environment):
+    RESULT_CACHE_TTL    seconds a result stays reusable (default 3600, 0 disables)
+    RESULT_CACHE_SIZE   maximum cached results (default 10000)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from state_backend import SharedState, StateBackendError
+
+logger = logging.getLogger(__name__)
+
+# Config keys that identify a request rather than describe the output
+EXCLUDED_KEYS = frozenset({"request_id"})
+
+
+def canonical_config_hash(config: Dict[str, Any]) -> str:
+    """Stable hash of a provider config, independent of key order"""
+    canonical = json.dumps(
+        {k: v for k, v in config.items() if k not in EXCLUDED_KEYS},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    """TTL- and size-bounded LRU of orchestration results with single-flight fills
+
+    ``shared`` adds a second tier in shared state. Values stored there are
+    pydantic models of type ``model``.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 10000, shared: Optional[SharedState] = None,
+                 model: Optional[Type[BaseModel]] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared = shared if model is not None else None
+        self.model = model
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        # Job id -> cache key, so a failed job's entry can be dropped
+        self._jobs: Dict[str, str] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "shared_hits": 0,
+                      "discarded": 0}
+
+    @classmethod
+    def from_env(cls, shared: Optional[SharedState] = None,
+                 model: Optional[Type[BaseModel]] = None) -> Optional["ResultCache"]:
+        ttl = float(os.getenv("RESULT_CACHE_TTL", "3600"))
+        if ttl <= 0:
+            return None
+        return cls(ttl=ttl, max_entries=int(os.getenv("RESULT_CACHE_SIZE", "10000")), shared=shared, model=model)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._forget_job(value)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        job_id = getattr(value, "job_id", None)
+        if job_id:
+            self._jobs[job_id] = key
+        while len(self._entries) > self.max_entries:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._forget_job(evicted)
+            self.stats["evictions"] += 1
+
+    async def discard_job(self, job_id: str) -> bool:
+        """Drop the cached result for ``job_id``; True if there was one"""
+        key = self._jobs.pop(job_id, None)
+        if key is None and self.shared is not None:
+            try:
+                key = await self.shared.get(f"job:{job_id}", fresh=True)
+            except StateBackendError as e:
+                logger.warning(f"Shared result cache unavailable: {e}")
+        if key is None:
+            return False
+        self._entries.pop(key, None)
+        self.stats["discarded"] += 1
+        if self.shared is not None:
+            try:
+                await self.shared.delete(f"result:{key}")
+                await self.shared.delete(f"job:{job_id}")
+            except StateBackendError as e:
+                logger.warning(f"Could not discard shared result for job {job_id}: {e}")
+        return True
+
+    def _forget_job(self, value: Any) -> None:
+        job_id = getattr(value, "job_id", None)
+        if job_id:
+            self._jobs.pop(job_id, None)
+
+    async def get_or_create(self, key: str, create: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return (value, hit), running ``create`` at most once per key at a time
+
+        A failed fill is not cached; callers that were waiting on it run their
+        own ``create`` instead of inheriting the error.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.stats["hits"] += 1
+            return value, True
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(in_flight), True
+            except Exception:
+                return await create(), False
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await self._get_shared(key)
+            if value is not None:
+                self.stats["shared_hits"] += 1
+                self.put(key, value)
+                future.set_result(value)
+                return value, True
+            self.stats["misses"] += 1
+            value = await create()
+        except BaseException as e:
+            # Waiters fall back to their own fill, so never hand them a cancellation
+            future.set_exception(e if isinstance(e, Exception) else RuntimeError("Cache fill was cancelled"))
+            # Nobody may be waiting; mark the exception retrieved to avoid log noise
+            future.exception()
+            raise
+        else:
+            self.put(key, value)
+            future.set_result(value)
+            await self._put_shared(key, value)
+            return value, False
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def _get_shared(self, key: str) -> Optional[Any]:
+        if self.shared is None:
+            return None
+        try:
+            data = await self.shared.get(f"result:{key}")
+        except StateBackendError as e:
+            logger.warning(f"Shared result cache unavailable: {e}")
+            return None
+        return self.model.model_validate(data) if data is not None else None
+
+    async def _put_shared(self, key: str, value: Any) -> None:
+        if self.shared is None:
+            return
+        try:
+            await self.shared.set(f"result:{key}", value.model_dump(mode="json"), ttl=self.ttl)
+            if getattr(value, "job_id", None):
+                await self.shared.set(f"job:{value.job_id}", key, ttl=self.ttl)
+        except StateBackendError as e:
+            logger.warning(f"Could not share cached result: {e}")
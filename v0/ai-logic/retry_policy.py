@@ -0,0 +1,165 @@
+"""
+Retries for Node API submissions.
+
+Only failures where a second attempt can help are retried: connection
+errors (the request never reached Node) and 429/502/503/504 responses.
+Delays use exponential backoff with full jitter, so clients that failed
+together don't retry together. A Retry-After header replaces the computed
+delay, and the policy gives up rather than wait longer than
+``max_retry_after``.
+
+All retries draw on one process-wide RetryBudget. Each first attempt
+deposits ``ratio`` tokens and each retry spends one, so retries stay near
+``ratio`` of traffic no matter how many requests are failing. A small
+per-second allowance keeps retries possible at low traffic. When Node is
+down, callers get the error after one attempt instead of multiplying the load.
+
+Callers send the same Idempotency-Key on every attempt, so a retry after a
+response was lost can't create a second job.
+
+Configuration (environment):
+    NODE_RETRY_MAX_ATTEMPTS        attempts per submission, including the first (default 3)
+    NODE_RETRY_BASE_MS             backoff base delay (default 200)
+    NODE_RETRY_MAX_MS              backoff cap (default 5000)
+    NODE_RETRY_MAX_RETRY_AFTER_S   longest Retry-After to wait for (default 30)
+    NODE_RETRY_BUDGET_RATIO        retries allowed per request (default 0.1)
+    NODE_RETRY_BUDGET_MIN_PER_S    retries always allowed per second (default 5)
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class RetryBudget:
+    """Token bucket of retries, refilled by traffic and by a small time-based allowance"""
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 5.0, max_tokens: Optional[float] = None):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens if max_tokens is not None else max(10.0, min_per_second * 10)
+        self.tokens = self.max_tokens
+        self._refilled = time.monotonic()
+
+    def deposit(self) -> None:
+        """Record a first attempt"""
+        self._refill()
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Take one retry if the budget allows it"""
+        self._refill()
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self._refilled) * self.min_per_second)
+        self._refilled = now
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Retry loop with jittered exponential backoff under a shared RetryBudget"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.2, max_delay: float = 5.0,
+                 max_retry_after: float = 30.0, budget: Optional[RetryBudget] = None,
+                 rng: Optional[random.Random] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.budget = budget or RetryBudget()
+        self.rng = rng or random.Random()
+        self.stats = {"calls": 0, "retries": 0, "budget_exhausted": 0, "retry_after_too_long": 0}
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            max_attempts=max(1, int(os.getenv("NODE_RETRY_MAX_ATTEMPTS", "3"))),
+            base_delay=float(os.getenv("NODE_RETRY_BASE_MS", "200")) / 1000,
+            max_delay=float(os.getenv("NODE_RETRY_MAX_MS", "5000")) / 1000,
+            max_retry_after=float(os.getenv("NODE_RETRY_MAX_RETRY_AFTER_S", "30")),
+            budget=RetryBudget(
+                ratio=float(os.getenv("NODE_RETRY_BUDGET_RATIO", "0.1")),
+                min_per_second=float(os.getenv("NODE_RETRY_BUDGET_MIN_PER_S", "5"))
+            )
+        )
+
+    def backoff(self, retry: int) -> float:
+        """Full jitter: uniform over [0, min(max_delay, base * 2**retry)]"""
+        return self.rng.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** retry)))
+
+    async def call(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """Run ``send`` until it returns a non-retryable response or retries run out
+
+        The last response is returned whatever its status. The last error is
+        raised if every attempt failed to connect.
+        """
+        self.stats["calls"] += 1
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = await send()
+                error = None
+            except RETRYABLE_ERRORS as e:
+                response, error = None, e
+
+            if response is not None and response.status_code not in RETRYABLE_STATUS:
+                return response
+            delay = self._next_delay(attempt, response)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+
+            self.stats["retries"] += 1
+            reason = type(error).__name__ if error is not None else response.status_code
+            logger.info(f"Retrying Node submit after {reason} in {delay:.2f}s (attempt {attempt + 1})")
+            await asyncio.sleep(delay)
+
+    def _next_delay(self, attempt: int, response: Optional[httpx.Response]) -> Optional[float]:
+        """Delay before the next attempt, or None to give up"""
+        if attempt >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt - 1)
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                if retry_after > self.max_retry_after:
+                    self.stats["retry_after_too_long"] += 1
+                    return None
+                delay = retry_after
+        if not self.budget.withdraw():
+            self.stats["budget_exhausted"] += 1
+            return None
+        return delay
@@ -5,19 +5,85 @@ Contains all the intelligent routing heuristics and provider selection logic.
 
 import json
 import logging
+from operator import attrgetter
 from pathlib import Path
-from typing import Dict, Any, List, Optional
-from schemas import VideoRequest, RoutingDecision, VideoProvider, VideoMode, RoutingAnalysis
+from typing import Dict, Any, List, Optional, Tuple
+from schemas import VideoRequest, RoutingAnalysis
+from records import ProviderScore, RouteRecord, provider_mode
+from routing_model import RoutingModel
+from capability_index import CapabilityIndex, NoFeasibleProvider
+from provider_registry import REGISTRY
 
 logger = logging.getLogger(__name__)
 
+PROVIDER_NAMES = REGISTRY.names
+
+# Weighted total score
+SCORE_WEIGHTS = {
+    "style": 0.3,
+    "content": 0.25,
+    "duration": 0.2,
+    "quality": 0.15,
+    "cost": 0.1
+}
+
+# Score tables from the provider registry: factor value -> provider -> score
+STYLE_COMPATIBILITY = REGISTRY.style_compatibility
+CONTENT_PREFERENCES = REGISTRY.content_preferences
+
+# Short videos favor fast generators, long videos cost-effective ones
+DURATION_PREFERENCES = REGISTRY.duration_preferences
+
+# Quality requirements inferred from style
+QUALITY_REQUIREMENTS = {
+    "cinematic": "high",
+    "photorealistic": "high",
+    "documentary": "high",
+    "artistic": "creative",
+    "animation": "creative",
+    "abstract": "creative"
+}
+
+QUALITY_SCORES = {
+    ("high", "high"): 1.0,
+    ("high", "creative"): 0.8,
+    ("high", "standard"): 0.6,
+    ("creative", "creative"): 1.0,
+    ("creative", "high"): 0.9,
+    ("creative", "standard"): 0.7,
+    ("standard", "standard"): 1.0,
+    ("standard", "creative"): 0.9,
+    ("standard", "high"): 0.8
+}
+
+# Cost efficiency scores (higher is more cost-efficient)
+COST_SCORES = {
+    "very_low": 1.0,
+    "low": 0.8,
+    "medium": 0.6,
+    "high": 0.4
+}
+
+STYLE_ADAPTATIONS = REGISTRY.style_adaptations
+
 
 class ProviderRouter:
     """Intelligent provider routing with comprehensive heuristics"""
     
-    def __init__(self):
+    def __init__(self, model: Optional[RoutingModel] = None):
         self.config = self._load_config()
         self.provider_capabilities = self._load_provider_capabilities()
+        self.capability_index = CapabilityIndex(self.provider_capabilities, PROVIDER_NAMES)
+        
+        # Fitted weights and table entries override the built-in heuristics
+        self.model = model if model is not None else RoutingModel.from_env()
+        self.weights = dict(self.model.weights) if self.model else dict(SCORE_WEIGHTS)
+        self.style_overrides = self.model.style_compatibility if self.model else {}
+        model_content = self.model.content_preferences if self.model else {}
+        self.content_preferences = {
+            content_type: {**CONTENT_PREFERENCES.get(content_type, {}), **model_content.get(content_type, {})}
+            for content_type in {*CONTENT_PREFERENCES, *model_content}
+        }
     
     def _load_config(self) -> Dict[str, Any]:
         """Load routing configuration from shared config"""
@@ -52,109 +118,92 @@ class ProviderRouter:
     
     def _load_provider_capabilities(self) -> Dict[str, Dict[str, Any]]:
         """Load detailed provider capabilities"""
-        return {
-            "runway": {
-                "max_duration": 300,
-                "estimated_time_per_second": 2.0,
-                "quality": "high",
-                "strengths": ["cinematic", "photorealistic", "documentary", "corporate"],
-                "resolutions": ["1920x1080", "1080x1920", "1080x1080"],
-                "features": ["camera_movements", "photorealism", "narrative_flow"],
-                "cost_tier": "high",
-                "fallbacks": ["gemini_veo", "slideshow"]
-            },
-            "pika": {
-                "max_duration": 120,
-                "estimated_time_per_second": 1.5,
-                "quality": "creative",
-                "strengths": ["animation", "artistic", "abstract", "creative"],
-                "resolutions": ["1280x720", "720x1280", "1080x1080"],
-                "features": ["artistic_styles", "fast_generation", "experimental"],
-                "cost_tier": "medium",
-                "fallbacks": ["gemini_veo", "runway", "slideshow"]
-            },
-            "gemini_veo": {
-                "max_duration": 180,
-                "estimated_time_per_second": 1.0,
-                "quality": "creative",
-                "strengths": ["animation", "creative", "artistic", "abstract"],
-                "resolutions": ["1280x720", "720x1280", "1080x1080"],
-                "features": ["fast_generation", "creative_effects", "animation"],
-                "cost_tier": "low",
-                "fallbacks": ["pika", "runway", "slideshow"]
-            },
-            "slideshow": {
-                "max_duration": 600,
-                "estimated_time_per_second": 0.1,
-                "quality": "standard",
-                "strengths": ["educational", "presentation", "cost_effective", "long_form"],
-                "resolutions": ["1920x1080", "1080x1920", "1080x1080"],
-                "features": ["cost_effective", "voice_sync", "fast_generation", "image_generation"],
-                "cost_tier": "very_low",
-                "fallbacks": []
-            }
-        }
+        return REGISTRY.capabilities
     
-    async def route_provider(self, request: VideoRequest) -> RoutingDecision:
+    async def route_provider(self, request: VideoRequest) -> RouteRecord:
         """Main routing logic - determines optimal provider"""
         
         # If user explicitly requested a provider
         if request.preferred_provider:
-            return RoutingDecision(
-                provider=request.preferred_provider,
-                mode=VideoMode.SLIDESHOW if request.preferred_provider == VideoProvider.SLIDESHOW else VideoMode.AI_GENERATED,
-                reason=f"User explicitly requested {request.preferred_provider}",
-                confidence=1.0
-            )
-        
-        # Multi-factor routing analysis
-        routing_scores = {}
+            return self._preferred_route(request)
         
-        for provider in VideoProvider:
-            score = await self._calculate_provider_score(provider, request)
-            routing_scores[provider] = score
+        return self._decide(request, self._rank_providers(request))
+    
+    def analyze(self, request: VideoRequest) -> Tuple[RouteRecord, RoutingAnalysis]:
+        """Route a request and explain the decision from a single scoring pass"""
+        ranked = self._rank_providers(request)
+        if request.preferred_provider:
+            decision = self._preferred_route(request)
+        else:
+            decision = self._decide(request, ranked)
         
-        # Select highest scoring provider
-        best_provider = max(routing_scores.keys(), key=lambda p: routing_scores[p]["total_score"])
-        best_score = routing_scores[best_provider]
+        return decision, self._build_analysis(request, decision, ranked)
+    
+    def provider_scores(self, request: VideoRequest) -> List[ProviderScore]:
+        """Score every provider for a request, in PROVIDER_NAMES order"""
+        return [self._calculate_provider_score(provider, request) for provider in PROVIDER_NAMES]
+    
+    def feasible_providers(self, request: VideoRequest) -> Tuple[str, ...]:
+        """Providers able to meet the request's duration, aspect ratio and features at all"""
+        return self.capability_index.require(
+            request.duration, request.aspect_ratio, request.required_features or ()
+        )
+    
+    def _rank_providers(self, request: VideoRequest) -> List[ProviderScore]:
+        """Multi-factor routing analysis over feasible providers, highest scoring first"""
+        scores = [
+            self._calculate_provider_score(provider, request) for provider in self.feasible_providers(request)
+        ]
+        return sorted(scores, key=attrgetter("total_score"), reverse=True)
+    
+    def _preferred_route(self, request: VideoRequest) -> RouteRecord:
+        if request.preferred_provider not in self.feasible_providers(request):
+            rejections = self.capability_index.rejections(
+                request.duration, request.aspect_ratio, request.required_features or ()
+            )
+            raise NoFeasibleProvider(
+                f"Requested provider {request.preferred_provider} "
+                f"{' and '.join(rejections[request.preferred_provider])}",
+                rejections
+            )
+        return RouteRecord(
+            provider=request.preferred_provider,
+            mode=provider_mode(request.preferred_provider),
+            reason=f"User explicitly requested {request.preferred_provider}",
+            confidence=1.0
+        )
+    
+    def _decide(self, request: VideoRequest, ranked: List[ProviderScore]) -> RouteRecord:
+        """Turn ranked provider scores into a routing decision"""
+        best_score = ranked[0]
+        best_provider = best_score.provider
         
         # Determine fallback
-        sorted_providers = sorted(routing_scores.items(), key=lambda x: x[1]["total_score"], reverse=True)
-        fallback_provider = sorted_providers[1][0] if len(sorted_providers) > 1 else None
+        fallback_provider = ranked[1].provider if len(ranked) > 1 else None
         
         # Get adaptations if needed
-        adaptations = self._get_style_adaptations(request.style.value, best_provider.value)
+        adaptations = self._get_style_adaptations(request.style, best_provider)
         
-        return RoutingDecision(
+        return RouteRecord(
             provider=best_provider,
-            mode=VideoMode.SLIDESHOW if best_provider == VideoProvider.SLIDESHOW else VideoMode.AI_GENERATED,
-            reason=best_score["reason"],
-            confidence=best_score["total_score"],
+            mode=provider_mode(best_provider),
+            reason=self._generate_routing_reason(best_provider, best_score.primary_factor, request),
+            confidence=best_score.total_score,
             fallback_provider=fallback_provider,
             adaptations=adaptations if adaptations else None
         )
     
-    async def _calculate_provider_score(self, provider: VideoProvider, request: VideoRequest) -> Dict[str, Any]:
+    def _calculate_provider_score(self, provider: str, request: VideoRequest) -> ProviderScore:
         """Calculate comprehensive scoring for provider selection"""
         
-        capabilities = self.provider_capabilities.get(provider.value, {})
-        
         # Base scores (0-1 scale)
-        style_score = self._score_style_match(provider, request.style.value)
+        style_score = self._score_style_match(provider, request.style)
         content_score = self._score_content_match(provider, request.content_type)
         duration_score = self._score_duration_optimization(provider, request.duration)
         quality_score = self._score_quality_requirements(provider, request)
         cost_score = self._score_cost_efficiency(provider, request)
         
-        # Weighted total score
-        weights = {
-            "style": 0.3,
-            "content": 0.25,
-            "duration": 0.2,
-            "quality": 0.15,
-            "cost": 0.1
-        }
-        
+        weights = self.weights
         total_score = (
             style_score * weights["style"] +
             content_score * weights["content"] +
@@ -163,120 +212,55 @@ class ProviderRouter:
             cost_score * weights["cost"]
         )
         
-        # Generate human-readable reason
-        primary_factor = max([
-            ("style", style_score),
-            ("content", content_score),
-            ("duration", duration_score),
-            ("quality", quality_score),
-            ("cost", cost_score)
-        ], key=lambda x: x[1])
-        
-        reason = self._generate_routing_reason(provider, primary_factor, request)
-        
-        return {
-            "total_score": total_score,
-            "style_score": style_score,
-            "content_score": content_score,
-            "duration_score": duration_score,
-            "quality_score": quality_score,
-            "cost_score": cost_score,
-            "reason": reason,
-            "primary_factor": primary_factor[0]
-        }
+        # Primary factor drives the human-readable reason (first wins on ties)
+        primary_factor, primary_value = "style", style_score
+        if content_score > primary_value:
+            primary_factor, primary_value = "content", content_score
+        if duration_score > primary_value:
+            primary_factor, primary_value = "duration", duration_score
+        if quality_score > primary_value:
+            primary_factor, primary_value = "quality", quality_score
+        if cost_score > primary_value:
+            primary_factor = "cost"
+        
+        return ProviderScore(
+            provider=provider,
+            total_score=total_score,
+            style_score=style_score,
+            content_score=content_score,
+            duration_score=duration_score,
+            quality_score=quality_score,
+            cost_score=cost_score,
+            primary_factor=primary_factor
+        )
     
-    def _score_style_match(self, provider: VideoProvider, style: str) -> float:
+    def _score_style_match(self, provider: str, style: str) -> float:
         """Score how well provider matches the requested style"""
-        capabilities = self.provider_capabilities.get(provider.value, {})
-        strengths = capabilities.get("strengths", [])
+        override = self.style_overrides.get(style, {}).get(provider)
+        if override is not None:
+            return override
+        
+        strengths = self.provider_capabilities.get(provider, {}).get("strengths", [])
         
         # Direct match
         if style in strengths:
             return 1.0
         
-        # Style compatibility matrix
-        style_compatibility = {
-            "cinematic": {
-                "runway": 1.0,
-                "gemini_veo": 0.7,
-                "pika": 0.6,
-                "slideshow": 0.3
-            },
-            "photorealistic": {
-                "runway": 1.0,
-                "gemini_veo": 0.6,
-                "pika": 0.5,
-                "slideshow": 0.4
-            },
-            "animation": {
-                "pika": 1.0,
-                "gemini_veo": 0.9,
-                "runway": 0.6,
-                "slideshow": 0.7
-            },
-            "artistic": {
-                "pika": 1.0,
-                "gemini_veo": 0.9,
-                "runway": 0.5,
-                "slideshow": 0.6
-            },
-            "abstract": {
-                "pika": 1.0,
-                "gemini_veo": 0.9,
-                "runway": 0.4,
-                "slideshow": 0.5
-            },
-            "documentary": {
-                "runway": 1.0,
-                "slideshow": 0.8,
-                "gemini_veo": 0.6,
-                "pika": 0.4
-            }
-        }
-        
-        return style_compatibility.get(style, {}).get(provider.value, 0.5)
+        return STYLE_COMPATIBILITY.get(style, {}).get(provider, 0.5)
     
-    def _score_content_match(self, provider: VideoProvider, content_type: Optional[str]) -> float:
+    def _score_content_match(self, provider: str, content_type: Optional[str]) -> float:
         """Score based on content type optimization"""
         if not content_type:
             return 0.7  # neutral score
         
-        content_preferences = {
-            "educational": {
-                "slideshow": 1.0,
-                "runway": 0.7,
-                "gemini_veo": 0.6,
-                "pika": 0.5
-            },
-            "entertainment": {
-                "pika": 1.0,
-                "gemini_veo": 0.9,
-                "runway": 0.8,
-                "slideshow": 0.4
-            },
-            "corporate": {
-                "runway": 1.0,
-                "slideshow": 0.8,
-                "gemini_veo": 0.6,
-                "pika": 0.4
-            },
-            "creative": {
-                "pika": 1.0,
-                "gemini_veo": 0.9,
-                "runway": 0.6,
-                "slideshow": 0.5
-            }
-        }
-        
-        return content_preferences.get(content_type, {}).get(provider.value, 0.6)
+        return self.content_preferences.get(content_type, {}).get(provider, 0.6)
     
-    def _score_duration_optimization(self, provider: VideoProvider, duration: Optional[int]) -> float:
+    def _score_duration_optimization(self, provider: str, duration: Optional[int]) -> float:
         """Score based on duration optimization"""
         if not duration:
             return 0.7  # neutral score
         
-        capabilities = self.provider_capabilities.get(provider.value, {})
-        max_duration = capabilities.get("max_duration", 300)
+        max_duration = self.provider_capabilities.get(provider, {}).get("max_duration", 300)
         
         # Can't handle the duration
         if duration > max_duration:
@@ -284,78 +268,27 @@ class ProviderRouter:
         
         # Duration-based optimization
         if duration <= 30:
-            # Short videos - favor fast generators
-            speed_preference = {
-                "gemini_veo": 1.0,
-                "pika": 0.9,
-                "slideshow": 0.8,
-                "runway": 0.7
-            }
+            bucket = "short"
         elif duration <= 120:
-            # Medium videos - balanced approach
-            speed_preference = {
-                "runway": 1.0,
-                "gemini_veo": 0.9,
-                "pika": 0.9,
-                "slideshow": 0.8
-            }
+            bucket = "medium"
         else:
-            # Long videos - favor cost-effective options
-            speed_preference = {
-                "slideshow": 1.0,
-                "gemini_veo": 0.7,
-                "pika": 0.6,
-                "runway": 0.5
-            }
+            bucket = "long"
         
-        return speed_preference.get(provider.value, 0.6)
+        return DURATION_PREFERENCES.get(bucket, {}).get(provider, 0.6)
     
-    def _score_quality_requirements(self, provider: VideoProvider, request: VideoRequest) -> float:
+    def _score_quality_requirements(self, provider: str, request: VideoRequest) -> float:
         """Score based on quality requirements"""
-        capabilities = self.provider_capabilities.get(provider.value, {})
-        quality = capabilities.get("quality", "standard")
-        
-        # Infer quality requirements from style and content
-        quality_requirements = {
-            "cinematic": "high",
-            "photorealistic": "high", 
-            "documentary": "high",
-            "artistic": "creative",
-            "animation": "creative",
-            "abstract": "creative"
-        }
-        
-        required_quality = quality_requirements.get(request.style.value, "standard")
-        
-        quality_scores = {
-            ("high", "high"): 1.0,
-            ("high", "creative"): 0.8,
-            ("high", "standard"): 0.6,
-            ("creative", "creative"): 1.0,
-            ("creative", "high"): 0.9,
-            ("creative", "standard"): 0.7,
-            ("standard", "standard"): 1.0,
-            ("standard", "creative"): 0.9,
-            ("standard", "high"): 0.8
-        }
+        quality = self.provider_capabilities.get(provider, {}).get("quality", "standard")
+        required_quality = QUALITY_REQUIREMENTS.get(request.style, "standard")
         
-        return quality_scores.get((required_quality, quality), 0.7)
+        return QUALITY_SCORES.get((required_quality, quality), 0.7)
     
-    def _score_cost_efficiency(self, provider: VideoProvider, request: VideoRequest) -> float:
+    def _score_cost_efficiency(self, provider: str, request: VideoRequest) -> float:
         """Score based on cost efficiency"""
-        capabilities = self.provider_capabilities.get(provider.value, {})
-        cost_tier = capabilities.get("cost_tier", "medium")
-        
-        # Cost efficiency scores (higher is more cost-efficient)
-        cost_scores = {
-            "very_low": 1.0,
-            "low": 0.8,
-            "medium": 0.6,
-            "high": 0.4
-        }
+        cost_tier = self.provider_capabilities.get(provider, {}).get("cost_tier", "medium")
         
         # Adjust based on priority
-        base_score = cost_scores.get(cost_tier, 0.6)
+        base_score = COST_SCORES.get(cost_tier, 0.6)
         
         if request.priority == "low":
             return base_score  # Cost matters more
@@ -364,50 +297,24 @@ class ProviderRouter:
         
         return base_score
     
-    def _generate_routing_reason(self, provider: VideoProvider, primary_factor: tuple, request: VideoRequest) -> str:
+    def _generate_routing_reason(self, provider: str, factor_name: str, request: VideoRequest) -> str:
         """Generate human-readable routing reason"""
-        factor_name, score = primary_factor
-        
-        reasons = {
-            "style": f"{provider.value} excels at {request.style.value} style content",
-            "content": f"{provider.value} is optimized for {request.content_type} content",
-            "duration": f"{provider.value} is optimal for {request.duration}s duration videos",
-            "quality": f"{provider.value} provides the quality level needed for {request.style.value}",
-            "cost": f"{provider.value} offers the most cost-effective solution"
-        }
-        
-        return reasons.get(factor_name, f"{provider.value} selected based on comprehensive analysis")
+        if factor_name == "style":
+            return f"{provider} excels at {request.style} style content"
+        if factor_name == "content":
+            return f"{provider} is optimized for {request.content_type} content"
+        if factor_name == "duration":
+            return f"{provider} is optimal for {request.duration}s duration videos"
+        if factor_name == "quality":
+            return f"{provider} provides the quality level needed for {request.style}"
+        if factor_name == "cost":
+            return f"{provider} offers the most cost-effective solution"
+        
+        return f"{provider} selected based on comprehensive analysis"
     
     def _get_style_adaptations(self, style: str, provider: str) -> Optional[Dict[str, str]]:
         """Get style adaptations when routing to non-optimal provider"""
-        adaptations = {
-            "cinematic": {
-                "gemini_veo": {
-                    "prompt_enhancement": "cinematic style with dramatic camera angles and professional lighting",
-                    "duration_adjustment": "Consider shorter duration for optimal quality"
-                },
-                "pika": {
-                    "prompt_enhancement": "cinematic style with dramatic lighting and camera movements",
-                    "quality_note": "May have more artistic interpretation than pure cinematic"
-                },
-                "slideshow": {
-                    "image_style": "cinematic photography style with dramatic lighting",
-                    "transition_effects": "Use cross-fades and professional transitions"
-                }
-            },
-            "animation": {
-                "runway": {
-                    "prompt_enhancement": "animated style with smooth motion and cartoon-like elements",
-                    "style_note": "May be more realistic than pure animation"
-                },
-                "slideshow": {
-                    "image_style": "cartoon and animated illustration style",
-                    "sequence_timing": "Use quick transitions to simulate animation"
-                }
-            }
-        }
-        
-        return adaptations.get(style, {}).get(provider)
+        return STYLE_ADAPTATIONS.get(style, {}).get(provider)
     
     async def get_provider_capabilities(self) -> Dict[str, Any]:
         """Return all provider capabilities"""
@@ -415,13 +322,75 @@ class ProviderRouter:
     
     def get_routing_analysis(self, request: VideoRequest) -> RoutingAnalysis:
         """Get detailed routing analysis without executing"""
-        # This would be implemented to provide detailed analysis
+        return self.analyze(request)[1]
+    
+    def _build_analysis(self, request: VideoRequest, decision: RouteRecord,
+                        ranked: List[ProviderScore]) -> RoutingAnalysis:
+        """Explain a routing decision using the scores it was made from"""
+        chosen = next(score for score in ranked if score.provider == decision.provider)
+        best = ranked[0]
+        factors = chosen.factor_scores()
+        
+        # Factors ordered by their weighted contribution to the chosen provider's score
+        primary_factors = sorted(factors, key=lambda f: factors[f] * self.weights[f], reverse=True)
+        
+        alternatives = [
+            {
+                "provider": score.provider,
+                "rank": rank,
+                "total_score": round(score.total_score, 4),
+                "score_delta": round(chosen.total_score - score.total_score, 4),
+                "primary_factor": score.primary_factor,
+                "factor_scores": score.factor_scores()
+            }
+            for rank, score in enumerate(ranked, start=1)
+            if score.provider != chosen.provider
+        ]
+        
         return RoutingAnalysis(
-            primary_factors=["style", "content_type", "duration"],
-            style_match_score=0.9,
-            content_type_match_score=0.8,
-            duration_optimization_score=0.7,
-            provider_availability_score=1.0,
-            alternatives=[],
-            recommendations=[]
-        )
\ No newline at end of file
+            primary_factors=primary_factors,
+            style_match_score=chosen.style_score,
+            content_type_match_score=chosen.content_score,
+            duration_optimization_score=chosen.duration_score,
+            provider_availability_score=len(ranked) / len(PROVIDER_NAMES),
+            total_score=round(chosen.total_score, 4),
+            factor_scores=factors,
+            alternatives=alternatives,
+            recommendations=self._recommendations(request, decision, chosen, best, ranked)
+        )
+    
+    def _recommendations(self, request: VideoRequest, decision: RouteRecord, chosen: ProviderScore,
+                         best: ProviderScore, ranked: List[ProviderScore]) -> List[str]:
+        """Actionable notes derived from the scoring pass"""
+        recommendations = []
+        
+        if chosen is not best:
+            recommendations.append(
+                f"Requested provider {chosen.provider} scores {best.total_score - chosen.total_score:.2f} "
+                f"below {best.provider}; drop preferred_provider to use the best match"
+            )
+        
+        runner_up = ranked[1] if chosen is best and len(ranked) > 1 else None
+        if runner_up and chosen.total_score - runner_up.total_score < 0.05:
+            recommendations.append(
+                f"Close call between {chosen.provider} and {runner_up.provider} "
+                f"(delta {chosen.total_score - runner_up.total_score:.3f}); either should work"
+            )
+        
+        rejections = self.capability_index.rejections(
+            request.duration, request.aspect_ratio, request.required_features or ()
+        )
+        for provider, reasons in rejections.items():
+            recommendations.append(f"{provider} {' and '.join(reasons)}")
+        if not request.duration:
+            recommendations.append("Specify a duration to enable duration-based optimization")
+        
+        if not request.content_type:
+            recommendations.append("Set content_type to sharpen content-based routing")
+        
+        if decision.adaptations:
+            recommendations.append(
+                f"{decision.provider} is not a native fit for {request.style}; style adaptations will be applied"
+            )
+        
+        return recommendations
@@ -0,0 +1,101 @@
+"""
+Versioned routing model files.
+
+A routing model overrides ProviderRouter's score weights and, optionally,
+entries of its style compatibility and content preference tables. Models are
+produced offline by ``cli.py fit`` and loaded by the router at startup from
+ROUTING_MODEL_PATH; anything the model doesn't set keeps its built-in value.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+FACTORS = ("style", "content", "duration", "quality", "cost")
+
+
+class RoutingModelError(ValueError):
+    """Raised when a routing model file is malformed"""
+
+
+@dataclass
+class RoutingModel:
+    """Score weights and table overrides for ProviderRouter"""
+    weights: Dict[str, float]
+    style_compatibility: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    content_preferences: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    version: Optional[str] = None
+    created_at: Optional[str] = None
+    training: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        missing = set(FACTORS) - set(self.weights)
+        unknown = set(self.weights) - set(FACTORS)
+        if missing or unknown:
+            raise RoutingModelError(f"Weights must cover exactly {FACTORS} (missing {sorted(missing)}, "
+                                    f"unknown {sorted(unknown)})")
+        if any(w < 0 for w in self.weights.values()) or sum(self.weights.values()) <= 0:
+            raise RoutingModelError("Weights must be non-negative and not all zero")
+        for name, table in (("style_compatibility", self.style_compatibility),
+                            ("content_preferences", self.content_preferences)):
+            for key, scores in table.items():
+                if any(not 0.0 <= s <= 1.0 for s in scores.values()):
+                    raise RoutingModelError(f"{name}[{key}] scores must be within [0, 1]")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "version": self.version,
+            "created_at": self.created_at,
+            "weights": self.weights,
+            "style_compatibility": self.style_compatibility,
+            "content_preferences": self.content_preferences,
+            "training": self.training
+        }
+
+    def save(self, path: str) -> str:
+        """Stamp a content-derived version, write the model and return the version"""
+        self.created_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        content = json.dumps(
+            [self.weights, self.style_compatibility, self.content_preferences], sort_keys=True
+        )
+        self.version = f"{self.created_at[:10]}-{hashlib.sha256(content.encode()).hexdigest()[:8]}"
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, sort_keys=False)
+        return self.version
+
+    @classmethod
+    def load(cls, path: str) -> "RoutingModel":
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("schema_version") != SCHEMA_VERSION:
+            raise RoutingModelError(f"Unsupported routing model schema {data.get('schema_version')!r}")
+        return cls(
+            weights={k: float(v) for k, v in data["weights"].items()},
+            style_compatibility=data.get("style_compatibility") or {},
+            content_preferences=data.get("content_preferences") or {},
+            version=data.get("version"),
+            created_at=data.get("created_at"),
+            training=data.get("training") or {}
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional["RoutingModel"]:
+        """Model named by ROUTING_MODEL_PATH, or None to use built-in weights"""
+        path = os.getenv("ROUTING_MODEL_PATH")
+        if not path:
+            return None
+        try:
+            model = cls.load(path)
+        except Exception as e:
+            logger.error(f"Failed to load routing model {path}, using built-in weights: {e}")
+            return None
+        logger.info(f"Loaded routing model {model.version} from {path}")
+        return model
@@ -6,6 +6,8 @@ from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 from enum import Enum
 
+from provider_registry import REGISTRY
+
 
 class VideoStyle(str, Enum):
     CINEMATIC = "cinematic"
@@ -18,11 +20,8 @@ class VideoStyle(str, Enum):
     SLIDESHOW_CLASSIC = "slideshow_classic"
 
 
-class VideoProvider(str, Enum):
-    RUNWAY = "runway"
-    PIKA = "pika"
-    GEMINI_VEO = "gemini_veo"
-    SLIDESHOW = "slideshow"
+# One member per registered provider or model variant, e.g. VideoProvider.GEMINI_VEO
+VideoProvider = Enum("VideoProvider", {name.upper(): name for name in REGISTRY.names}, type=str)
 
 
 class VideoMode(str, Enum):
@@ -47,6 +46,15 @@ class VideoRequest(BaseModel):
     # Provider override (optional)
     preferred_provider: Optional[VideoProvider] = None
     
+    # Provider features the video needs (e.g. voice_sync); providers without them are never chosen
+    required_features: Optional[List[str]] = None
+    
+    # Job whose images and script may be reused (set by batch near-duplicate detection)
+    reuse_assets_from: Optional[str] = None
+    
+    # Set to False to always submit a fresh generation instead of reusing a cached result
+    use_cache: bool = True
+    
     class Config:
         use_enum_values = True
 
@@ -83,6 +91,8 @@ class OrchestrationResponse(BaseModel):
     mode: VideoMode
     routing_reason: str
     estimated_duration: Optional[str] = None
+    fallback_used: bool = False
+    cached: bool = False
     node_api_response: Dict[str, Any]
     
     class Config:
@@ -117,5 +127,7 @@ class RoutingAnalysis(BaseModel):
     content_type_match_score: float
     duration_optimization_score: float
     provider_availability_score: float
+    total_score: Optional[float] = None
+    factor_scores: Dict[str, float] = {}
     alternatives: List[Dict[str, Any]]
     recommendations: List[str]
\ No newline at end of file
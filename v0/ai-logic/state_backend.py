@@ -0,0 +1,503 @@
+"""
+State shared between ai-logic replicas.
+
+Behind a load balancer, each replica would otherwise probe provider health,
+fill the result cache and count tenant rate limits on its own. StateBackend
+is a small key-value interface with expiry, atomic counters and
+set-if-absent, which is enough for leases. There are three implementations:
+
+    memory                          in-process dict; one replica, nothing shared
+    sqlite:///var/lib/ai/state.db   SQLite file shared by replicas on one host
+    redis://[:password@]host:6379/0 Redis, or any server speaking its protocol
+
+SharedState wraps a backend with a key prefix, JSON values and a near-cache.
+Reads are served locally for ``near_ttl`` seconds, so a hot key costs one
+backend round trip per second per replica, not one per request. Values can
+therefore be up to ``near_ttl`` stale. Counters and set-if-absent always go
+to the backend.
+
+redis_simulator.py is a local stand-in that speaks enough of the Redis
+protocol to run against RespBackend without a Redis server.
+
+Configuration (environment):
+    STATE_BACKEND       memory, sqlite:///path or redis://host:port/db (default off)
+    STATE_PREFIX        key prefix, so deployments can share a server (default ai-logic:)
+    STATE_NEAR_CACHE_S  seconds a read is served from the local near-cache (default 1)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+# Writes between sweeps of expired keys
+SWEEP_EVERY = 1024
+
+
+class StateBackendError(Exception):
+    """The state backend is unreachable or rejected a command"""
+
+
+class StateBackend(ABC):
+    """Key-value store with expiry; values are strings and ttl is in seconds"""
+
+    name = "base"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        """Store ``value``; with ``nx``, only if the key is absent. Returns whether it was stored"""
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Add to an integer counter, creating it at 0 with ``ttl`` if absent"""
+
+    @abstractmethod
+    async def expire(self, key: str, ttl: float) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryBackend(StateBackend):
+    """Process-local backend; also the store behind redis_simulator"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._writes = 0
+
+    def _live(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def _store(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        self._data[key] = (value, expires_at)
+        self._writes += 1
+        if self._writes % SWEEP_EVERY == 0:
+            now = time.monotonic()
+            for stale in [k for k, (_, exp) in self._data.items() if exp is not None and exp <= now]:
+                del self._data[stale]
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._live(key)
+        return entry[0] if entry else None
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        if nx and self._live(key) is not None:
+            return False
+        self._store(key, value, time.monotonic() + ttl if ttl else None)
+        return True
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        entry = self._live(key)
+        if entry is None:
+            value, expires_at = amount, (time.monotonic() + ttl if ttl else None)
+        else:
+            try:
+                value, expires_at = int(entry[0]) + amount, entry[1]
+            except ValueError:
+                raise StateBackendError(f"{key} is not an integer")
+        self._store(key, str(value), expires_at)
+        return value
+
+    async def expire(self, key: str, ttl: float) -> bool:
+        entry = self._live(key)
+        if entry is None:
+            return False
+        self._data[key] = (entry[0], time.monotonic() + ttl)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def flush(self) -> None:
+        self._data.clear()
+
+
+class SQLiteBackend(StateBackend):
+    """Backend in a SQLite file, shared by the replicas on one host
+
+    Calls run in a worker thread so a writer holding the file lock doesn't
+    stall the event loop. Expiry uses wall-clock time, which every process
+    on the host agrees on.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+
+    async def _run(self, fn, *args):
+        try:
+            return await asyncio.to_thread(self._locked, fn, *args)
+        except sqlite3.Error as e:
+            raise StateBackendError(f"SQLite state backend: {e}") from e
+
+    def _locked(self, fn, *args):
+        with self._lock:
+            return fn(*args)
+
+    def _transaction(self, fn, *args):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(*args)
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        self._writes += 1
+        if self._writes % SWEEP_EVERY == 0:
+            self._conn.execute("DELETE FROM state WHERE expires_at <= ?", (time.time(),))
+        return result
+
+    def _live(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        return self._conn.execute(
+            "SELECT value, expires_at FROM state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+
+    def _upsert(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        self._conn.execute(
+            "INSERT INTO state (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, value, expires_at)
+        )
+
+    def _set(self, key: str, value: str, ttl: Optional[float], nx: bool) -> bool:
+        if nx and self._live(key) is not None:
+            return False
+        self._upsert(key, value, time.time() + ttl if ttl else None)
+        return True
+
+    def _incr(self, key: str, amount: int, ttl: Optional[float]) -> int:
+        row = self._live(key)
+        if row is None:
+            value, expires_at = amount, (time.time() + ttl if ttl else None)
+        else:
+            try:
+                value, expires_at = int(row[0]) + amount, row[1]
+            except ValueError:
+                raise StateBackendError(f"{key} is not an integer")
+        self._upsert(key, str(value), expires_at)
+        return value
+
+    def _expire(self, key: str, ttl: float) -> bool:
+        cursor = self._conn.execute(
+            "UPDATE state SET expires_at = ? WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (time.time() + ttl, key, time.time())
+        )
+        return cursor.rowcount > 0
+
+    async def get(self, key: str) -> Optional[str]:
+        row = await self._run(self._live, key)
+        return row[0] if row else None
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        return await self._run(self._transaction, self._set, key, value, ttl, nx)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        return await self._run(self._transaction, self._incr, key, amount, ttl)
+
+    async def expire(self, key: str, ttl: float) -> bool:
+        return await self._run(self._expire, key, ttl)
+
+    async def delete(self, key: str) -> None:
+        await self._run(self._conn.execute, "DELETE FROM state WHERE key = ?", (key,))
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._locked, self._conn.close)
+
+
+def encode_command(*args: Any) -> bytes:
+    """RESP array of bulk strings"""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """One RESP2 reply; error replies raise StateBackendError"""
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed mid-reply")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        raise StateBackendError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise ConnectionError(f"Unexpected RESP reply type {kind!r}")
+
+
+class RespBackend(StateBackend):
+    """Redis protocol (RESP2) client with a small connection pool
+
+    After a connection failure, commands fail fast for ``down_for`` seconds
+    instead of each waiting out the timeout.
+    """
+
+    name = "redis"
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, pool_size: int = 8, timeout: float = 1.0,
+                 down_for: float = 1.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.down_for = down_for
+        self._down_until = 0.0
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(pool_size)
+
+    @classmethod
+    def from_url(cls, url: str) -> "RespBackend":
+        parsed = urlparse(url)
+        path = parsed.path.strip("/")
+        return cls(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(path) if path else 0,
+            password=unquote(parsed.password) if parsed.password else None
+        )
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            if self.password:
+                writer.write(encode_command("AUTH", self.password))
+                await read_reply(reader)
+            if self.db:
+                writer.write(encode_command("SELECT", self.db))
+                await read_reply(reader)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def command(self, *args: Any) -> Any:
+        return (await self.pipeline([args]))[0]
+
+    async def pipeline(self, commands: List[Tuple[Any, ...]]) -> List[Any]:
+        """Send several commands in one write and read their replies in order
+
+        An error reply to any of them raises StateBackendError once all the
+        replies have been read, so the connection stays usable.
+        """
+        if self._down_until > time.monotonic():
+            raise StateBackendError(f"Redis at {self.host}:{self.port} is marked down")
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            try:
+                if connection is None:
+                    try:
+                        connection = await asyncio.wait_for(self._connect(), self.timeout)
+                    except StateBackendError as e:
+                        # AUTH or SELECT rejected; retrying every command won't fix that
+                        self._down_until = time.monotonic() + self.down_for
+                        raise StateBackendError(f"Redis at {self.host}:{self.port}: {e}") from e
+                reader, writer = connection
+                writer.write(b"".join(encode_command(*args) for args in commands))
+                replies = []
+                for _ in commands:
+                    try:
+                        replies.append(await asyncio.wait_for(read_reply(reader), self.timeout))
+                    except StateBackendError as e:
+                        replies.append(e)
+            except StateBackendError:
+                raise
+            except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                if connection is not None:
+                    connection[1].close()
+                self._down_until = time.monotonic() + self.down_for
+                raise StateBackendError(f"Redis at {self.host}:{self.port}: {type(e).__name__} {e}") from e
+            except BaseException:
+                # Cancelled mid-command; the reply may still arrive, so don't reuse the connection
+                if connection is not None:
+                    connection[1].close()
+                raise
+            self._idle.append(connection)
+        for reply in replies:
+            if isinstance(reply, StateBackendError):
+                raise reply
+        return replies
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.command("GET", key)
+        return value.decode() if value is not None else None
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        args = ["SET", key, value]
+        if ttl:
+            args += ["PX", max(1, int(ttl * 1000))]
+        if nx:
+            args.append("NX")
+        return await self.command(*args) is not None
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        if not ttl:
+            return await self.command("INCRBY", key, amount)
+        # Create the counter with its expiry first, so it can never be left without one
+        _, value = await self.pipeline([("SET", key, 0, "PX", max(1, int(ttl * 1000)), "NX"),
+                                        ("INCRBY", key, amount)])
+        return value
+
+    async def expire(self, key: str, ttl: float) -> bool:
+        return await self.command("PEXPIRE", key, max(1, int(ttl * 1000))) == 1
+
+    async def delete(self, key: str) -> None:
+        await self.command("DEL", key)
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+
+def create_backend(url: str) -> StateBackend:
+    """Backend for a STATE_BACKEND value"""
+    if url in ("memory", "memory://"):
+        return MemoryBackend()
+    if url.startswith("sqlite://"):
+        return SQLiteBackend(url[len("sqlite://"):])
+    if url.startswith("redis://"):
+        return RespBackend.from_url(url)
+    raise ValueError(f"Unknown state backend {url!r}; use memory, sqlite:///path or redis://host:port/db")
+
+
+_MISSING = object()
+
+
+class SharedState:
+    """Prefixed JSON view of a StateBackend whose reads go through a near-cache"""
+
+    def __init__(self, backend: StateBackend, prefix: str = "ai-logic:", near_ttl: float = 1.0,
+                 max_entries: int = 10000):
+        self.backend = backend
+        self.prefix = prefix
+        self.near_ttl = near_ttl
+        self.max_entries = max_entries
+        self._near: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.stats = {"near_hits": 0, "reads": 0, "writes": 0, "errors": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["SharedState"]:
+        url = os.getenv("STATE_BACKEND")
+        if not url:
+            return None
+        return cls(
+            create_backend(url),
+            prefix=os.getenv("STATE_PREFIX", "ai-logic:"),
+            near_ttl=float(os.getenv("STATE_NEAR_CACHE_S", "1"))
+        )
+
+    async def get(self, key: str, fresh: bool = False) -> Any:
+        """JSON value of ``key`` or None; ``fresh`` skips the near-cache"""
+        if not fresh:
+            entry = self._near.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.stats["near_hits"] += 1
+                return None if entry[1] is _MISSING else entry[1]
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            raw = await self._call(self.backend.get(self.prefix + key))
+            self.stats["reads"] += 1
+            value = json.loads(raw) if raw is not None else None
+        except BaseException as e:
+            future.set_exception(e if isinstance(e, Exception) else StateBackendError("Read was cancelled"))
+            future.exception()
+            raise
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        self._remember(key, _MISSING if value is None else value)
+        future.set_result(value)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        stored = await self._call(self.backend.set(self.prefix + key, json.dumps(value), ttl, nx))
+        self.stats["writes"] += 1
+        if stored:
+            self._remember(key, value)
+        return stored
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        self.stats["writes"] += 1
+        return await self._call(self.backend.incr(self.prefix + key, amount, ttl))
+
+    async def delete(self, key: str) -> None:
+        self._near.pop(key, None)
+        await self._call(self.backend.delete(self.prefix + key))
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def info(self) -> Dict[str, Any]:
+        return {"backend": self.backend.name, "near_cache_s": self.near_ttl,
+                "near_entries": len(self._near), **self.stats}
+
+    async def _call(self, op):
+        try:
+            return await op
+        except StateBackendError:
+            self.stats["errors"] += 1
+            raise
+
+    def _remember(self, key: str, value: Any) -> None:
+        if self.near_ttl <= 0:
+            return
+        self._near[key] = (time.monotonic() + self.near_ttl, value)
+        self._near.move_to_end(key)
+        while len(self._near) > self.max_entries:
+            self._near.popitem(last=False)
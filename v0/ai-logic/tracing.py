@@ -0,0 +1,292 @@
+"""
+Span-level tracing for orchestrations.
+
+Each orchestration is recorded as a trace of spans (route, health, prepare,
+node_submit, ...). The W3C ``traceparent`` header is honoured on the way in
+and propagated to the Node API so ai-logic and Node timings can be joined.
+
+Sampling is decided twice: a head decision when the trace starts (parent
+flag or TRACE_SAMPLE_RATE) and a tail decision when it ends, which always
+keeps traces slower than TRACE_SLOW_MS or that recorded an error.
+
+Configuration (environment):
+    TRACE_EXPORT       file:/path/traces.jsonl or an OTLP/HTTP collector URL
+                       such as http://localhost:4318/v1/traces. Unset disables tracing.
+    TRACE_SAMPLE_RATE  head sampling probability (default 0.1)
+    TRACE_SLOW_MS      tail sampling latency threshold (default 1000)
+"""
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "ai-logic"
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Trace:
+    """Spans collected for one trace until the tail sampling decision"""
+    __slots__ = ("trace_id", "head_sampled", "remote_parent_id", "spans", "error")
+
+    def __init__(self, trace_id: str, head_sampled: bool, remote_parent_id: Optional[str] = None):
+        self.trace_id = trace_id
+        self.head_sampled = head_sampled
+        self.remote_parent_id = remote_parent_id
+        self.spans: List["Span"] = []
+        self.error = False
+
+
+class Span:
+    """A single timed operation within a trace"""
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.error = f"{type(error).__name__}: {error}"
+        self.trace.error = True
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        flags = "01" if self.trace.head_sampled else "00"
+        return f"00-{self.trace.trace_id}-{self.span_id}-{flags}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+class _NoopSpan:
+    """Stand-in yielded when tracing is disabled"""
+    __slots__ = ()
+    traceparent = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def parse_traceparent(header: Optional[str]):
+    """Parse a W3C traceparent header into (trace_id, parent_id, sampled)"""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 0x01)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], sampled
+
+
+class SpanExporter(ABC):
+    """Exports finished traces from a background thread so the event loop never blocks"""
+
+    def __init__(self, max_queue: int = 10000):
+        self._queue: "queue.Queue[List[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name=f"{type(self).__name__}", daemon=True)
+        self._thread.start()
+
+    def submit(self, spans: List[Dict[str, Any]]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 256:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.export(batch)
+            except Exception as e:
+                logger.warning(f"Trace export failed: {e}")
+
+    @abstractmethod
+    def export(self, traces: List[List[Dict[str, Any]]]) -> None:
+        ...
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends one JSON line per trace to a local file"""
+
+    def __init__(self, path: str, **kwargs):
+        self.path = path
+        super().__init__(**kwargs)
+
+    def export(self, traces: List[List[Dict[str, Any]]]) -> None:
+        with open(self.path, "a") as f:
+            for spans in traces:
+                f.write(json.dumps({"trace_id": spans[0]["trace_id"], "spans": spans}) + "\n")
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """Posts traces to an OTLP/HTTP collector using the JSON encoding"""
+
+    def __init__(self, endpoint: str, **kwargs):
+        self.endpoint = endpoint
+        self._client = httpx.Client(timeout=5.0)
+        super().__init__(**kwargs)
+
+    def export(self, traces: List[List[Dict[str, Any]]]) -> None:
+        spans = [self._to_otlp(span) for trace in traces for span in trace]
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": SERVICE_NAME}}
+                ]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}]
+            }]
+        }
+        self._client.post(self.endpoint, json=payload)
+
+    @staticmethod
+    def _to_otlp(span: Dict[str, Any]) -> Dict[str, Any]:
+        end_ns = span["start_ns"] + int(span["duration_ms"] * 1e6)
+        otlp = {
+            "traceId": span["trace_id"],
+            "spanId": span["span_id"],
+            "name": span["name"],
+            "kind": 1,
+            "startTimeUnixNano": str(span["start_ns"]),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": [
+                {"key": k, "value": {"stringValue": str(v)}} for k, v in span["attributes"].items()
+            ],
+            "status": {"code": 2, "message": span["error"]} if span["error"] else {"code": 1}
+        }
+        if span["parent_id"]:
+            otlp["parentSpanId"] = span["parent_id"]
+        return otlp
+
+
+class Tracer:
+    """Creates spans, propagates context and applies head and tail sampling"""
+
+    def __init__(self, exporter: Optional[SpanExporter] = None, sample_rate: float = 0.1,
+                 slow_ms: float = 1000.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.stats = {"traces": 0, "exported": 0, "tail_kept": 0}
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        target = os.getenv("TRACE_EXPORT")
+        exporter = None
+        if target:
+            if target.startswith("file:"):
+                exporter = FileSpanExporter(target[len("file:"):])
+            else:
+                exporter = OTLPHttpSpanExporter(target)
+        return cls(
+            exporter=exporter,
+            sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0.1")),
+            slow_ms=float(os.getenv("TRACE_SLOW_MS", "1000"))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name: str, traceparent: Optional[str] = None, **attributes):
+        """Open a span under the current one, starting a new trace if there is none
+
+        ``traceparent`` is only consulted when starting a trace, so a caller's
+        context is joined rather than replaced.
+        """
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        if parent is None:
+            remote = parse_traceparent(traceparent)
+            if remote:
+                trace = Trace(remote[0], remote[2], remote_parent_id=remote[1])
+            else:
+                trace = Trace(os.urandom(16).hex(), random.random() < self.sample_rate)
+            span = Span(trace, name, trace.remote_parent_id)
+        else:
+            span = Span(parent.trace, name, parent.span_id)
+        span.attributes.update(attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            span.trace.spans.append(span)
+            if parent is None:
+                self._finish(span)
+
+    def current_traceparent(self) -> Optional[str]:
+        """traceparent header value for outgoing calls, if a trace is active"""
+        span = _current_span.get()
+        return span.traceparent if span is not None else None
+
+    def _finish(self, root: Span) -> None:
+        trace = root.trace
+        self.stats["traces"] += 1
+        keep = trace.head_sampled
+        if not keep and (trace.error or root.duration_ms >= self.slow_ms):
+            keep = True
+            self.stats["tail_kept"] += 1
+        if keep:
+            self.stats["exported"] += 1
+            self.exporter.submit([s.to_dict() for s in trace.spans])
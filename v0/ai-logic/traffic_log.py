@@ -0,0 +1,318 @@
+"""
+Traffic capture log and replay.
+
+Every orchestration - request, routing decision, timings and outcome - is
+queued to a background thread that msgpack-encodes records in batches and
+appends them to a length-prefixed binary log, rotating to a new file by
+size. The event loop only builds a dict and does a non-blocking put; when
+the queue is full records are dropped and counted rather than slowing
+requests down.
+
+File layout: the magic ``AITL`` and a format version byte, then records of
+a 4-byte big-endian length followed by that many bytes of msgpack. A torn
+final record (crash mid-write) is ignored on read.
+
+TrafficReplayer re-drives a capture against a running instance at the
+original pacing or scaled by ``speed``, regrouping batch items into the
+/batch/orchestrate calls they arrived in, and reports latency plus how many
+requests now route to a different provider or end differently.
+
+Configuration (environment):
+    TRAFFIC_LOG_DIR        directory to capture into (unset disables capture)
+    TRAFFIC_LOG_MAX_MB     rotate after this many megabytes (default 64)
+    TRAFFIC_LOG_FLUSH_MS   longest a record waits before being written (default 500)
+"""
+
+import asyncio
+import contextvars
+import itertools
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import httpx
+import msgpack
+
+from loadtest import LoadTestReport
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AITL"
+FORMAT_VERSION = 1
+_LENGTH = struct.Struct(">I")
+_STOP = object()
+
+# (batch id, index, size) of the batch item being orchestrated, if any
+current_batch: contextvars.ContextVar[Optional[Tuple[str, int, int]]] = contextvars.ContextVar(
+    "current_batch", default=None
+)
+
+
+class TrafficRecorder:
+    """Batched, size-rotated msgpack capture written from a background thread"""
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024, flush_interval: float = 0.5,
+                 max_queue: int = 10000, batch_size: int = 512):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._size = 0
+        self._sequence = itertools.count()
+        self._batch_ids = itertools.count()
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="TrafficRecorder", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_env(cls) -> Optional["TrafficRecorder"]:
+        directory = os.getenv("TRAFFIC_LOG_DIR")
+        if not directory:
+            return None
+        return cls(
+            directory,
+            max_bytes=int(float(os.getenv("TRAFFIC_LOG_MAX_MB", "64")) * 1024 * 1024),
+            flush_interval=float(os.getenv("TRAFFIC_LOG_FLUSH_MS", "500")) / 1000
+        )
+
+    def next_batch_id(self) -> str:
+        return f"{os.getpid()}-{next(self._batch_ids)}"
+
+    def record(self, record: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write out queued records and close the current file"""
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Traffic log queue full at shutdown, some records were not written")
+            return
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        packer = msgpack.Packer()
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if any(record is _STOP for record in batch):
+                batch = [record for record in batch if record is not _STOP]
+                stopping = True
+            if batch:
+                try:
+                    self._write(b"".join(_frame(packer.pack(record)) for record in batch))
+                    self.written += len(batch)
+                except Exception as e:
+                    logger.warning(f"Traffic log write failed, {len(batch)} records lost: {e}")
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _write(self, data: bytes) -> None:
+        if self._file is None or (self._size > len(MAGIC) + 1 and self._size + len(data) > self.max_bytes):
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def _rotate(self) -> None:
+        if self._file:
+            self._file.close()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        path = os.path.join(self.directory, f"traffic-{stamp}-{os.getpid()}-{next(self._sequence):04d}.msgpack")
+        self._file = open(path, "ab")
+        self._file.write(MAGIC + bytes([FORMAT_VERSION]))
+        self._size = len(MAGIC) + 1
+
+
+def _frame(payload: bytes) -> bytes:
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def read_traffic(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of one capture file; stops quietly at a torn final record"""
+    with open(path, "rb") as f:
+        header = f.read(len(MAGIC) + 1)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a traffic log")
+        if header[len(MAGIC)] != FORMAT_VERSION:
+            raise ValueError(f"{path} has unsupported traffic log version {header[len(MAGIC)]}")
+        while True:
+            prefix = f.read(_LENGTH.size)
+            if len(prefix) < _LENGTH.size:
+                return
+            (length,) = _LENGTH.unpack(prefix)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield msgpack.unpackb(payload)
+
+
+def traffic_files(paths: Iterable[str]) -> List[str]:
+    """Capture files named by ``paths``, expanding directories in write order"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.endswith(".msgpack")
+            ))
+        else:
+            files.append(path)
+    return files
+
+
+def iter_traffic(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    for path in traffic_files(paths):
+        yield from read_traffic(path)
+
+
+@dataclass
+class ReplayEvent:
+    """One HTTP call to re-issue: a single orchestration or a whole batch"""
+    offset: float
+    records: List[Dict[str, Any]]
+    batch: bool
+
+
+def build_events(records: Iterable[Dict[str, Any]]) -> List[ReplayEvent]:
+    """Order records by arrival and regroup batch items into their original call"""
+    events = []
+    batches: Dict[str, ReplayEvent] = {}
+    start = None
+    for record in sorted(records, key=lambda r: r["ts"]):
+        if start is None:
+            start = record["ts"]
+        batch = record.get("batch")
+        if batch is None:
+            events.append(ReplayEvent(record["ts"] - start, [record], False))
+            continue
+        event = batches.get(batch[0])
+        if event is None:
+            event = batches[batch[0]] = ReplayEvent(record["ts"] - start, [], True)
+            events.append(event)
+        event.records.append(record)
+    for event in batches.values():
+        event.records.sort(key=lambda r: r["batch"][1])
+    return sorted(events, key=lambda e: e.offset)
+
+
+@dataclass
+class ReplayReport(LoadTestReport):
+    """Load test results plus drift from the recorded outcomes"""
+    provider_changed: int = 0
+    outcome_changed: int = 0
+    compared: int = 0
+    lag_ms: List[float] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        lag = sorted(self.lag_ms)
+        return {
+            **super().summary(),
+            "compared": self.compared,
+            "provider_changed": self.provider_changed,
+            "outcome_changed": self.outcome_changed,
+            "max_schedule_lag_ms": round(lag[-1], 2) if lag else 0.0
+        }
+
+
+class TrafficReplayer:
+    """Re-drives captured traffic with its original pacing, optionally time-scaled"""
+
+    def __init__(self, target_url: str, speed: float = 1.0, concurrency: int = 256, timeout: float = 30.0):
+        self.target_url = target_url
+        self.speed = speed
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.report = ReplayReport()
+
+    async def run(self, events: List[ReplayEvent]) -> ReplayReport:
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = []
+        async with httpx.AsyncClient(base_url=self.target_url, limits=limits, timeout=self.timeout) as client:
+            start = time.perf_counter()
+
+            async def fire(event: ReplayEvent, scheduled: float):
+                async with slots:
+                    self.report.lag_ms.append((time.perf_counter() - scheduled) * 1000)
+                    await self._issue(client, event, scheduled)
+
+            for event in events:
+                # speed <= 0 replays as fast as the concurrency limit allows
+                scheduled = start + (event.offset / self.speed if self.speed > 0 else 0.0)
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(fire(event, scheduled)))
+            await asyncio.gather(*tasks)
+            self.report.elapsed = time.perf_counter() - start
+        return self.report
+
+    async def _issue(self, client: httpx.AsyncClient, event: ReplayEvent, scheduled: float) -> None:
+        if event.batch:
+            url, body = "/batch/orchestrate", [r["request"] for r in event.records]
+        else:
+            url, body = "/orchestrate/video", event.records[0]["request"]
+        try:
+            response = await client.post(url, json=body)
+            status = str(response.status_code)
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = None
+        except httpx.HTTPError as e:
+            status, payload = type(e).__name__, None
+
+        report = self.report
+        report.latencies_ms.append((time.perf_counter() - scheduled) * 1000)
+        report.requests += 1
+        report.status_codes[status] = report.status_codes.get(status, 0) + 1
+        if status != "200":
+            report.failed_requests += 1
+
+        if event.batch:
+            results = payload.get("batch_results", []) if isinstance(payload, dict) else []
+            outcomes = [
+                (r.get("result") or {}) if r.get("status") == "success" else None for r in results
+            ] + [None] * (len(event.records) - len(results))
+        else:
+            outcomes = [payload if status == "200" and isinstance(payload, dict) else None]
+
+        for record, result in zip(event.records, outcomes):
+            report.items += 1
+            if result is None:
+                report.failed_items += 1
+            elif result.get("fallback_used"):
+                report.fallbacks += 1
+            self._compare(record, result)
+
+    def _compare(self, record: Dict[str, Any], result: Optional[Dict[str, Any]]) -> None:
+        report = self.report
+        report.compared += 1
+        was_success = record["outcome"]["status"] == "success"
+        if was_success != (result is not None):
+            report.outcome_changed += 1
+        recorded = (record.get("routing") or {}).get("provider")
+        if result is not None and recorded and result.get("provider") != recorded:
+            report.provider_changed += 1
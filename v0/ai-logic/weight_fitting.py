@@ -0,0 +1,261 @@
+"""
+Offline fitting of the routing score model.
+
+Learns ProviderRouter's score weights - and optionally style compatibility
+and content preference entries - from recorded outcomes, and reports how
+the fitted model does on held-out records compared to the current one.
+
+Outcome records are JSON or JSONL, one per finished job:
+
+    {"request": {...VideoRequest fields...}, "provider": "runway",
+     "success": true, "latency_s": 412.0, "accepted": true}
+
+Each outcome is reduced to a utility in [0, 1] (failure 0; success scaled by
+user acceptance and discounted for latency). Weights are the non-negative
+least-squares fit of utility on the five factor scores of the provider that
+actually ran, normalized to sum to 1. Table entries move by their mean
+residual, shrunk toward the current value when there are few records.
+
+Held-out evaluation reports calibrated prediction error and a replay
+estimate: the mean utility of held-out records where the model would have
+picked the provider that was actually used. The replay estimate is only as
+good as the variety of providers in the log.
+"""
+
+import hashlib
+import itertools
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from schemas import VideoRequest
+from routing import ProviderRouter, PROVIDER_NAMES
+from routing_model import FACTORS, RoutingModel
+
+
+@dataclass(frozen=True)
+class Outcome:
+    """One recorded generation and how it turned out"""
+    request: VideoRequest
+    provider: str
+    success: bool
+    latency_s: Optional[float] = None
+    accepted: Optional[bool] = None
+
+
+def load_outcomes(paths: Iterable[str]) -> Tuple[List[Outcome], List[Tuple[str, str]]]:
+    """Outcome records from JSON or JSONL files; invalid records are reported, not fatal"""
+    outcomes = []
+    errors = []
+    for path in paths:
+        with open(path, "r") as f:
+            text = f.read()
+        try:
+            loaded = json.loads(text)
+            records = list(enumerate(loaded if isinstance(loaded, list) else [loaded], start=1))
+        except ValueError:
+            records = [(number, line) for number, line in enumerate(text.splitlines(), start=1) if line.strip()]
+
+        for number, record in records:
+            try:
+                if isinstance(record, str):
+                    record = json.loads(record)
+                if record["provider"] not in PROVIDER_NAMES:
+                    raise ValueError(f"Unknown provider {record['provider']!r}")
+                outcomes.append(Outcome(
+                    request=VideoRequest(**record["request"]),
+                    provider=record["provider"],
+                    success=bool(record["success"]),
+                    latency_s=record.get("latency_s"),
+                    accepted=record.get("accepted")
+                ))
+            except Exception as e:
+                errors.append((f"{path}:{number}", f"{type(e).__name__}: {e}".replace("\n", " ")))
+    return outcomes, errors
+
+
+def outcome_utility(outcome: Outcome, latency_budget: float = 600.0, latency_weight: float = 0.2) -> float:
+    """Reduce an outcome to [0, 1]: 0 on failure, discounted by rejection and latency"""
+    if not outcome.success:
+        return 0.0
+    utility = {True: 1.0, False: 0.25, None: 0.75}[outcome.accepted]
+    if outcome.latency_s is not None:
+        utility *= 1.0 - latency_weight * min(1.0, outcome.latency_s / latency_budget)
+    return utility
+
+
+def is_holdout(outcome: Outcome, index: int, fraction: float) -> bool:
+    """Stable train/test split keyed on request id (or position when absent)"""
+    key = outcome.request.request_id or f"#{index}"
+    return int(hashlib.sha1(key.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF < fraction
+
+
+def fit_nonnegative(X: np.ndarray, y: np.ndarray) -> Tuple[float, np.ndarray]:
+    """Least squares ``y ~ a + X @ c`` with ``c >= 0``
+
+    With five factors every active set can be tried exactly; the best
+    feasible solution is the NNLS optimum.
+    """
+    num_features = X.shape[1]
+    best = (float(y.mean()), np.zeros(num_features))
+    best_error = float(((y - y.mean()) ** 2).sum())
+    for size in range(1, num_features + 1):
+        for active in itertools.combinations(range(num_features), size):
+            design = np.column_stack([np.ones(len(X)), X[:, active]])
+            solution, *_ = np.linalg.lstsq(design, y, rcond=None)
+            if (solution[1:] < 0).any():
+                continue
+            error = float(((design @ solution - y) ** 2).sum())
+            if error < best_error - 1e-12:
+                coef = np.zeros(num_features)
+                coef[list(active)] = solution[1:]
+                best, best_error = (float(solution[0]), coef), error
+    return best
+
+
+def calibrate(scores: np.ndarray, y: np.ndarray) -> Tuple[float, float]:
+    """Affine map from total score to expected utility"""
+    if len(scores) < 2 or np.ptp(scores) == 0:
+        return float(y.mean()) if len(y) else 0.0, 0.0
+    slope, intercept = np.polyfit(scores, y, 1)
+    return float(intercept), float(slope)
+
+
+class _Scored:
+    """Factor scores of a set of outcomes under one router"""
+
+    def __init__(self, router: ProviderRouter, outcomes: List[Outcome]):
+        self.router = router
+        self.outcomes = outcomes
+        provider_index = {provider: i for i, provider in enumerate(PROVIDER_NAMES)}
+        self.all_factors = np.array([
+            [[score.factor_scores()[f] for f in FACTORS] for score in router.provider_scores(o.request)]
+            for o in outcomes
+        ]).reshape(len(outcomes), len(PROVIDER_NAMES), len(FACTORS))
+        self.logged = np.array([provider_index[o.provider] for o in outcomes], dtype=np.int64)
+        self.preferred = np.array([provider_index.get(o.request.preferred_provider, -1) for o in outcomes],
+                                  dtype=np.int64)
+        feasible = [
+            router.capability_index.feasible(o.request.duration, o.request.aspect_ratio,
+                                             o.request.required_features or ())
+            for o in outcomes
+        ]
+        self.feasible = np.array([[provider in allowed for provider in PROVIDER_NAMES] for allowed in feasible],
+                                 dtype=bool).reshape(len(outcomes), len(PROVIDER_NAMES))
+
+    @property
+    def logged_factors(self) -> np.ndarray:
+        return self.all_factors[np.arange(len(self.outcomes)), self.logged]
+
+    def weight_vector(self) -> np.ndarray:
+        return np.array([self.router.weights[f] for f in FACTORS])
+
+    def chosen(self) -> np.ndarray:
+        """Provider index this router would pick for each outcome; -1 where it would reject the request"""
+        # The router only scores feasible providers
+        totals = np.where(self.feasible, self.all_factors @ self.weight_vector(), -np.inf)
+        picks = np.where(self.feasible.any(axis=1), totals.argmax(axis=1), -1)
+        return np.where(self.preferred >= 0, self.preferred, picks)
+
+
+def _evaluate(train: _Scored, test: _Scored, y_train: np.ndarray, y_test: np.ndarray) -> Dict[str, Any]:
+    weights = train.weight_vector()
+    intercept, slope = calibrate(train.logged_factors @ weights, y_train)
+    predicted = intercept + slope * (test.logged_factors @ weights)
+    matched = test.chosen() == test.logged
+    return {
+        "mse": round(float(((predicted - y_test) ** 2).mean()), 6) if len(y_test) else None,
+        "replay_matched": int(matched.sum()),
+        "replay_utility": round(float(y_test[matched].mean()), 4) if matched.any() else None
+    }
+
+
+def _table_adjustments(scored: _Scored, residuals: np.ndarray, slope: float, shrinkage: float,
+                       attribute: str, factor: str) -> Dict[str, Dict[str, float]]:
+    """Move table entries by their shrunk mean residual, expressed in factor-score units"""
+    factor_weight = scored.router.weights[factor] * slope
+    if factor_weight <= 0:
+        return {}
+    factor_column = FACTORS.index(factor)
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for i, outcome in enumerate(scored.outcomes):
+        key = getattr(outcome.request, attribute)
+        if key:
+            groups.setdefault((key, outcome.provider), []).append(i)
+
+    table: Dict[str, Dict[str, float]] = {}
+    for (key, provider), rows in sorted(groups.items()):
+        current = float(scored.logged_factors[rows[0], factor_column])
+        shrink = len(rows) / (len(rows) + shrinkage)
+        delta = float(residuals[rows].mean()) / factor_weight * shrink
+        table.setdefault(key, {})[provider] = round(min(1.0, max(0.0, current + delta)), 4)
+    return table
+
+
+def fit_model(outcomes: List[Outcome], base: Optional[ProviderRouter] = None, holdout: float = 0.2,
+              fit_tables: bool = False, shrinkage: float = 20.0, latency_budget: float = 600.0,
+              latency_weight: float = 0.2) -> Tuple[RoutingModel, Dict[str, Any]]:
+    """Fit a routing model and compare it with ``base`` (the current router) on held-out outcomes"""
+    base = base or ProviderRouter()
+    split = [is_holdout(o, i, holdout) for i, o in enumerate(outcomes)]
+    train = [o for o, held in zip(outcomes, split) if not held]
+    test = [o for o, held in zip(outcomes, split) if held]
+    if len(train) < len(FACTORS) + 1:
+        raise ValueError(f"Need at least {len(FACTORS) + 1} training outcomes, got {len(train)}")
+
+    y_train = np.array([outcome_utility(o, latency_budget, latency_weight) for o in train])
+    y_test = np.array([outcome_utility(o, latency_budget, latency_weight) for o in test])
+
+    base_style = dict(base.style_overrides)
+    base_content = dict(base.model.content_preferences) if base.model else {}
+
+    def fit_weights(router: ProviderRouter) -> Dict[str, float]:
+        _, coef = fit_nonnegative(_Scored(router, train).logged_factors, y_train)
+        if coef.sum() <= 0:
+            return dict(router.weights)
+        return {f: round(float(c / coef.sum()), 4) for f, c in zip(FACTORS, coef)}
+
+    model = RoutingModel(weights=fit_weights(base), style_compatibility=base_style,
+                         content_preferences=base_content)
+
+    if fit_tables:
+        scored = _Scored(ProviderRouter(model=model), train)
+        weights = scored.weight_vector()
+        intercept, slope = calibrate(scored.logged_factors @ weights, y_train)
+        residuals = y_train - (intercept + slope * (scored.logged_factors @ weights))
+        style = _table_adjustments(scored, residuals, slope, shrinkage, "style", "style")
+        content = _table_adjustments(scored, residuals, slope, shrinkage, "content_type", "content")
+        model = RoutingModel(
+            weights=model.weights,
+            style_compatibility=_merge_tables(base_style, style),
+            content_preferences=_merge_tables(base_content, content)
+        )
+        # Refit weights against the adjusted tables
+        model.weights = fit_weights(ProviderRouter(model=model))
+
+    fitted = ProviderRouter(model=model)
+    baseline_metrics = _evaluate(_Scored(base, train), _Scored(base, test), y_train, y_test)
+    fitted_metrics = _evaluate(_Scored(fitted, train), _Scored(fitted, test), y_train, y_test)
+
+    report = {
+        "outcomes": len(outcomes),
+        "train": len(train),
+        "test": len(test),
+        "logged_utility": round(float(y_test.mean()), 4) if len(y_test) else None,
+        "utility": {"latency_budget_s": latency_budget, "latency_weight": latency_weight},
+        "fit_tables": fit_tables,
+        "baseline": {"weights": dict(base.weights), "version": base.model.version if base.model else None,
+                     **baseline_metrics},
+        "fitted": {"weights": dict(model.weights), **fitted_metrics}
+    }
+    model.training = report
+    return model, report
+
+
+def _merge_tables(base: Dict[str, Dict[str, float]], update: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    merged = {key: dict(scores) for key, scores in base.items()}
+    for key, scores in update.items():
+        merged.setdefault(key, {}).update(scores)
+    return merged
@@ -0,0 +1,237 @@
+"""
+What-if routing simulator.
+
+Replays recorded requests through ProviderRouter under many candidate
+SCORE_WEIGHTS at once. Factor scores don't depend on the weights, so each
+request is scored once into a (requests, providers, factors) tensor, requests
+with identical scores are collapsed, and every candidate is evaluated with a
+single tensor product and argmax - hundreds of weight sets cost about as
+much as one.
+
+Cost is reported in relative units per second of video (from each
+provider's cost tier) and ETA from ``estimated_time_per_second``; both are
+projections for comparing candidates, not bills or SLAs.
+"""
+
+import itertools
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from schemas import VideoRequest
+from routing import ProviderRouter, PROVIDER_NAMES, SCORE_WEIGHTS
+from routing_model import FACTORS
+
+# Relative generation cost per second of video by cost tier
+COST_TIER_UNITS = {
+    "very_low": 0.1,
+    "low": 0.5,
+    "medium": 1.0,
+    "high": 2.0
+}
+
+DEFAULT_DURATION = 30
+
+
+def load_requests(paths: Iterable[str]) -> Tuple[List[VideoRequest], List[Tuple[str, str]]]:
+    """Requests from JSON or JSONL logs; records may wrap the config in a ``request`` key"""
+    requests = []
+    errors = []
+    for path in paths:
+        with open(path, "r") as f:
+            text = f.read()
+        try:
+            loaded = json.loads(text)
+            records = loaded if isinstance(loaded, list) else [loaded]
+        except ValueError:
+            records = []
+            for number, line in enumerate(text.splitlines(), start=1):
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError as e:
+                    errors.append((f"{path}:{number}", str(e)))
+
+        for index, record in enumerate(records):
+            try:
+                config = record.get("request", record) if isinstance(record, dict) else record
+                requests.append(VideoRequest(**config))
+            except Exception as e:
+                errors.append((f"{path}[{index}]", str(e).replace("\n", " ")))
+    return requests, errors
+
+
+def weight_grid(ranges: Dict[str, Sequence[float]], base: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Cartesian product of per-factor weight values, normalized to sum to 1
+
+    Factors without a range keep their ``base`` (default SCORE_WEIGHTS) value.
+    Candidates that normalize to the same weights are kept once.
+    """
+    base = base or SCORE_WEIGHTS
+    axes = [ranges.get(factor, [base[factor]]) for factor in FACTORS]
+    grid = np.array(list(itertools.product(*axes)), dtype=np.float64)
+    totals = grid.sum(axis=1)
+    grid = grid[totals > 0] / totals[totals > 0, None]
+    _, first = np.unique(grid.round(9), axis=0, return_index=True)
+    return grid[np.sort(first)]
+
+
+def parse_range(spec: str) -> List[float]:
+    """'0.1:0.4:0.1' (inclusive) or '0.1,0.2,0.35' into a list of values"""
+    if ":" in spec:
+        start, stop, step = (float(part) for part in spec.split(":"))
+        count = int(round((stop - start) / step)) + 1
+        return [round(start + i * step, 10) for i in range(count)]
+    return [float(part) for part in spec.split(",")]
+
+
+@dataclass
+class TrafficTensor:
+    """Weight-independent scores of a request log, collapsed to unique rows"""
+    factors: np.ndarray      # (rows, providers, factors)
+    cost: np.ndarray         # (rows, providers) relative cost of generating the request
+    eta: np.ndarray          # (rows, providers) seconds
+    feasible: np.ndarray     # (rows, providers) provider passes the router's capability constraints
+    fixed: np.ndarray        # (rows,) preferred provider index, or -1
+    counts: np.ndarray       # (rows,) requests collapsed into each row
+
+    @property
+    def requests(self) -> int:
+        return int(self.counts.sum())
+
+
+def build_tensor(requests: List[VideoRequest], router: Optional[ProviderRouter] = None,
+                 cost_units: Optional[Dict[str, float]] = None) -> TrafficTensor:
+    """Score each request once against every provider"""
+    router = router or ProviderRouter()
+    capabilities = router.provider_capabilities
+    units = {
+        provider: (cost_units or {}).get(
+            provider, COST_TIER_UNITS.get(capabilities.get(provider, {}).get("cost_tier", "medium"), 1.0))
+        for provider in PROVIDER_NAMES
+    }
+    provider_index = {provider: i for i, provider in enumerate(PROVIDER_NAMES)}
+    num_factors = len(FACTORS)
+
+    rows = np.empty((len(requests), len(PROVIDER_NAMES) * (num_factors + 3) + 1), dtype=np.float64)
+    for i, request in enumerate(requests):
+        duration = request.duration or DEFAULT_DURATION
+        feasible = router.capability_index.feasible(
+            request.duration, request.aspect_ratio, request.required_features or ()
+        )
+        values = []
+        for score in router.provider_scores(request):
+            caps = capabilities.get(score.provider, {})
+            values.extend(score.factor_scores()[factor] for factor in FACTORS)
+            values.append(units[score.provider] * duration)
+            values.append(caps.get("estimated_time_per_second", 1.0) * duration)
+            values.append(score.provider in feasible)
+        values.append(provider_index.get(request.preferred_provider, -1))
+        rows[i] = values
+
+    unique, counts = np.unique(rows, axis=0, return_counts=True)
+    per_provider = unique[:, :-1].reshape(len(unique), len(PROVIDER_NAMES), num_factors + 3)
+    return TrafficTensor(
+        factors=per_provider[:, :, :num_factors],
+        cost=per_provider[:, :, num_factors],
+        eta=per_provider[:, :, num_factors + 1],
+        feasible=per_provider[:, :, num_factors + 2].astype(bool),
+        fixed=unique[:, -1].astype(np.int64),
+        counts=counts
+    )
+
+
+@dataclass
+class WhatIfResult:
+    """Per-candidate aggregates; row 0 of ``weights`` is the baseline"""
+    weights: np.ndarray          # (candidates, factors)
+    provider_counts: np.ndarray  # (candidates, providers)
+    total_cost: np.ndarray       # (candidates,)
+    mean_eta: np.ndarray
+    p95_eta: np.ndarray
+    mean_confidence: np.ndarray
+    infeasible: np.ndarray       # requests the router would reject: no provider meets their constraints
+    changed: np.ndarray          # requests routed differently from the baseline
+    requests: int
+
+    def rows(self) -> List[Dict[str, Any]]:
+        results = []
+        for k in range(len(self.weights)):
+            row = {"candidate": k, "baseline": k == 0}
+            row.update({f"w_{factor}": round(float(w), 4) for factor, w in zip(FACTORS, self.weights[k])})
+            row.update({
+                f"share_{provider}": round(float(self.provider_counts[k, p]) / self.requests, 4)
+                for p, provider in enumerate(PROVIDER_NAMES)
+            })
+            row.update({
+                "total_cost": round(float(self.total_cost[k]), 2),
+                "cost_per_request": round(float(self.total_cost[k]) / self.requests, 4),
+                "mean_eta_s": round(float(self.mean_eta[k]), 1),
+                "p95_eta_s": round(float(self.p95_eta[k]), 1),
+                "mean_confidence": round(float(self.mean_confidence[k]), 4),
+                "infeasible": int(self.infeasible[k]),
+                "changed_vs_baseline": round(float(self.changed[k]) / self.requests, 4)
+            })
+            results.append(row)
+        return results
+
+
+def simulate(tensor: TrafficTensor, candidates: np.ndarray, baseline: Optional[Sequence[float]] = None,
+             max_elements: int = 4_000_000) -> WhatIfResult:
+    """Route the whole log under every candidate weight set"""
+    baseline = np.asarray(baseline if baseline is not None else [SCORE_WEIGHTS[f] for f in FACTORS])
+    weights = np.vstack([baseline / baseline.sum(), candidates])
+    num_candidates = len(weights)
+    num_rows, num_providers, _ = tensor.factors.shape
+    counts = tensor.counts
+
+    # Process rows in slices so (candidates, rows, providers) stays bounded
+    step = max(1, max_elements // (num_candidates * num_providers))
+    choices = np.empty((num_candidates, num_rows), dtype=np.int64)
+    confidence = np.empty((num_candidates, num_rows), dtype=np.float64)
+    for start in range(0, num_rows, step):
+        block = slice(start, start + step)
+        totals = np.einsum("rpf,kf->krp", tensor.factors[block], weights)
+        # The router only scores feasible providers
+        totals = np.where(tensor.feasible[block][None], totals, -np.inf)
+        # argmax keeps the first provider on ties, matching the router's stable sort
+        chosen = totals.argmax(axis=2)
+        fixed = tensor.fixed[block]
+        chosen = np.where(fixed >= 0, fixed, chosen)
+        choices[:, block] = chosen
+        chosen_totals = np.take_along_axis(totals, chosen[:, :, None], axis=2)[:, :, 0]
+        # Rows with no feasible provider are rejected; they count as infeasible, not as confidence
+        confidence[:, block] = np.where(fixed >= 0, 1.0, np.where(np.isfinite(chosen_totals), chosen_totals, 0.0))
+
+    rows = np.arange(num_rows)
+    cost = tensor.cost[rows, choices]
+    eta = tensor.eta[rows, choices]
+    feasible = tensor.feasible[rows, choices]
+
+    provider_counts = np.stack(
+        [((choices == p) * feasible * counts).sum(axis=1) for p in range(num_providers)], axis=1)
+
+    return WhatIfResult(
+        weights=weights,
+        provider_counts=provider_counts,
+        total_cost=(cost * feasible * counts).sum(axis=1),
+        mean_eta=(eta * counts).sum(axis=1) / counts.sum(),
+        p95_eta=_weighted_percentile(eta, counts, 95),
+        mean_confidence=(confidence * counts).sum(axis=1) / counts.sum(),
+        infeasible=((~feasible) * counts).sum(axis=1),
+        changed=((choices != choices[0]) * counts).sum(axis=1),
+        requests=int(counts.sum())
+    )
+
+
+def _weighted_percentile(values: np.ndarray, weights: np.ndarray, percentile: float) -> np.ndarray:
+    """Per-row percentile of ``values`` where each column occurs ``weights`` times"""
+    order = np.argsort(values, axis=1)
+    sorted_values = np.take_along_axis(values, order, axis=1)
+    cumulative = np.cumsum(weights[order], axis=1)
+    target = weights.sum() * percentile / 100
+    index = (cumulative < target).sum(axis=1)
+    return sorted_values[np.arange(len(values)), np.minimum(index, values.shape[1] - 1)]
@@ -1,7 +1,7 @@
 import express from 'express';
 import { validateApiKey } from '../utils/auth.js';
 import { validateConfig } from '../services/configService.js';
-import { createJob } from '../services/jobService.js';
+import { createJob, getIdempotentResponse, rememberIdempotentResponse } from '../services/jobService.js';
 import { generateWithProvider } from '../services/providerService.js';
 import { logger } from '../utils/logger.js';
 
@@ -15,6 +15,17 @@ router.post('/', async (req, res) => {
   try {
     const config = req.body;
     
+    // A retried submit with the same Idempotency-Key gets the original job back
+    const idempotencyKey = req.headers['idempotency-key'];
+    const scopedKey = idempotencyKey && `${req.headers['x-api-key']}:${idempotencyKey}`;
+    if (scopedKey) {
+      const previous = getIdempotentResponse(scopedKey);
+      if (previous) {
+        logger.info(`Replaying job ${previous.jobId} for idempotency key ${idempotencyKey}`);
+        return res.status(202).json(previous);
+      }
+    }
+    
     // Validate configuration
     const validationErrors = validateConfig(config);
     if (validationErrors.length > 0) {
@@ -46,6 +57,9 @@ router.post('/', async (req, res) => {
     
     // Create job for tracking
     const jobResponse = createJob(config, routing);
+    if (scopedKey) {
+      rememberIdempotentResponse(scopedKey, jobResponse);
+    }
     
     // Start async generation (don't await)
     generateVideoAsync(jobResponse.jobId, config, routing);
@@ -1,4 +1,5 @@
 // Server entry
+import fs from 'fs';
 import dotenv from 'dotenv';
 import app from './app.js';
 import { logger } from './utils/logger.js';
@@ -6,7 +7,20 @@ import { logger } from './utils/logger.js';
 dotenv.config();
 
 const PORT = process.env.PORT || 3000;
+const SOCKET_PATH = process.env.NODE_SOCKET_PATH;
 
 app.listen(PORT, () => {
   logger.info(`AI Story API server running on port ${PORT}`);
-});
\ No newline at end of file
+});
+
+// Also serve a co-located ai-logic over a Unix domain socket (NODE_API_URL=unix://<path>)
+if (SOCKET_PATH) {
+  if (fs.existsSync(SOCKET_PATH)) {
+    fs.unlinkSync(SOCKET_PATH);
+  }
+  
+  app.listen(SOCKET_PATH, () => {
+    fs.chmodSync(SOCKET_PATH, 0o660);
+    logger.info(`AI Story API server listening on socket ${SOCKET_PATH}`);
+  });
+}
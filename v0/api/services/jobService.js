@@ -3,6 +3,10 @@ import { logger } from '../utils/logger.js';
 // In-memory job storage (replace with database in production)
 const jobs = new Map();
 
+// Idempotency-Key -> { response, createdAt } so retried submits return the original job
+const idempotentResponses = new Map();
+const IDEMPOTENCY_TTL = 24 * 60 * 60 * 1000;
+
 export const createJob = (config, routing) => {
   const jobId = `job_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
   
@@ -32,6 +36,24 @@ export const createJob = (config, routing) => {
   };
 };
 
+export const getIdempotentResponse = (key) => {
+  const entry = idempotentResponses.get(key);
+  if (!entry) {
+    return null;
+  }
+  
+  if (Date.now() - entry.createdAt > IDEMPOTENCY_TTL) {
+    idempotentResponses.delete(key);
+    return null;
+  }
+  
+  return entry.response;
+};
+
+export const rememberIdempotentResponse = (key, response) => {
+  idempotentResponses.set(key, { response, createdAt: Date.now() });
+};
+
 export const getJob = (jobId) => {
   const job = jobs.get(jobId);
   if (!job) {
@@ -172,6 +194,12 @@ export const cleanupOldJobs = (maxAge = 24 * 60 * 60 * 1000) => {
     }
   }
   
+  for (const [key, entry] of idempotentResponses.entries()) {
+    if (entry.createdAt < cutoff.getTime()) {
+      idempotentResponses.delete(key);
+    }
+  }
+  
   if (cleaned > 0) {
     logger.info(`Cleaned up ${cleaned} old jobs`);
   }